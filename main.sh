@@ -1,3 +1,3 @@
 #!/bin/bash
-python3 src/main.py
-cd public && python3 -m http.server 8888
\ No newline at end of file
+# Build, then serve public/ from memory (with ETags, 304s and gzip) on port 8888
+python3 src/main.py --serve 8888
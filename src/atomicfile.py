@@ -0,0 +1,28 @@
+import contextlib
+import os
+
+
+@contextlib.contextmanager
+def atomic_path(path):
+    """Yields a temporary path next to path, which is moved over path once the block succeeds.
+
+    Readers never see a half-written file, and a failed write leaves the old file in place
+    and no temporary file behind. The temporary name ends in ".tmp<pid>", so processes
+    writing the same path don't collide.
+    """
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@contextlib.contextmanager
+def atomic_open(path, mode='w'):
+    """Opens a temporary file next to path and moves it over path only once writing succeeded."""
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, mode) as f:
+            yield f
@@ -0,0 +1,61 @@
+# Benchmark: single-pass classify_block against the original cascading block_to_block_type
+#
+#   python3 src/bench_blocks.py [--lines N] [--repeat N] [--json]
+#
+# "cascading" times the old checks; "single-pass" times classify_block, which also returns
+# the split lines that the old code had to split again in markdown_to_html_node.
+
+import argparse
+import json
+import timeit
+from helper_functions import block_to_block_type_cascading, classify_block
+
+
+def make_blocks(lines):
+    """Returns one sample block per block type, list-like types having `lines` lines."""
+    return {
+        "heading-1": "# A heading",
+        "heading-6": "###### A small heading",
+        "code": "```\n" + "\n".join(f"    call({i})" for i in range(lines)) + "\n```",
+        "quote": "\n".join(f"> quoted line {i}" for i in range(lines)),
+        "unordered-list": "\n".join(f"* item {i}" for i in range(lines)),
+        "ordered-list": "\n".join(f"{i}. item" for i in range(1, lines + 1)),
+        "paragraph": "\n".join(f"A sentence about things, number {i}." for i in range(lines)),
+    }
+
+
+def run(lines, repeat):
+    results = []
+    for block_type, block in make_blocks(lines).items():
+        assert classify_block(block)[0] == block_to_block_type_cascading(block) == block_type
+        number = max(1, 20000 // lines)
+        # The old code split list blocks a second time to build the list items
+        def cascading():
+            if block_to_block_type_cascading(block).endswith("list"):
+                block.splitlines()
+        old = min(timeit.repeat(cascading, number=number, repeat=repeat)) / number * 1e6
+        new = min(timeit.repeat(lambda: classify_block(block), number=number, repeat=repeat)) / number * 1e6
+        results.append({"block_type": block_type, "lines": block.count("\n") + 1,
+                        "cascading_us": round(old, 3), "single_pass_us": round(new, 3),
+                        "speedup": round(old / new, 2)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the block classifier.")
+    parser.add_argument("--lines", type=int, default=20, help="lines in list, quote, code and paragraph blocks")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.lines, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'block type':16} {'lines':>6} {'cascading us':>13} {'single-pass us':>15} {'speedup':>8}")
+    for r in results:
+        print(f"{r['block_type']:16} {r['lines']:>6} {r['cascading_us']:>13} {r['single_pass_us']:>15} {r['speedup']:>8}")
+
+
+if __name__ == "__main__":
+    main()
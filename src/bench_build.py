@@ -0,0 +1,167 @@
+# Benchmark: per-stage timings for a full build of a synthetic corpus
+#
+#   python3 src/bench_build.py [--pages N] [--blocks N] [--density F] [--depth N] [--shared F] [--repeat N]
+#                              [--output results.json] [--compare baseline.json] [--threshold F]
+#
+# Every stage is timed on its own over the whole corpus, so the numbers add up to
+# more than a real build (markdown_to_html_node runs the block and inline stages again).
+# With --compare the run exits with status 1 if any stage got slower than the baseline
+# by more than --threshold.
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from atomicfile import atomic_open
+from bench_corpus import CorpusGenerator
+from blockcache import BlockCache
+from helper_functions import (block_to_block_type, extract_title, markdown_to_blocks, markdown_to_html_node,
+                              text_to_textnodes)
+from manifest import generator_version
+from template import load_template
+
+RESULTS_VERSION = 1
+STAGES = ("read", "markdown_to_blocks", "block_to_block_type", "text_to_textnodes",
+          "markdown_to_html_node", "markdown_to_html_node_cached", "to_html", "template", "write")
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "template.html")
+
+
+def list_pages(content_dir):
+    paths = []
+    for root, dirs, files in os.walk(content_dir):
+        paths.extend(os.path.join(root, file) for file in files if file.endswith(".md"))
+    return sorted(paths)
+
+
+def timed(stage, timings, function, items):
+    """Runs function over items, adds the elapsed seconds to timings[stage] and returns the results."""
+    start = time.perf_counter()
+    results = [function(item) for item in items]
+    timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+    return results
+
+
+def run_once(paths, template_path, output_dir):
+    timings = {}
+
+    def read(path):
+        with open(path) as f:
+            return f.read()
+
+    def classify(blocks):
+        return [block_to_block_type(block) for block in blocks]
+
+    def tokenize(blocks):
+        return [text_to_textnodes(block) for block in blocks]
+
+    def render_template(page):
+        markdown, html = page
+        return load_template(template_path).render({"Title": extract_title(markdown), "Content": html})
+
+    def write(page):
+        index, html = page
+        with atomic_open(os.path.join(output_dir, f"page{index}.html")) as f:
+            f.write(html)
+
+    markdown = timed("read", timings, read, paths)
+    blocks = timed("markdown_to_blocks", timings, markdown_to_blocks, markdown)
+    timed("block_to_block_type", timings, classify, blocks)
+    timed("text_to_textnodes", timings, tokenize, blocks)
+    nodes = timed("markdown_to_html_node", timings, markdown_to_html_node, markdown)
+    # A fresh block cache per run, as in a single build process
+    cache = BlockCache()
+    timed("markdown_to_html_node_cached", timings, lambda text: markdown_to_html_node(text, cache=cache), markdown)
+    html = timed("to_html", timings, lambda node: node.to_html(), nodes)
+    pages = timed("template", timings, render_template, list(zip(markdown, html)))
+    timed("write", timings, write, list(enumerate(pages)))
+    return timings
+
+
+def run(content_dir, template_path, repeat):
+    """Times every stage over the pages in content_dir, keeping the fastest of `repeat` runs."""
+    paths = list_pages(content_dir)
+    best = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for _ in range(repeat):
+            for stage, seconds in run_once(paths, template_path, output_dir).items():
+                best[stage] = min(seconds, best.get(stage, seconds))
+
+    source_bytes = sum(os.path.getsize(path) for path in paths)
+    stages = {}
+    for stage in STAGES:
+        stages[stage] = {"seconds": round(best[stage], 6),
+                         "us_per_page": round(best[stage] / max(1, len(paths)) * 1e6, 2),
+                         "mb_per_second": round(source_bytes / best[stage] / 1e6, 2) if best[stage] else None}
+    return {"pages": len(paths), "source_bytes": source_bytes, "stages": stages}
+
+
+def compare(results, baseline, threshold):
+    """Returns [(stage, baseline seconds, new seconds)] for every stage slower by more than threshold."""
+    regressions = []
+    for stage, timing in results["stages"].items():
+        old = baseline.get("stages", {}).get(stage)
+        if old and old["seconds"] and timing["seconds"] > old["seconds"] * (1 + threshold):
+            regressions.append((stage, old["seconds"], timing["seconds"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark each build stage on a synthetic corpus.")
+    parser.add_argument("--content", help="benchmark an existing content/ tree instead of generating one")
+    parser.add_argument("--template", default=TEMPLATE_PATH)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--blocks", type=int, default=30, help="blocks per page")
+    parser.add_argument("--density", type=float, default=0.1, help="fraction of words with inline markup")
+    parser.add_argument("--depth", type=int, default=2, help="directory nesting depth")
+    parser.add_argument("--shared", type=float, default=0.0, help="fraction of blocks repeated across pages")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="keep the fastest of this many runs")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--compare", help="baseline JSON results to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown per stage (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    corpus = None
+    with tempfile.TemporaryDirectory() as tmp:
+        content_dir = args.content
+        if content_dir is None:
+            corpus = CorpusGenerator(args.pages, args.blocks, args.density, args.depth, args.seed, args.shared)
+            content_dir = os.path.join(tmp, "content")
+            corpus.write(content_dir)
+        measured = run(content_dir, args.template, args.repeat)
+
+    results = {"version": RESULTS_VERSION,
+               "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+               "python": platform.python_version(),
+               "platform": platform.platform(),
+               "generator_version": generator_version(),
+               "corpus": corpus.params() if corpus else {"content": args.content},
+               **measured}
+
+    if args.output:
+        with atomic_open(args.output) as f:
+            json.dump(results, f, indent=2)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{results['pages']} pages, {results['source_bytes'] / 1e6:.1f} MB of markdown")
+        print(f"{'stage':30} {'seconds':>10} {'us/page':>10} {'MB/s':>8}")
+        for stage, timing in results["stages"].items():
+            print(f"{stage:30} {timing['seconds']:>10.4f} {timing['us_per_page']:>10.1f} {timing['mb_per_second']:>8}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for stage, old, new in regressions:
+            print(f"Regression in {stage}: {old:.4f}s -> {new:.4f}s (+{(new / old - 1) * 100:.0f}%)")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# Synthetic content/ trees for benchmarks
+#
+#   python3 src/bench_corpus.py OUTPUT_DIR [--pages N] [--blocks N] [--density F] [--depth N]
+#                                          [--shared F] [--seed N]
+
+import argparse
+import os
+import random
+
+WORDS = ("the fellowship ring shire hobbit wizard mountain river elven forge tower road "
+         "journey shadow light ancient realm king sword song council map").split()
+
+
+class CorpusGenerator():
+    """Generates reproducible markdown pages with a configurable shape.
+
+    blocks is the number of blocks per page, density the fraction of words that carry
+    inline markup (bold, italic, code, links or images) and depth how many directory
+    levels the pages are spread over. shared is the fraction of blocks drawn from a small
+    pool of boilerplate blocks repeated across pages.
+    """
+
+    def __init__(self, pages=100, blocks=30, density=0.1, depth=2, seed=0, shared=0.0) -> None:
+        self.pages = pages
+        self.blocks = blocks
+        self.density = density
+        self.depth = depth
+        self.seed = seed
+        self.shared = shared
+        pool_rng = random.Random(seed - 1)
+        self.shared_blocks = [self.block(pool_rng) for _ in range(20)]
+
+    def params(self):
+        return {"pages": self.pages, "blocks": self.blocks, "density": self.density,
+                "depth": self.depth, "seed": self.seed, "shared": self.shared}
+
+    def inline_text(self, rng, words):
+        parts = []
+        for _ in range(words):
+            word = rng.choice(WORDS)
+            if rng.random() < self.density:
+                kind = rng.randrange(5)
+                if kind == 0:
+                    word = f"**{word}**"
+                elif kind == 1:
+                    word = f"*{word}*"
+                elif kind == 2:
+                    word = f"`{word}()`"
+                elif kind == 3:
+                    word = f"[{word}](/{rng.choice(WORDS)}/{rng.choice(WORDS)})"
+                else:
+                    word = f"![{word}](/images/{rng.choice(WORDS)}.png)"
+            parts.append(word)
+        return " ".join(parts)
+
+    def block(self, rng):
+        kind = rng.random()
+        if kind < 0.1:
+            return f"{'#' * rng.randint(2, 4)} {self.inline_text(rng, 4)}"
+        if kind < 0.2:
+            return "\n".join(f"* {self.inline_text(rng, 8)}" for _ in range(rng.randint(2, 6)))
+        if kind < 0.27:
+            return "\n".join(f"{i}. {self.inline_text(rng, 8)}" for i in range(1, rng.randint(3, 7)))
+        if kind < 0.32:
+            return "\n".join(f"> {self.inline_text(rng, 12)}" for _ in range(rng.randint(1, 3)))
+        if kind < 0.37:
+            lines = [f"    {rng.choice(WORDS)}({rng.choice(WORDS)})" for _ in range(rng.randint(2, 8))]
+            return "```\n" + "\n".join(lines) + "\n```"
+        return self.inline_text(rng, rng.randint(30, 120)) + "."
+
+    def page(self, number):
+        rng = random.Random(self.seed * 1_000_003 + number)
+        blocks = [f"# Page {number}: {self.inline_text(random.Random(number), 3)}"]
+        for _ in range(self.blocks):
+            if rng.random() < self.shared:
+                blocks.append(rng.choice(self.shared_blocks))
+            else:
+                blocks.append(self.block(rng))
+        return "\n\n".join(blocks) + "\n"
+
+    def page_path(self, number):
+        parts = [f"section{(number // (10 ** level)) % 10}" for level in range(self.depth, 0, -1)]
+        return os.path.join(*parts, f"page{number}.md") if parts else f"page{number}.md"
+
+    def write(self, content_dir):
+        """Writes the corpus to content_dir and returns the number of bytes written."""
+        total = 0
+        for number in range(self.pages):
+            path = os.path.join(content_dir, self.page_path(number))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            text = self.page(number)
+            with open(path, 'w') as f:
+                f.write(text)
+            total += len(text.encode())
+        return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic content/ tree.")
+    parser.add_argument("output_dir")
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--blocks", type=int, default=30, help="blocks per page")
+    parser.add_argument("--density", type=float, default=0.1, help="fraction of words with inline markup")
+    parser.add_argument("--depth", type=int, default=2, help="directory nesting depth")
+    parser.add_argument("--shared", type=float, default=0.0, help="fraction of blocks repeated across pages")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generator = CorpusGenerator(args.pages, args.blocks, args.density, args.depth, args.seed, args.shared)
+    size = generator.write(args.output_dir)
+    print(f"Wrote {args.pages} pages ({size / 1e6:.1f} MB) to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Benchmark: cost of HTML escaping and attribute serialization in to_html
+#
+#   python3 src/bench_escape.py [--pages N] [--density F] [--repeat N] [--json]
+#
+# "unescaped" runs the same code with the escape functions swapped for identity
+# functions, i.e. what it cost before escaping existed; "render" is a page's whole
+# markdown_to_html_node + to_html. "concatenated" is the old props_to_html loop that
+# built the attribute string with +=.
+
+import argparse
+import html
+import json
+import timeit
+import htmlnode
+import leafnode
+from bench_corpus import CorpusGenerator
+from helper_functions import markdown_to_html_node
+from htmlnode import attributes_to_html, escape_attribute, escape_text
+
+CLEAN_TEXT = "The quick brown fox jumps over the lazy dog, twice. " * 2
+DIRTY_TEXT = CLEAN_TEXT + "if a < b && c > d"
+PROPS = {"href": "https://example.com/some/page", "target": "_blank", "class": "external"}
+
+
+def concatenated_props(props):
+    html_str = ''
+    for prop, value in props.items():
+        html_str += f' {prop}="{value}"'
+    return html_str
+
+
+def best(function, number, repeat):
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def timed(function, escaped):
+    """Times one call of a function, optionally with escaping switched off."""
+    saved = (htmlnode.escape_text, htmlnode.escape_attribute, leafnode.escape_text)
+    if not escaped:
+        identity = lambda value: f"{value}"
+        htmlnode.escape_text = htmlnode.escape_attribute = leafnode.escape_text = identity
+    try:
+        return best(function, 1, 1)
+    finally:
+        htmlnode.escape_text, htmlnode.escape_attribute, leafnode.escape_text = saved
+
+
+def compare_escaping(function, repeat):
+    """Returns the fastest (escaped, unescaped) seconds, alternating runs so that drift hits both alike."""
+    escaped, unescaped = [], []
+    for _ in range(repeat):
+        escaped.append(timed(function, True))
+        unescaped.append(timed(function, False))
+    return min(escaped), min(unescaped)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML escaping and props serialization.")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--density", type=float, default=0.1, help="fraction of words with inline markup")
+    parser.add_argument("--repeat", type=int, default=10, help="keep the fastest of this many runs")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    number = 200000
+    results = {"ns_per_call": {
+        "escape_text_clean": best(lambda: escape_text(CLEAN_TEXT), number, args.repeat) * 1e9,
+        "escape_text_dirty": best(lambda: escape_text(DIRTY_TEXT), number, args.repeat) * 1e9,
+        "html_escape_clean": best(lambda: html.escape(CLEAN_TEXT, quote=False), number, args.repeat) * 1e9,
+        "html_escape_dirty": best(lambda: html.escape(DIRTY_TEXT, quote=False), number, args.repeat) * 1e9,
+        "escape_attribute_clean": best(lambda: escape_attribute(PROPS["href"]), number, args.repeat) * 1e9,
+        "props_concatenated": best(lambda: concatenated_props(PROPS), number, args.repeat) * 1e9,
+        "props_joined_escaped": best(lambda: attributes_to_html(PROPS), number, args.repeat) * 1e9,
+    }}
+    results["ns_per_call"] = {name: round(ns, 1) for name, ns in results["ns_per_call"].items()}
+
+    # to_html alone, and the whole conversion of a page (parsing included), with and without escaping
+    corpus = CorpusGenerator(args.pages, density=args.density)
+    markdown = [corpus.page(number) for number in range(args.pages)]
+    nodes = [markdown_to_html_node(text) for text in markdown]
+    stages = {"to_html": lambda: [node.to_html() for node in nodes],
+              "render": lambda: [markdown_to_html_node(text).to_html() for text in markdown]}
+    for stage, function in stages.items():
+        escaped, unescaped = compare_escaping(function, args.repeat)
+        results[stage] = {"pages": args.pages, "escaped_seconds": round(escaped, 6),
+                          "unescaped_seconds": round(unescaped, 6),
+                          "overhead_percent": round((escaped / unescaped - 1) * 100, 1)}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, ns in results["ns_per_call"].items():
+        print(f"{name:24} {ns:>8.1f} ns")
+    for stage in stages:
+        timing = results[stage]
+        print(f"{stage} over {timing['pages']} pages: {timing['escaped_seconds']:.4f}s escaped, "
+              f"{timing['unescaped_seconds']:.4f}s unescaped ({timing['overhead_percent']:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
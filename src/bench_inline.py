@@ -0,0 +1,72 @@
+# Benchmark: single-pass text_to_textnodes against the original five-stage pipeline
+#
+#   python3 src/bench_inline.py [--repeat N] [--json]
+
+import argparse
+import json
+import random
+import timeit
+from helper_functions import text_to_textnodes, text_to_textnodes_multipass
+
+SNIPPETS = [
+    "plain words that carry no markup at all",
+    "some **bold** words",
+    "an *italic* aside",
+    "inline `code()` sample",
+    "a [link](https://example.com/page)",
+    "an ![image](/images/rivendell.png)",
+]
+
+
+def make_paragraph(words, seed=0):
+    """Builds a paragraph of roughly `words` words with a realistic mix of inline markup."""
+    rng = random.Random(seed)
+    parts = []
+    count = 0
+    while count < words:
+        snippet = rng.choice(SNIPPETS)
+        parts.append(snippet)
+        count += len(snippet.split())
+    return " ".join(parts) + "."
+
+
+def time_function(function, text, repeat):
+    """Returns the best time of `repeat` runs, in microseconds."""
+    return min(timeit.repeat(lambda: function(text), number=1, repeat=repeat)) * 1e6
+
+
+def run(repeat):
+    results = []
+    for words in (20, 200, 2000, 20000):
+        text = make_paragraph(words)
+        assert text_to_textnodes(text) == text_to_textnodes_multipass(text)
+        single = time_function(text_to_textnodes, text, repeat)
+        multi = time_function(text_to_textnodes_multipass, text, repeat)
+        results.append({
+            "words": words,
+            "chars": len(text),
+            "single_pass_us": round(single, 1),
+            "multipass_us": round(multi, 1),
+            "speedup": round(multi / single, 2),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the single-pass inline tokenizer.")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'words':>7} {'chars':>8} {'single (us)':>12} {'multi (us)':>12} {'speedup':>8}")
+    for row in results:
+        print(f"{row['words']:>7} {row['chars']:>8} {row['single_pass_us']:>12} "
+              f"{row['multipass_us']:>12} {row['speedup']:>7}x")
+
+
+if __name__ == "__main__":
+    main()
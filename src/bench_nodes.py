@@ -0,0 +1,105 @@
+# Benchmark: memory per node and TextNode equality for the slotted node classes
+#
+#   python3 src/bench_nodes.py [--pages N] [--json]
+#
+# "before" numbers come from dict-based copies of the node classes as they were
+# before __slots__, built from exactly the same field values.
+
+import argparse
+import json
+import timeit
+import tracemalloc
+from bench_inline import make_paragraph
+from helper_functions import markdown_to_html_node, text_to_textnodes
+from htmlnode import HTMLNode
+from textnode import TextNode
+
+
+class DictTextNode():
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+    def __eq__(self, other):
+        attributes = [attr for attr in dir(self) if not callable(getattr(self, attr)) and not attr.startswith("__")]
+        return all(getattr(self, attr) == getattr(other, attr) for attr in attributes)
+
+
+class DictHTMLNode():
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+def make_corpus(pages):
+    """Builds markdown pages with headings, paragraphs and lists full of inline markup."""
+    corpus = []
+    for page in range(pages):
+        blocks = [f"# Page {page}"]
+        for block in range(20):
+            blocks.append(make_paragraph(60, seed=page * 100 + block))
+            blocks.append("\n".join(f"* {make_paragraph(8, seed=block + item)}" for item in range(4)))
+        corpus.append("\n\n".join(blocks))
+    return corpus
+
+
+def measure(build):
+    """Returns (bytes allocated, result) for a callable, keeping its result alive while measuring."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def flatten(node):
+    yield node
+    for child in node.children or ():
+        yield from flatten(child)
+
+
+def run(pages):
+    corpus = make_corpus(pages)
+    text_nodes = [node for page in corpus for node in text_to_textnodes(page)]
+    html_nodes = [node for page in corpus for node in flatten(markdown_to_html_node(page))]
+
+    text_fields = [(n.text, n.text_type, n.url) for n in text_nodes]
+    html_fields = [(n.tag, n.value, n.children, n.props) for n in html_nodes]
+
+    results = {"pages": pages, "text_nodes": len(text_fields), "html_nodes": len(html_fields)}
+    for label, cls, fields in (("text_node", TextNode, text_fields), ("text_node_dict", DictTextNode, text_fields),
+                               ("html_node", HTMLNode, html_fields), ("html_node_dict", DictHTMLNode, html_fields)):
+        # Only the node objects themselves are allocated here; the field values already exist
+        size, nodes = measure(lambda: [cls(*f) for f in fields])
+        results[f"{label}_bytes"] = round(size / len(nodes), 1)
+
+    first, second = TextNode("same", "bold"), TextNode("same", "bold")
+    old_first, old_second = DictTextNode("same", "bold"), DictTextNode("same", "bold")
+    results["eq_ns"] = round(min(timeit.repeat(lambda: first == second, number=20000, repeat=5)) / 20000 * 1e9, 1)
+    results["eq_dict_ns"] = round(min(timeit.repeat(lambda: old_first == old_second, number=2000, repeat=5)) / 2000 * 1e9, 1)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark node memory and equality.")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.pages)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{results['text_nodes']} TextNodes and {results['html_nodes']} HTMLNodes from {results['pages']} pages")
+    print(f"{'':14} {'before':>10} {'after':>10}")
+    print(f"{'TextNode B':14} {results['text_node_dict_bytes']:>10} {results['text_node_bytes']:>10}")
+    print(f"{'HTMLNode B':14} {results['html_node_dict_bytes']:>10} {results['html_node_bytes']:>10}")
+    print(f"{'TextNode == ns':14} {results['eq_dict_ns']:>10} {results['eq_ns']:>10}")
+
+
+if __name__ == "__main__":
+    main()
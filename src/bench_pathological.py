@@ -0,0 +1,108 @@
+# Benchmark: scaling of the markdown pipeline on adversarial input
+#
+#   python3 src/bench_pathological.py [--size-kb N] [--repeat N] [--case NAME ...] [--stage NAME ...] [--json]
+#
+# Every case is a pattern repeated to --size-kb and to twice that. The "ratio" is how
+# much longer the doubled input takes: about 2 for linear work, 4 for quadratic. Each
+# case runs the inline functions on its own (extract/split of links and images, the
+# single-pass and multipass tokenizers) and the whole markdown_to_html_node + to_html.
+# A ratio above 3 points at superlinear behaviour, unless the doubled run took less than
+# NOISE_SECONDS, where timer and allocator noise dominate. The multipass tokenizer is
+# quadratic on several cases and takes minutes at the default size, so it only runs
+# when asked for with --stage multipass.
+
+import argparse
+import json
+import time
+from helper_functions import (extract_markdown_images, extract_markdown_links, markdown_to_html_node,
+                              split_nodes_image, split_nodes_link, text_to_textnodes,
+                              text_to_textnodes_multipass)
+from textnode import TextNode
+
+# Patterns that made the old lazy (.*?) regexes rescan or backtrack, plus other delimiter soup
+CASES = {
+    "open_brackets": "[",
+    "open_images": "![",
+    "unclosed_links": "[a](",
+    "closers": "](",
+    "labels_without_url": "[a] ",
+    "urls_without_close": "[a](b ",
+    "stars": "*",
+    "double_stars": "**a",
+    "backticks": "`a",
+    "mixed": "![*[`**](",
+    "log_lines": "2024-01-01 [INFO] (worker) [",
+}
+
+STAGES = {
+    "extract": lambda text: (extract_markdown_links(text), extract_markdown_images(text)),
+    "split": lambda text: split_nodes_link(split_nodes_image([TextNode(text, "text")])),
+    "text_to_textnodes": text_to_textnodes,
+    "multipass": text_to_textnodes_multipass,
+    "render": lambda text: markdown_to_html_node(text).to_html(),
+}
+
+# Stages run when no --stage is given
+DEFAULT_STAGES = [stage for stage in STAGES if stage != "multipass"]
+
+# Ratios of runs shorter than this are not flagged
+NOISE_SECONDS = 0.05
+
+# The log case has newlines, which the paragraph-level stages see as one block anyway
+LINE_CASES = {"log_lines"}
+
+
+def make_input(pattern, size, lines=False):
+    """Repeats pattern (one per line when lines is set) up to size characters."""
+    unit = pattern + "\n" if lines else pattern
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+def best(function, argument, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(argument)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def scaling(function, pattern, size, repeat, lines=False):
+    """Returns (seconds at size, seconds at twice the size, ratio)."""
+    small = best(function, make_input(pattern, size, lines), repeat)
+    large = best(function, make_input(pattern, size * 2, lines), repeat)
+    return small, large, large / small if small else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the markdown pipeline on pathological input.")
+    parser.add_argument("--size-kb", type=int, default=256, help="size of the smaller input (default: 256)")
+    parser.add_argument("--repeat", type=int, default=3, help="keep the fastest of this many runs")
+    parser.add_argument("--case", action="append", choices=sorted(CASES), help="only run these cases")
+    parser.add_argument("--stage", action="append", choices=sorted(STAGES), help="only run these stages (default: all but multipass)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    size = args.size_kb * 1024
+    results = {}
+    for case in args.case or CASES:
+        results[case] = {}
+        for stage in args.stage or DEFAULT_STAGES:
+            small, large, ratio = scaling(STAGES[stage], CASES[case], size, args.repeat, case in LINE_CASES)
+            results[case][stage] = {"seconds": round(small, 4), "doubled_seconds": round(large, 4),
+                                    "ratio": round(ratio, 2)}
+
+    if args.json:
+        print(json.dumps({"size_bytes": size, "results": results}, indent=2))
+        return
+    print(f"{'case':20} {'stage':18} {'seconds':>9} {'doubled':>9} {'ratio':>6}")
+    for case, stages in results.items():
+        for stage, result in stages.items():
+            superlinear = result["ratio"] > 3 and result["doubled_seconds"] >= NOISE_SECONDS
+            flag = "  <-- superlinear" if superlinear else ""
+            print(f"{case:20} {stage:18} {result['seconds']:9.4f} {result['doubled_seconds']:9.4f} "
+                  f"{result['ratio']:6.2f}{flag}")
+
+
+if __name__ == "__main__":
+    main()
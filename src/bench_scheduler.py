@@ -0,0 +1,80 @@
+# Benchmark: wall time and worker memory of a parallel build under different page budgets
+#
+#   python3 src/bench_scheduler.py [--pages N] [--large N] [--large-kb N] [--jobs N] [--json]
+#
+# The corpus is --pages ordinary pages plus --large big ones that are discovered last,
+# which is where a first-come-first-served build ends with one worker still busy. Each
+# budget runs on a fresh process pool, so every worker's peak RSS belongs to that run.
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from bench_corpus import CorpusGenerator
+from helper_functions import generate_pages_recursive
+from scheduler import PageScheduler
+
+TEMPLATE = "<title>{{ Title }}</title>{{ Content }}"
+
+
+def write_corpus(root, pages, large, large_kb):
+    corpus = CorpusGenerator(pages)
+    for number in range(pages):
+        with open(os.path.join(root, f"a{number:05}.md"), 'w') as f:
+            f.write(corpus.page(number))
+    # "z" sorts last, so os.walk usually finds the large pages at the end
+    for number in range(large):
+        text, part = [], 0
+        while sum(map(len, text)) < large_kb * 1024:
+            text.append(corpus.page(part) if part else f"# Large {number}\n\n")
+            part += 1
+        with open(os.path.join(root, f"z{number:03}.md"), 'w') as f:
+            f.write("\n\n".join(text))
+
+
+def measure(content, template, dest, scheduler):
+    start = time.perf_counter()
+    stats = generate_pages_recursive(content, template, dest, scheduler=scheduler)
+    elapsed = time.perf_counter() - start
+    workers = [peak for name, peak in scheduler.peak_rss.items() if name != "main"]
+    return {"seconds": round(elapsed, 3), "pages": stats["rebuilt"],
+            "peak_in_flight_pages": scheduler.peak_in_flight_pages,
+            "peak_in_flight_mb": round(scheduler.peak_in_flight_memory / (1024 * 1024), 1),
+            "max_worker_rss_mb": round(max(workers, default=0) / (1024 * 1024), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the page scheduler's budgets.")
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--large", type=int, default=4, help="number of large pages")
+    parser.add_argument("--large-kb", type=int, default=900, help="size of each large page")
+    parser.add_argument("--jobs", type=int, default=4)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    budgets = {"unbounded": {},
+               "in-flight 2/worker": {"max_in_flight": args.jobs * 2},
+               "memory 8 MB": {"memory_budget": 8 * 1024 * 1024}}
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        content = os.path.join(tmp, "content")
+        template = os.path.join(tmp, "template.html")
+        os.makedirs(content)
+        with open(template, 'w') as f:
+            f.write(TEMPLATE)
+        write_corpus(content, args.pages, args.large, args.large_kb)
+        for name, budget in budgets.items():
+            results[name] = measure(content, template, os.path.join(tmp, name.replace(" ", "-").replace("/", "-")),
+                                    PageScheduler(args.jobs, **budget))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, result in results.items():
+        print(f"{name:20} {result['seconds']:7.3f}s  in flight: {result['peak_in_flight_pages']:4} pages "
+              f"{result['peak_in_flight_mb']:6.1f} MB  max worker RSS: {result['max_worker_rss_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# Benchmark: requests per second from the preview server under concurrent keep-alive clients
+#
+#   python3 src/bench_server.py [SITE_DIR] [--clients N] [--requests N] [--gzip] [--revalidate] [--json]
+#
+# Without SITE_DIR a synthetic corpus is generated and built into a temporary directory.
+# Every client thread holds one persistent connection and cycles through all the pages;
+# --revalidate sends If-None-Match with the ETag from the first response (304s), and
+# --gzip asks for compressed responses.
+
+import argparse
+import http.client
+import json
+import os
+import tempfile
+import threading
+import time
+from bench_corpus import CorpusGenerator
+from helper_functions import generate_pages_recursive
+from server import create_preview_server
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "template.html")
+
+
+def client(address, paths, count, headers, revalidate, latencies):
+    connection = http.client.HTTPConnection(*address, timeout=30)
+    etags = {}
+    for i in range(count):
+        path = paths[i % len(paths)]
+        request_headers = dict(headers)
+        if revalidate and path in etags:
+            request_headers["If-None-Match"] = etags[path]
+        start = time.perf_counter()
+        connection.request("GET", path, headers=request_headers)
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        etags[path] = response.getheader("ETag")
+    connection.close()
+
+
+def run(site_dir, clients, requests, gzip=False, revalidate=False):
+    server = create_preview_server(site_dir, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    paths = sorted(url for url in server.snapshot.resources if url.endswith(".html"))
+    headers = {"Accept-Encoding": "gzip"} if gzip else {}
+    latencies = []
+    threads = [threading.Thread(target=client, args=(server.server_address[:2], paths, requests, headers,
+                                                     revalidate, latencies))
+               for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    server.server_close()
+
+    latencies.sort()
+    return {"clients": clients, "requests": len(latencies), "pages": len(paths), "gzip": gzip,
+            "revalidate": revalidate, "seconds": round(elapsed, 4),
+            "requests_per_second": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+            "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the in-memory preview server.")
+    parser.add_argument("site", nargs="?", help="built site to serve (default: a generated corpus)")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=16, help="concurrent keep-alive connections")
+    parser.add_argument("--requests", type=int, default=500, help="requests per client")
+    parser.add_argument("--gzip", action="store_true", help="send Accept-Encoding: gzip")
+    parser.add_argument("--revalidate", action="store_true", help="send If-None-Match after the first response")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        site_dir = args.site
+        if site_dir is None:
+            content_dir = os.path.join(tmp, "content")
+            site_dir = os.path.join(tmp, "public")
+            CorpusGenerator(args.pages).write(content_dir)
+            generate_pages_recursive(content_dir, TEMPLATE_PATH, site_dir)
+        results = run(site_dir, args.clients, args.requests, args.gzip, args.revalidate)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{results['requests']} requests over {results['clients']} connections in {results['seconds']}s: "
+              f"{results['requests_per_second']} req/s, p50 {results['p50_ms']} ms, p99 {results['p99_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from atomicfile import atomic_open
+from manifest import generator_version
+
+# Bump this whenever the layout of the cache file changes
+BLOCK_CACHE_VERSION = 1
+
+# Default limit on the rendered HTML kept in memory
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def block_key(block):
+    """Returns the cache key of a markdown block: a short digest of its text."""
+    return hashlib.blake2b(block.encode(), digest_size=16).hexdigest()
+
+
+class BlockCache():
+    """LRU map from the hash of a markdown block's text to the block's rendered HTML.
+
+    Rendering a block only depends on its text, so boilerplate repeated across pages
+    (disclaimers, shared headings, code samples) is parsed and serialized once per
+    build and then costs one dictionary lookup. The least recently used entries are
+    evicted once the cached HTML exceeds max_bytes (characters, to be exact).
+
+    With a path, the cache can be loaded from and saved to disk. The file records the
+    generator version, so entries rendered by different generator code are never reused.
+
+    Blocks that resolved asset URLs keep the references they recorded (see fingerprint.py),
+    so that a caller can tell when the cached HTML points at outdated fingerprints.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, path=None) -> None:
+        self.max_bytes = max_bytes
+        self.path = path
+        self.entries = OrderedDict()
+        # Asset URL references of the entries that have any
+        self.references = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        # Entries added since the last take_added(), so worker processes can hand them back
+        self.added = [] if path is not None else None
+
+    @classmethod
+    def load(cls, path, max_bytes=DEFAULT_MAX_BYTES):
+        """Loads a saved cache, returning an empty one if the file is missing, corrupt or stale."""
+        cache = cls(max_bytes, path)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cache
+        if data.get("version") != BLOCK_CACHE_VERSION or data.get("generator") != generator_version():
+            return cache
+        for entry in data.get("entries", []):
+            cache.store(*entry)
+        cache.added = []
+        return cache
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with atomic_open(self.path) as f:
+            json.dump({"version": BLOCK_CACHE_VERSION, "generator": generator_version(),
+                       "entries": [self.entry(key) for key in self.entries]}, f)
+
+    def get(self, key):
+        """Returns the cached HTML for a block key (marking it recently used), or None."""
+        html = self.entries.get(key)
+        if html is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return html
+
+    def entry(self, key):
+        """Returns (key, html), or (key, html, references) for a block that has references."""
+        references = self.references.get(key)
+        return (key, self.entries[key], references) if references else (key, self.entries[key])
+
+    def store(self, key, html, references=None):
+        if key in self.entries:
+            self.size -= len(self.entries.pop(key))
+            self.references.pop(key, None)
+        self.entries[key] = html
+        if references:
+            self.references[key] = references
+        self.size += len(html)
+        while self.size > self.max_bytes and self.entries:
+            evicted_key, evicted = self.entries.popitem(last=False)
+            self.references.pop(evicted_key, None)
+            self.size -= len(evicted)
+
+    def put(self, key, html, references=None):
+        self.store(key, html, references)
+        if self.added is not None:
+            self.added.append((key, html, references) if references else (key, html))
+
+    def take_added(self):
+        added, self.added = self.added, ([] if self.added is not None else None)
+        return added or []
+
+    def merge(self, entries):
+        """Adds entries rendered elsewhere (by a worker process) without tracking them as added."""
+        for entry in entries:
+            self.store(*entry)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+# The cache generate_page renders through; shared by every page built in this process
+_shared_cache = BlockCache()
+
+
+def shared_cache():
+    return _shared_cache
+
+
+def set_shared_cache(cache):
+    """Replaces the shared cache (None turns block caching off)."""
+    global _shared_cache
+    _shared_cache = cache
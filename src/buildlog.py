@@ -0,0 +1,197 @@
+import contextlib
+import json
+import sys
+import time
+
+QUIET = 0    # errors only
+NORMAL = 1   # summaries and a progress counter
+VERBOSE = 2  # one line per file, like the old print calls
+
+# Per-file events and how they read in verbose mode; nothing is formatted below VERBOSE
+FILE_EVENTS = {
+    "dir_created": "Created directory: {dest}",
+    "dir_deleted": "Deleted directory: {dest}",
+    "file_deleted": "Deleted file: {dest}",
+    "asset_copied": "Copied file: {source} -> {dest}",
+    "asset_linked": "Linked file: {source} -> {dest}",
+    "asset_deleted": "Deleted file: {dest}",
+    "asset_compressed": "Compressed file: {source} -> {dest}",
+    "page_queued": "Generating HTML page for {source} -> {dest}",
+    "page_started": "Generating page from {source} to {dest} using {template}",
+    "page_generated": "Page successfully generated at {dest}",
+    "page_removed": "Removed stale page: {dest}",
+    "listing_generated": "Listing page generated at {dest}",
+    "listing_removed": "Removed stale listing page: {dest}",
+    "request_served": "{method} {path} {status}",
+    "server_message": "{message}",
+}
+
+# Terminal output is collected and written in chunks of about this many characters
+BUFFER_SIZE = 64 * 1024
+# Minimum seconds between two redraws of the progress counter
+PROGRESS_INTERVAL = 0.1
+
+
+class JsonLinesSink():
+    """Appends one JSON object per event to a file through a large write buffer."""
+
+    def __init__(self, path) -> None:
+        self.path = path
+        self.file = open(path, 'a', buffering=1024 * 1024)
+
+    def write_event(self, event, fields):
+        self.file.write(json.dumps({"time": round(time.time(), 6), "event": event, **fields}) + "\n")
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class BuildLog():
+    """The build's single output channel.
+
+    Status lines are buffered and written in large chunks instead of one terminal write
+    per file. Per-file events are passed as an event name plus fields, and only turned
+    into text when the verbosity asks for them, so quiet and normal builds do no
+    per-file formatting. An optional JsonLinesSink receives every event.
+    """
+
+    def __init__(self, verbosity=NORMAL, stream=None, sink=None) -> None:
+        self.verbosity = verbosity
+        # None means whatever sys.stdout is at flush time
+        self.stream = stream
+        self.sink = sink
+        self.buffer = []
+        self.buffered = 0
+        self.recording = None
+        self.progress = None
+
+    def configure(self, verbosity=None, stream=None, sink=None):
+        self.flush()
+        if verbosity is not None:
+            self.verbosity = verbosity
+        if stream is not None:
+            self.stream = stream
+        if sink is not None:
+            if self.sink is not None:
+                self.sink.close()
+            self.sink = sink
+
+    def output(self):
+        return self.stream if self.stream is not None else sys.stdout
+
+    def write(self, line):
+        self.buffer.append(line)
+        self.buffer.append("\n")
+        self.buffered += len(line) + 1
+        if self.buffered >= BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.clear_progress()
+            text = "".join(self.buffer)
+            self.buffer = []
+            self.buffered = 0
+            stream = self.output()
+            stream.write(text)
+            stream.flush()
+        if self.sink is not None:
+            self.sink.flush()
+
+    def file(self, event, **fields):
+        """Logs a per-file event; it only costs a dict and a few comparisons below VERBOSE."""
+        if self.recording is not None:
+            self.recording.append(("file", event, fields))
+            return
+        if self.sink is not None:
+            self.sink.write_event(event, fields)
+        if self.verbosity >= VERBOSE:
+            self.write(FILE_EVENTS[event].format(**fields))
+
+    def info(self, message, **fields):
+        """Logs a summary line shown in normal and verbose mode."""
+        if self.recording is not None:
+            self.recording.append(("info", message, fields))
+            return
+        if self.sink is not None:
+            self.sink.write_event("info", {"message": message, **fields})
+        if self.verbosity >= NORMAL:
+            self.write(message)
+            self.flush()
+
+    def error(self, message, **fields):
+        """Logs a line that is shown at every verbosity."""
+        if self.recording is not None:
+            self.recording.append(("error", message, fields))
+            return
+        if self.sink is not None:
+            self.sink.write_event("error", {"message": message, **fields})
+        self.write(message)
+        self.flush()
+
+    @contextlib.contextmanager
+    def record(self):
+        """Collects events instead of writing them, so a worker process can send them to the parent.
+
+        Yields the list of records, which the parent passes to replay().
+        """
+        previous = self.recording
+        self.recording = []
+        try:
+            yield self.recording
+        finally:
+            self.recording = previous
+
+    def replay(self, records):
+        for kind, name, fields in records:
+            getattr(self, kind)(name, **fields)
+
+    def begin_progress(self, label, total):
+        """Starts an in-place "label: done/total" counter, drawn only in normal mode on a terminal.
+
+        The total may start at 0 and grow through extend_progress as work is discovered.
+        """
+        output = self.output()
+        if self.verbosity == NORMAL and hasattr(output, "isatty") and output.isatty():
+            self.progress = [label, 0, total, 0.0]
+
+    def extend_progress(self, count=1):
+        if self.progress is not None:
+            self.progress[2] += count
+
+    def advance(self, count=1):
+        if self.progress is None:
+            return
+        self.progress[1] += count
+        now = time.monotonic()
+        if now - self.progress[3] >= PROGRESS_INTERVAL or self.progress[1] >= self.progress[2]:
+            self.progress[3] = now
+            label, done, total, _ = self.progress
+            output = self.output()
+            output.write(f"\r{label}: {done}/{total}")
+            output.flush()
+
+    def clear_progress(self):
+        if self.progress is not None and self.progress[3]:
+            output = self.output()
+            output.write("\r\033[K")
+            output.flush()
+            self.progress[3] = 0.0
+
+    def end_progress(self):
+        self.clear_progress()
+        self.progress = None
+
+    def close(self):
+        self.end_progress()
+        self.flush()
+        if self.sink is not None:
+            self.sink.close()
+            self.sink = None
+
+
+# The log every module writes to; main.py configures it from the command line
+log = BuildLog()
@@ -0,0 +1,64 @@
+import os
+import zlib
+from atomicfile import atomic_open
+
+# Outputs worth precompressing for a server with gzip_static; images and fonts are already compressed
+COMPRESSIBLE_EXTENSIONS = {".html", ".htm", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt", ".map", ".md"}
+SIDECAR_SUFFIX = ".gz"
+COMPRESSION_LEVEL = 9
+# wbits for zlib that produce a gzip stream (header with mtime 0, so output is reproducible)
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def is_compressible(path):
+    return os.path.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+
+def sidecar_path(path):
+    return path + SIDECAR_SUFFIX
+
+
+def remove_sidecar(path):
+    """Deletes the .gz sidecar of an output if there is one."""
+    try:
+        os.remove(sidecar_path(path))
+    except FileNotFoundError:
+        pass
+
+
+def gzip_compressor():
+    return zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+
+
+def compress_file(src_file, dest_file, chunk_size=1024 * 1024):
+    """Writes a gzip copy of src_file to dest_file (through a temporary file and a rename)."""
+    compressor = gzip_compressor()
+    with open(src_file, 'rb') as src, atomic_open(dest_file, 'wb') as dest:
+        for chunk in iter(lambda: src.read(chunk_size), b''):
+            dest.write(compressor.compress(chunk))
+        dest.write(compressor.flush())
+
+
+class GzipTee():
+    """Text file wrapper that also gzips everything written into a binary sidecar file.
+
+    The page is compressed from the same text that is written, in the same pass, so the
+    output never has to be read back.
+    """
+
+    def __init__(self, fp, sidecar_fp) -> None:
+        self.fp = fp
+        self.sidecar_fp = sidecar_fp
+        self.encoding = getattr(fp, "encoding", None) or "utf-8"
+        self.compressor = gzip_compressor()
+
+    def write(self, text):
+        self.fp.write(text)
+        self.sidecar_fp.write(self.compressor.compress(text.encode(self.encoding)))
+
+    def writelines(self, chunks):
+        for chunk in chunks:
+            self.write(chunk)
+
+    def finish(self):
+        self.sidecar_fp.write(self.compressor.flush())
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+from atomicfile import atomic_open
+from manifest import generator_version
+
+# Bump this whenever the layout of the entry files changes
+DOC_CACHE_VERSION = 1
+
+# Default limit on the total size of the entry files
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class DocumentCache():
+    """On-disk cache of each markdown document's rendered content HTML and title.
+
+    Entries are keyed by the hash of the markdown text plus the generator version, so
+    they survive restarts and stay valid across template changes: regenerating a page
+    whose markdown is unchanged only costs the template substitution and the write.
+
+    An entry also keeps the asset URL references its HTML recorded (see fingerprint.py),
+    which lookup() returns so that the caller can check them against the current fingerprints.
+
+    Every entry is a small JSON file written atomically, which makes the cache safe to
+    share between worker processes. Reading an entry refreshes its mtime, and evict()
+    deletes the least recently used entries until the cache fits in max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, markdown):
+        digest = hashlib.sha256(markdown.encode())
+        digest.update(generator_version().encode())
+        return digest.hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """Returns (title, content_html) for a key, or None if it isn't cached (or unreadable)."""
+        entry = self.lookup(key)
+        return entry[:2] if entry is not None else None
+
+    def lookup(self, key):
+        """Returns (title, content_html, references) for a key, or None if it isn't cached."""
+        path = self.entry_path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError):
+            self.discard(path)
+            self.misses += 1
+            return None
+        if entry.get("version") != DOC_CACHE_VERSION or entry.get("key") != key:
+            self.discard(path)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return entry["title"], entry["html"], entry.get("references") or {}
+
+    def put(self, key, title, html, references=None):
+        path = self.entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {"version": DOC_CACHE_VERSION, "key": key, "title": title, "html": html}
+        if references:
+            entry["references"] = references
+        with atomic_open(path) as f:
+            json.dump(entry, f)
+
+    def discard(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def evict(self):
+        """Deletes the least recently used entries until the cache fits in max_bytes. Returns how many."""
+        entries = []
+        total = 0
+        for root, dirs, files in os.walk(self.directory):
+            for file in files:
+                path = os.path.join(root, file)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+                total += stat.st_size
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self.discard(path)
+            total -= size
+            removed += 1
+        return removed
+
+
+# The cache generate_page reads and fills; off unless main.py turns it on
+_shared_cache = None
+
+
+def shared_document_cache():
+    return _shared_cache
+
+
+def set_shared_document_cache(cache):
+    """Replaces the shared cache (None turns document caching off)."""
+    global _shared_cache
+    _shared_cache = cache
@@ -0,0 +1,218 @@
+import contextlib
+import json
+import os
+import re
+import shutil
+from atomicfile import atomic_open, atomic_path
+from compress import remove_sidecar, sidecar_path
+from manifest import hash_file, remove_empty_parents
+
+# Hex digits of the content hash put into fingerprinted file names (index.css -> index.0123456789ab.css)
+FINGERPRINT_LENGTH = 12
+
+# Written to the root of the output, mapping every asset URL to its fingerprinted URL
+ASSET_MANIFEST_NAME = "asset-manifest.json"
+
+# A URL's path and its query string and/or fragment
+URL_PATH_PATTERN = re.compile(r"([^?#]*)(.*)", re.DOTALL)
+
+
+def fingerprinted_path(relative_path, digest):
+    """Inserts the start of a content hash before a path's extension."""
+    root, extension = os.path.splitext(relative_path)
+    return f"{root}.{digest[:FINGERPRINT_LENGTH]}{extension}"
+
+
+def path_to_url(relative_path):
+    return "/" + relative_path.replace(os.sep, "/")
+
+
+def url_asset_path(url):
+    """Returns the path of a site-absolute URL without its query and fragment, or None for other URLs."""
+    if not url.startswith("/") or url.startswith("//"):
+        return None
+    return URL_PATH_PATTERN.match(url).group(1)
+
+
+class AssetMap():
+    """Maps the site-absolute URL of every static asset to the URL of its fingerprinted copy.
+
+    Resolving a URL can record it in a references dict, mapped to the URL it resolved
+    to (or None when it is not an asset). Rendered output stays valid as long as every
+    URL it recorded still resolves the same way, which is what is_current() checks.
+    """
+
+    def __init__(self, urls=None) -> None:
+        self.urls = dict(urls or {})
+        # Rewritten templates by path: (template, rewritten template, references)
+        self.templates = {}
+
+    def resolve(self, url, references=None):
+        """Returns the fingerprinted URL for an asset URL (keeping its query and fragment), else url."""
+        path = url_asset_path(url)
+        if path is None:
+            return url
+        mapped = self.urls.get(path)
+        if references is not None:
+            references[path] = mapped
+        return url if mapped is None else mapped + url[len(path):]
+
+    def is_current(self, references):
+        return all(self.urls.get(url) == mapped for url, mapped in references.items())
+
+    def rewrite_template(self, template):
+        """Returns a copy of a compiled template with its href/src URLs resolved, rewriting it once."""
+        cached = self.templates.get(template.path)
+        if cached is None or cached[0] is not template:
+            references = {}
+            rewritten = template.rewrite_urls(lambda url: self.resolve(url, references))
+            cached = self.templates[template.path] = (template, rewritten, references)
+        return cached[1]
+
+    def template_references(self, template):
+        """Returns the asset URLs a template refers to, mapped to what they resolve to."""
+        self.rewrite_template(template)
+        return self.templates[template.path][2]
+
+    def save(self, path):
+        with atomic_open(path) as f:
+            json.dump(self.urls, f, indent=1, sort_keys=True)
+
+    def __len__(self):
+        return len(self.urls)
+
+
+def link_or_copy(src_file, dest_file):
+    with atomic_path(dest_file) as tmp_file:
+        try:
+            os.link(src_file, tmp_file)
+        except OSError:
+            shutil.copy2(src_file, tmp_file)
+
+
+def remove_fingerprint(dest_dir, entry):
+    """Deletes the fingerprinted copy (and its sidecar) recorded in a manifest asset entry."""
+    fingerprint = entry.pop("fingerprint", None)
+    entry.pop("sha", None)
+    if fingerprint is None:
+        return
+    path = os.path.join(dest_dir, fingerprint)
+    if os.path.exists(path):
+        os.remove(path)
+        remove_sidecar(path)
+        remove_empty_parents(path, dest_dir)
+
+
+def fingerprint_asset(src_file, relative_path, dest_dir, entry=None):
+    """Gives the copy of one static file in dest_dir a fingerprinted twin and returns its relative path.
+
+    The twin is a hardlink of the plain copy (which stays, for references that can't be
+    rewritten, such as url() inside stylesheets), and so is its .gz sidecar if it has one.
+    A manifest asset entry remembers the content hash, so an unchanged file is never hashed
+    again, and the twin's path, so the old twin is deleted once the content changes.
+    """
+    stat = os.stat(src_file)
+    if entry is not None and entry.get("sha") and entry.get("size") == stat.st_size \
+            and entry.get("mtime_ns") == stat.st_mtime_ns:
+        digest = entry["sha"]
+    else:
+        digest = hash_file(src_file)
+
+    fingerprint = fingerprinted_path(relative_path, digest)
+    dest_file = os.path.join(dest_dir, relative_path)
+    fingerprinted_file = os.path.join(dest_dir, fingerprint)
+    if not os.path.exists(fingerprinted_file):
+        link_or_copy(dest_file, fingerprinted_file)
+    if os.path.exists(sidecar_path(dest_file)):
+        if not os.path.exists(sidecar_path(fingerprinted_file)):
+            link_or_copy(sidecar_path(dest_file), sidecar_path(fingerprinted_file))
+    else:
+        remove_sidecar(fingerprinted_file)
+
+    if entry is not None:
+        if entry.get("fingerprint") not in (None, fingerprint):
+            remove_fingerprint(dest_dir, entry)
+        entry["sha"] = digest
+        entry["fingerprint"] = fingerprint
+    return fingerprint
+
+
+def fingerprint_assets(src_dir, dest_dir, manifest=None):
+    """Fingerprints every static file already synced from src_dir to dest_dir.
+
+    Writes the URL map to ASSET_MANIFEST_NAME in dest_dir and returns it as an AssetMap.
+    """
+    urls = {}
+    for root, dirs, files in os.walk(src_dir):
+        for file in files:
+            src_file = os.path.join(root, file)
+            relative_path = os.path.relpath(src_file, src_dir)
+            entry = manifest.assets.get(relative_path) if manifest is not None else None
+            fingerprint = fingerprint_asset(src_file, relative_path, dest_dir, entry)
+            urls[path_to_url(relative_path)] = path_to_url(fingerprint)
+    asset_map = AssetMap(urls)
+    asset_map.save(os.path.join(dest_dir, ASSET_MANIFEST_NAME))
+    return asset_map
+
+
+def remove_fingerprints(dest_dir, manifest):
+    """Deletes every fingerprinted copy and the asset manifest, for a build without fingerprinting."""
+    for entry in manifest.assets.values():
+        remove_fingerprint(dest_dir, entry)
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(os.path.join(dest_dir, ASSET_MANIFEST_NAME))
+
+
+# The map text_node_to_html_node and generate_page resolve URLs through; off unless main.py sets one
+_asset_map = None
+
+# The references dict URLs are being recorded into, if any
+_references = None
+
+
+def shared_asset_map():
+    return _asset_map
+
+
+def set_shared_asset_map(asset_map):
+    """Replaces the shared map (None turns URL rewriting off)."""
+    global _asset_map
+    _asset_map = asset_map
+
+
+def resolve_url(url):
+    """Resolves a URL through the shared map, recording it when references are being recorded."""
+    if _asset_map is None:
+        # Recorded as unmapped, so output rendered before fingerprinting was on is outdated once it is
+        path = url_asset_path(url) if _references is not None else None
+        if path is not None:
+            _references[path] = None
+        return url
+    return _asset_map.resolve(url, _references)
+
+
+@contextlib.contextmanager
+def recording_references():
+    """Collects the URLs resolved inside the block into a fresh dict (not into an enclosing one)."""
+    global _references
+    outer = _references
+    _references = references = {}
+    try:
+        yield references
+    finally:
+        _references = outer
+
+
+def note_references(references):
+    """Adds references recorded earlier (e.g. with a cached block) to the ones being recorded."""
+    if _references is not None and references:
+        _references.update(references)
+
+
+def references_current(references):
+    """Checks that recorded references still resolve the same way through the shared map."""
+    if not references:
+        return True
+    if _asset_map is None:
+        return all(mapped is None for mapped in references.values())
+    return _asset_map.is_current(references)
@@ -0,0 +1,86 @@
+import re
+
+# Front matter is a block of "key: value" lines between two "---" lines at the very top of a file
+FRONT_MATTER_DELIMITER = "---"
+
+# "[a, b, c]" lists
+INLINE_LIST_PATTERN = re.compile(r"^\[(.*)\]$")
+
+
+def parse_value(value):
+    """Turns a front matter value into a string, or a list of strings for "[a, b]"."""
+    value = value.strip()
+    match = INLINE_LIST_PATTERN.match(value)
+    if match:
+        return [unquote(item) for item in match.group(1).split(",") if item.strip()]
+    return unquote(value)
+
+
+def unquote(value):
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+def parse_front_matter(lines):
+    """Parses the lines between the delimiters into a dict.
+
+    Keys are lowercased. Besides "key: value" and "key: [a, b]", a key with an empty
+    value may be followed by "- item" lines, which make it a list. Blank lines and
+    lines starting with # are ignored; anything else raises a ValueError.
+    """
+    metadata = {}
+    key = None
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if stripped.startswith("- ") and key is not None and isinstance(metadata[key], list):
+            metadata[key].append(unquote(stripped[2:]))
+            continue
+        name, colon, value = stripped.partition(":")
+        if not colon or not name.strip():
+            raise ValueError(f"Invalid front matter line: {stripped!r}")
+        key = name.strip().lower()
+        metadata[key] = parse_value(value) if value.strip() else []
+    return metadata
+
+
+def split_front_matter(markdown):
+    """Returns (metadata, body) for a markdown document; metadata is empty without front matter."""
+    if not markdown.startswith(FRONT_MATTER_DELIMITER):
+        return {}, markdown
+    lines = markdown.split("\n")
+    if lines[0].rstrip() != FRONT_MATTER_DELIMITER:
+        return {}, markdown
+    for end, line in enumerate(lines[1:], start=1):
+        if line.rstrip() == FRONT_MATTER_DELIMITER:
+            body = "\n".join(lines[end + 1:]).lstrip("\r\n")
+            return parse_front_matter(lines[1:end]), body
+    raise ValueError("Front matter is not closed with ---")
+
+
+def read_front_matter(f):
+    """Reads the front matter at the start of an open text file, leaving f at the start of the body.
+
+    Only the header lines are read, however large the file is.
+    """
+    start = f.tell()
+    if f.readline().rstrip() != FRONT_MATTER_DELIMITER:
+        f.seek(start)
+        return {}
+    lines = []
+    for line in iter(f.readline, ""):
+        if line.rstrip() == FRONT_MATTER_DELIMITER:
+            return parse_front_matter(lines)
+        lines.append(line)
+    raise ValueError("Front matter is not closed with ---")
+
+
+def read_title_line(f):
+    """Returns the first non-blank line at the current position of an open text file ("" at the end)."""
+    for line in iter(f.readline, ""):
+        if line.strip():
+            return line
+    return ""
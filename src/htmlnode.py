@@ -1,6 +1,41 @@
+# Tags that never have a closing tag or children
+VOID_TAGS = ['img', 'br', 'hr', 'meta']
+
+
+def escape_text(text):
+    """Escapes &, < and > in element text, returning the string itself when there is nothing to escape.
+
+    Three substring checks (each a memchr in C) are faster than one regex pass or
+    str.translate, and almost every text node takes the fast path.
+    """
+    try:
+        if "&" not in text and "<" not in text and ">" not in text:
+            return text
+    except TypeError:
+        # Not a string (e.g. the None of an empty div): escape its text form
+        return escape_text(str(text))
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def escape_attribute(value):
+    """Escapes an attribute value for double quotes, with the same fast path as escape_text."""
+    try:
+        if "&" not in value and "<" not in value and ">" not in value and '"' not in value:
+            return value
+    except TypeError:
+        return escape_attribute(str(value))
+    return value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+def attributes_to_html(props):
+    """Returns ' name="value"' for every prop, joined in one go."""
+    return "".join([f' {name}="{escape_attribute(value)}"' for name, value in props.items()])
 
 
 class HTMLNode():
+    # Slots instead of a per-instance __dict__ to keep large trees compact
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag = None, value = None, children = None, props = None) -> None:
         self.tag = tag
         self.value = value
@@ -15,19 +50,48 @@ class HTMLNode():
         child_html = ''.join([child.to_html() for child in self.children]) if self.children else ''
         
         # If it's a self-closing tag (e.g., img), handle accordingly
-        if self.tag in ['img', 'br', 'hr', 'meta']:
+        if self.tag in VOID_TAGS:
             return f'<{self.tag}{self.props_to_html()} />'
         
-        # For regular nodes with opening and closing tags
-        return f'<{self.tag}{self.props_to_html()}>{child_html or self.value}</{self.tag}>'
+        # For regular nodes with opening and closing tags (a missing value still reads "None")
+        return f'<{self.tag}{self.props_to_html()}>{child_html or escape_text(self.value)}</{self.tag}>'
+    
+    def iter_html(self):
+        """Yields the node's HTML in fragments instead of building one big string.
+
+        "".join(node.iter_html()) is always equal to node.to_html().
+        """
+        if self.tag is None:
+            raise ValueError("HTML nodes must have a valid tag!")
+        
+        # Self-closing tags (e.g., img) never render their children
+        if self.tag in VOID_TAGS:
+            yield f'<{self.tag}{self.props_to_html()} />'
+            return
+        
+        yield f'<{self.tag}{self.props_to_html()}>'
+        
+        # Stream the children; like to_html, fall back to the value if they produced nothing
+        empty = True
+        for child in self.children or ():
+            for chunk in child.iter_html():
+                if chunk:
+                    empty = False
+                yield chunk
+        if empty:
+            yield escape_text(self.value)
+        
+        yield f'</{self.tag}>'
+    
+    def write_html(self, fp):
+        """Writes the node's HTML to a file-like object without holding the whole document in memory."""
+        fp.writelines(self.iter_html())
     
     def props_to_html(self):
-        if self.props is None:
+        props = self.props
+        if not props:
             return ''
-        html_str = ''
-        for prop, value in self.props.items():
-            html_str += f' {prop}="{value}"'
-        return html_str
+        return attributes_to_html(props)
     
     def __repr__(self) -> str:
         return (f"HTMLNode(\n"
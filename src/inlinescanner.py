@@ -0,0 +1,182 @@
+from textnode import TextNode
+
+
+class NextOccurrence():
+    """Memoised str.find for a scan that only ever asks about positions further to the right.
+
+    Each query either reuses the previous answer (still ahead of the new start) or resumes
+    the search from the new start, which lies past the previous answer, so over a whole
+    scan every character is examined at most once per needle.
+    """
+
+    def __init__(self, text, needle) -> None:
+        self.text = text
+        self.needle = needle
+        self.position = -2  # -2: not searched yet, -1: no occurrences left
+
+    def find(self, start, end):
+        """Returns the first occurrence at or after start that also lies before end, or -1."""
+        if self.position != -1 and self.position < start:
+            self.position = self.text.find(self.needle, start)
+        if self.position == -1 or self.position >= end:
+            return -1
+        return self.position
+
+
+class InlineScanner():
+    """Single-pass tokenizer for inline markdown (bold, italic, code, images and links).
+
+    It reproduces the five-stage split pipeline exactly, including its precedence: "**"
+    splits the whole text, "*" splits what is outside bold, "`" splits what is outside
+    italic, then images and finally links are matched in the remaining plain text. An
+    unmatched delimiter therefore turns the rest of its segment into that type, and
+    image/link labels run to the first "](" and urls to the next ")" without crossing a
+    newline. Instead of re-splitting lists of nodes, every boundary lookup goes through a
+    NextOccurrence, so the whole scan is O(n) even for adversarial input.
+    """
+
+    def __init__(self, text) -> None:
+        self.text = text
+        self.nodes = []
+        self.bold = NextOccurrence(text, "**")
+        self.star = NextOccurrence(text, "*")
+        self.tick = NextOccurrence(text, "`")
+        self.bang = NextOccurrence(text, "![")
+        self.bracket = NextOccurrence(text, "[")
+        # Images and links are matched in interleaved order, so each gets its own finders
+        self.image_finders = self.bracket_finders()
+        self.link_finders = self.bracket_finders()
+
+    def bracket_finders(self):
+        return {
+            "close": NextOccurrence(self.text, "]("),
+            "paren": NextOccurrence(self.text, ")"),
+            "label-newline": NextOccurrence(self.text, "\n"),
+            "url-newline": NextOccurrence(self.text, "\n"),
+        }
+
+    def scan(self):
+        """Returns the list of TextNodes for the whole text."""
+        self.scan_delimited(0, len(self.text), self.bold, 2, "bold", self.scan_italic)
+        return self.nodes
+
+    def scan_italic(self, start, end):
+        self.scan_delimited(start, end, self.star, 1, "italic", self.scan_code)
+
+    def scan_code(self, start, end):
+        self.scan_delimited(start, end, self.tick, 1, "code", self.scan_images)
+
+    def scan_delimited(self, start, end, finder, width, text_type, scan_plain):
+        """Splits [start, end) on a delimiter like str.split, alternating plain and typed parts.
+
+        Typed parts are emitted even when empty; non-empty plain parts go to the next stage.
+        """
+        inside = False
+        position = start
+        while True:
+            boundary = finder.find(position, end)
+            part_end = end if boundary == -1 else boundary
+            if inside:
+                self.nodes.append(TextNode(self.text[position:part_end], text_type))
+            elif part_end > position:
+                scan_plain(position, part_end)
+            if boundary == -1:
+                return
+            position = boundary + width
+            inside = not inside
+
+    def scan_images(self, start, end):
+        """Emits the images in [start, end), passing the text between them on to scan_links."""
+        position = start
+        search = start
+        while True:
+            bang = self.bang.find(search, end)
+            if bang == -1:
+                if end > position:
+                    self.scan_links(position, end)
+                return
+            match = self.match_bracket(self.image_finders, bang + 1, end)
+            if isinstance(match, int):
+                # The next "![" whose '[' could match
+                search = max(bang + 1, match - 1)
+                continue
+            if bang > position:
+                self.scan_links(position, bang)
+            alt_text, image_url, position = match
+            self.nodes.append(TextNode(alt_text, "image", image_url))
+            search = position
+
+    def scan_links(self, start, end):
+        """Emits the links and plain text in [start, end); a '[' right after '!' never starts a link."""
+        position = start
+        search = start
+        while True:
+            bracket = self.bracket.find(search, end)
+            if bracket == -1:
+                if end > position:
+                    self.nodes.append(TextNode(self.text[position:end], "text"))
+                return
+            search = bracket + 1
+            if bracket > start and self.text[bracket - 1] == "!":
+                continue
+            match = self.match_bracket(self.link_finders, bracket, end)
+            if isinstance(match, int):
+                search = match
+                continue
+            if bracket > position:
+                self.nodes.append(TextNode(self.text[position:bracket], "text"))
+            link_text, link_url, position = match
+            self.nodes.append(TextNode(link_text, "link", link_url))
+            search = position
+
+    def match_bracket(self, finders, start, end):
+        """Matches `[label](url)` with its '[' at start and its ')' before end.
+
+        Returns (label, url, position after the match), or without a match the position
+        of the first '[' that could still match: every '[' before it would run into the
+        same "](", newline or missing ")". That is end once no "](" or ")" is left, so a
+        run of unmatched brackets costs one lookup instead of one per bracket.
+        """
+        close = finders["close"].find(start + 1, end)
+        if close == -1:
+            return end
+        newline = finders["label-newline"].find(start + 1, close)
+        if newline != -1:
+            return newline + 1
+        paren = finders["paren"].find(close + 2, end)
+        if paren == -1:
+            return end
+        if finders["url-newline"].find(close + 2, paren) != -1:
+            return close
+        return self.text[start + 1:close], self.text[close + 2:paren], paren + 1
+
+
+def iter_bracket_matches(text, image=False):
+    """Yields (start, end, label, url) for every `[label](url)` in text, or every `![label](url)` with image.
+
+    Matches are the same, non-overlapping and left to right, as re.finditer with the
+    lazy patterns r"(?<!!)\\[(.*?)\\]\\((.*?)\\)" and r"!\\[(.*?)\\]\\((.*?)\\)": a label
+    runs to the first "](" and a url to the next ")", neither crossing a newline. Those
+    patterns rescan the rest of the line for every unmatched "[" (and backtrack over every
+    later "](" after one), which is quadratic or worse; here each boundary lookup goes
+    through a NextOccurrence, so the whole text is scanned in O(n).
+    """
+    scanner = InlineScanner(text)
+    finders = scanner.bracket_finders()
+    opener = scanner.bang if image else scanner.bracket
+    end = len(text)
+    search = 0
+    while True:
+        start = opener.find(search, end)
+        if start == -1:
+            return
+        search = start + 1
+        # A '[' right after '!' starts an image, not a link
+        if not image and start > 0 and text[start - 1] == "!":
+            continue
+        match = scanner.match_bracket(finders, start + 1 if image else start, end)
+        if isinstance(match, int):
+            search = max(search, match - 1 if image else match)
+            continue
+        label, url, search = match
+        yield start, search, label, url
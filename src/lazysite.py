@@ -0,0 +1,181 @@
+import os
+import threading
+from collections import OrderedDict
+from compress import is_compressible
+from helper_functions import render_page
+from manifest import hash_bytes, hash_file
+from server import DEFAULT_PORT, PreviewServer, Resource, compress_bytes, content_type
+
+# Default limit on the rendered pages (and static files) kept in memory
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def url_segments(path):
+    """Splits a URL path into its segments, or returns None if it could escape the served directories."""
+    segments = path.lstrip("/").split("/")
+    if any(segment in ("..", ".") or "\\" in segment or "\0" in segment for segment in segments):
+        return None
+    return segments
+
+
+def markdown_for_url(path):
+    """Returns the markdown path relative to the content directory that the page at a URL path is built from.
+
+    The inverse of siteindex.page_url: "/" and "/x/" come from index.md files, "/x.html"
+    from x.md. Returns None for URLs no page can have.
+    """
+    segments = url_segments(path)
+    if segments is None:
+        return None
+    if segments[-1] == "":
+        segments[-1] = "index.md"
+    elif segments[-1].endswith(".html"):
+        segments[-1] = segments[-1][:-len(".html")] + ".md"
+    else:
+        return None
+    return os.path.join(*segments)
+
+
+def file_stamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class CachedResource():
+    """A rendered page or static file in the LazySite cache, with what it was made from."""
+
+    __slots__ = ("resource", "source_stamp", "source_digest", "template_stamp", "size")
+
+    def __init__(self, resource, source_stamp, source_digest, template_stamp=None) -> None:
+        self.resource = resource
+        self.source_stamp = source_stamp
+        self.source_digest = source_digest
+        self.template_stamp = template_stamp
+        self.size = len(resource.body) + len(resource.gzip_body or b"")
+
+
+class LazySite():
+    """Serves a site straight from content/ and static/, rendering each page the first time it is requested.
+
+    A drop-in for SiteSnapshot in PreviewServer, so nothing is built up front. A page URL
+    maps back to its markdown file (see markdown_for_url), which is rendered with
+    render_page and kept, gzipped, in an LRU holding at most max_bytes of responses;
+    other URLs are files under static/, cached the same way. Pages win over static files
+    at the same URL, like in a build.
+
+    Every hit re-stats the source (and the template, for pages). A changed stat is
+    followed by hashing the source, so a file that was only touched keeps its rendered
+    page; a changed hash or template renders it again. Renders are serialized, since
+    the shared block cache they go through is not thread-safe; hits never wait on them.
+    """
+
+    def __init__(self, content_dir, static_dir, template_path, max_bytes=DEFAULT_MAX_BYTES) -> None:
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.render_lock = threading.Lock()
+        self.hits = 0
+        self.renders = 0
+        self.evictions = 0
+
+    def lookup(self, path):
+        """Returns (resource, redirect) for a URL path, like SiteSnapshot.lookup."""
+        markdown = markdown_for_url(path)
+        if markdown is not None:
+            markdown_path = os.path.join(self.content_dir, markdown)
+            if os.path.isfile(markdown_path):
+                return self.get(path, markdown_path, page=True), None
+        segments = url_segments(path)
+        if segments is None:
+            return None, None
+        static_path = os.path.join(self.static_dir, *segments)
+        if segments[-1] == "":
+            static_path = os.path.join(static_path, "index.html")
+        if os.path.isfile(static_path):
+            return self.get(path, static_path, page=False), None
+
+        # A directory URL without its trailing slash, like SiteSnapshot
+        if segments[-1] != "" and (os.path.isfile(os.path.join(self.content_dir, *segments, "index.md"))
+                                   or os.path.isfile(os.path.join(static_path, "index.html"))):
+            return None, path + "/"
+        return None, None
+
+    def get(self, url, source_path, page):
+        """Returns the cached resource for a source if it is still current, rendering or loading it otherwise."""
+        try:
+            source_stamp = file_stamp(source_path)
+            template_stamp = file_stamp(self.template_path) if page else None
+        except FileNotFoundError:
+            return None
+        entry = self.current_entry(url, source_path, source_stamp, template_stamp)
+        if entry is not None:
+            return entry.resource
+
+        with self.render_lock:
+            # Another request may have rendered it while this one waited
+            entry = self.current_entry(url, source_path, source_stamp, template_stamp)
+            if entry is not None:
+                return entry.resource
+            with open(source_path, 'rb') as f:
+                source = f.read()
+            digest = hash_bytes(source)
+            if page:
+                body = render_page(source.decode(), self.template_path).encode()
+                path = url + "index.html" if url.endswith("/") else url
+            else:
+                body = source
+                path = source_path
+            gzip_body = compress_bytes(body) if is_compressible(path) else None
+            entry = CachedResource(Resource(body, content_type(path), source_stamp, gzip_body),
+                                   source_stamp, digest, template_stamp)
+            self.renders += 1
+            self.store(url, entry)
+            return entry.resource
+
+    def current_entry(self, url, source_path, source_stamp, template_stamp):
+        """Returns the cached entry for a URL if it still matches its source and template, or None."""
+        entry = self.entries.get(url)
+        if entry is None or entry.template_stamp != template_stamp:
+            return None
+        if entry.source_stamp != source_stamp:
+            # Touched but unchanged sources keep their rendered page
+            try:
+                if hash_file(source_path) != entry.source_digest:
+                    return None
+            except FileNotFoundError:
+                return None
+            entry.source_stamp = source_stamp
+        with self.lock:
+            if self.entries.get(url) is not entry:
+                return None
+            self.entries.move_to_end(url)
+            self.hits += 1
+        return entry
+
+    def store(self, url, entry):
+        with self.lock:
+            previous = self.entries.pop(url, None)
+            if previous is not None:
+                self.size -= previous.size
+            # A response larger than the whole cache is served without being kept
+            if entry.size > self.max_bytes:
+                return
+            self.entries[url] = entry
+            self.size += entry.size
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted.size
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def create_lazy_server(content_dir, static_dir, template_path, host="127.0.0.1", port=DEFAULT_PORT,
+                       max_bytes=DEFAULT_MAX_BYTES):
+    """Returns a server that renders pages on demand (call serve_forever() to run it)."""
+    return PreviewServer((host, port), LazySite(content_dir, static_dir, template_path, max_bytes))
@@ -1,6 +1,8 @@
-from htmlnode import HTMLNode
+from htmlnode import HTMLNode, escape_text
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag=None, value=None, props=None) -> None:
         if value is None:
             raise ValueError("LeafNode must have a value.")
@@ -11,9 +13,12 @@ class LeafNode(HTMLNode):
         if self.value is None:
             raise ValueError("LeafNode must have a value")
         if self.tag is None:
-            return f"{self.value}"
+            return escape_text(self.value)
         html_props = super().props_to_html()
-        return f'<{self.tag}{html_props}>{self.value}</{self.tag}>'
+        return f'<{self.tag}{html_props}>{escape_text(self.value)}</{self.tag}>'
+        
+    def iter_html(self):
+        yield self.to_html()
         
     def __repr__(self):
         return (f"LeafNode(\n"
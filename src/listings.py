@@ -0,0 +1,209 @@
+import json
+import os
+import re
+from buildlog import log
+from compress import remove_sidecar
+from helper_functions import load_page_template, open_page_output, page_environment
+from htmlnode import escape_text
+from leafnode import LeafNode
+from manifest import hash_bytes, remove_empty_parents
+from parentnode import ParentNode
+
+# Pages listed on each page of a section index or tag archive
+DEFAULT_PAGE_SIZE = 20
+
+# Tag archives live under /tags/<slug>/
+TAGS_DIRECTORY = "tags"
+
+# Runs of anything but letters and digits become a single "-" in a slug
+SLUG_SEPARATOR_PATTERN = re.compile(r"[\W_]+")
+
+
+def slugify(text):
+    """Turns a tag into a lowercase URL path segment; tags differing only in case or punctuation share one."""
+    slug = SLUG_SEPARATOR_PATTERN.sub("-", text.lower()).strip("-")
+    return slug or hash_bytes(text.encode())[:8]
+
+
+def listing_output(base, number, numbered=False):
+    """Returns the output path of the number-th page of a listing rooted at the base directory.
+
+    The first page is the directory's index.html unless numbered is set, which is used
+    when a content page already produces that file.
+    """
+    if number == 1 and not numbered:
+        return os.path.join(base, "index.html")
+    return os.path.join(base, "page", str(number), "index.html")
+
+
+def output_url(output):
+    """Returns the site-absolute URL of an output path relative to the destination directory."""
+    url = "/" + output.replace(os.sep, "/")
+    if url.endswith("/index.html"):
+        return url[:-len("index.html")]
+    return url
+
+
+class Listing():
+    """One page of a paginated collection.
+
+    items are the (url, title, date) of the pages it shows, newest first; previous and
+    next are the URLs of the neighbouring pages of the same collection, if any.
+    """
+    __slots__ = ("title", "output", "items", "previous", "next")
+
+    def __init__(self, title, output, items, previous=None, next=None) -> None:
+        self.title = title
+        self.output = output
+        self.items = items
+        self.previous = previous
+        self.next = next
+
+    def digest(self, environment):
+        """Hashes everything the listing shows, along with the build environment it is rendered in."""
+        data = [environment, self.title, self.items, self.previous, self.next]
+        return hash_bytes(json.dumps(data).encode())
+
+    def __repr__(self) -> str:
+        return f"Listing(title={self.title!r}, output={self.output!r}, items={len(self.items)})"
+
+
+def paginate(title, base, keys, site_index, page_size, taken):
+    """Splits the pages of a collection into Listings, skipping any output a content page already produces."""
+    items = [(entry["url"], entry["title"], entry["date"]) for entry in map(site_index.get, keys)]
+    chunks = [items[start:start + page_size] for start in range(0, len(items), page_size)]
+    count = len(chunks)
+    outputs = []
+    for number in range(1, count + 1):
+        output = listing_output(base, number)
+        if output in taken:
+            output = listing_output(base, number, numbered=True)
+        outputs.append(output)
+
+    listings = []
+    for number, (output, chunk) in enumerate(zip(outputs, chunks), start=1):
+        if output in taken:
+            continue
+        page_title = title if count == 1 else f"{title} (page {number} of {count})"
+        newer = output_url(outputs[number - 2]) if number > 1 else None
+        older = output_url(outputs[number]) if number < count else None
+        listings.append(Listing(page_title, output, chunk, newer, older))
+    return listings
+
+
+def plan_listings(site_index, page_size=DEFAULT_PAGE_SIZE):
+    """Returns the Listings of every section and tag in a SiteIndex.
+
+    A section is a top-level content directory, listing every page under it besides its
+    own index.md; a tag lists every page carrying it. Pages a markdown file produces
+    always win over listings.
+    """
+    taken = {key.replace(".md", ".html") for key in site_index.pages}
+    listings = []
+
+    for section, keys in sorted(site_index.by_section.items()):
+        if not section:
+            continue
+        section_index = os.path.join(section, "index.md")
+        members = [key for key in keys if key != section_index]
+        if members:
+            listings += paginate(section, section, members, site_index, page_size, taken)
+
+    # Tags that slugify alike are one archive, named after the first of them
+    order = {key: position for position, key in enumerate(site_index.by_date)}
+    archives = {}
+    for tag, keys in sorted(site_index.by_tag.items()):
+        name, members = archives.setdefault(slugify(tag), (tag, set()))
+        members.update(keys)
+    for slug, (name, members) in sorted(archives.items()):
+        keys = sorted(members, key=order.get)
+        listings += paginate(f"Tagged {name}", os.path.join(TAGS_DIRECTORY, slug), keys, site_index,
+                             page_size, taken)
+    return listings
+
+
+def listing_to_html_node(listing):
+    """Builds the content of a listing page: a heading, a list of links and newer/older navigation."""
+    items = []
+    for url, title, date in listing.items:
+        children = [LeafNode("a", title, {"href": url})]
+        if date:
+            children += [LeafNode(None, " "), LeafNode("time", date, {"datetime": date})]
+        items.append(ParentNode("li", children))
+    children = [LeafNode("h1", listing.title), ParentNode("ul", items)]
+
+    links = []
+    if listing.previous:
+        links.append(LeafNode("a", "Newer", {"href": listing.previous, "rel": "prev"}))
+    if listing.next:
+        links.append(LeafNode("a", "Older", {"href": listing.next, "rel": "next"}))
+    if links:
+        children.append(ParentNode("nav", links))
+    return ParentNode("div", children)
+
+
+def remove_listing(dest_dir, output):
+    output_path = os.path.join(dest_dir, output)
+    if os.path.exists(output_path):
+        os.remove(output_path)
+        remove_sidecar(output_path)
+        remove_empty_parents(output_path, dest_dir)
+        log.file("listing_removed", dest=output_path)
+        return True
+    return False
+
+
+def generate_listings(site_index, template_path, dest_dir, manifest=None, page_size=DEFAULT_PAGE_SIZE, gzip=False):
+    """Writes the section indexes and tag archives of a SiteIndex into the template.
+
+    Only page metadata is used; no markdown is read. With a BuildManifest, a listing is
+    rewritten only when its digest (its pages' URLs, titles and dates, its navigation
+    and the build environment) changed or its output is missing, and listings that no
+    longer exist are removed. Should be run after the pages, so a content page that
+    took over a listing's output is never deleted.
+    Returns a dict counting the listings that were rebuilt, skipped and removed.
+    """
+    stats = {"rebuilt": 0, "skipped": 0, "removed": 0}
+    environment = page_environment(template_path, gzip)
+    template = None
+    seen = set()
+
+    for listing in plan_listings(site_index, page_size):
+        seen.add(listing.output)
+        dest_path = os.path.join(dest_dir, listing.output)
+        digest = listing.digest(environment)
+        if manifest is not None:
+            entry = manifest.listings.get(listing.output)
+            if entry is not None and entry.get("digest") == digest and os.path.exists(dest_path):
+                stats["skipped"] += 1
+                continue
+
+        # The template is only loaded once something needs rendering
+        if template is None:
+            template = load_page_template(template_path)
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        with open_page_output(dest_path, gzip) as f:
+            template.write(f, {"Title": escape_text(listing.title),
+                               "Content": listing_to_html_node(listing).iter_html()})
+        log.file("listing_generated", dest=dest_path)
+        if manifest is not None:
+            manifest.listings[listing.output] = {"digest": digest}
+        stats["rebuilt"] += 1
+
+    if manifest is not None:
+        stats["removed"] = remove_listings(dest_dir, manifest, keep=seen)
+    return stats
+
+
+def remove_listings(dest_dir, manifest, keep=()):
+    """Deletes the recorded listings not in keep (all of them by default), sparing outputs pages now own.
+
+    Returns how many files were deleted.
+    """
+    page_outputs = {entry["output"] for entry in manifest.pages.values()}
+    removed = 0
+    for output in [output for output in manifest.listings if output not in keep]:
+        del manifest.listings[output]
+        if output not in page_outputs and remove_listing(dest_dir, output):
+            removed += 1
+    return removed
@@ -1,23 +1,274 @@
 from helper_functions import *
+from buildlog import log
+from blockcache import BlockCache, set_shared_cache
+from doccache import DocumentCache, set_shared_document_cache
+from fingerprint import ASSET_MANIFEST_NAME, fingerprint_assets, remove_fingerprints, set_shared_asset_map
+from listings import DEFAULT_PAGE_SIZE, TAGS_DIRECTORY, generate_listings, remove_listings
+from manifest import BuildManifest
+from scheduler import PageScheduler
+from lazysite import create_lazy_server
+from server import DEFAULT_PORT, create_preview_server
+from siteindex import SiteIndex
+from staging import activate_build, build_manifest_path, discard_build, prepare_staging, prune_builds, rollback
+from watcher import SiteWatcher
+import argparse
+import buildlog
+import profiler
 import os
 import shutil
+import sys
+import threading
 
 dir_path_static = "static"
 dir_path_public = "public"
 dir_path_content = "content"
+dir_path_builds = ".builds"
 template_path = "./template.html"
-    
-
-def main():
-    print("Deleting public directory...")
-    # Step 1: Delete all contents in the destination directory
-    delete_destination_contents(dir_path_public)
-    
-    # Step 2: Copy all contents from the source to the destination
-    print("Copying static files to public directory...")
-    copy_directory_recursive(dir_path_static, dir_path_public)
-    
-    # Step 3: Generate the webpage
-    generate_pages_recursive(dir_path_content, template_path, dir_path_public)
-       
-main()
\ No newline at end of file
+manifest_path = "./.cache/build-manifest.json"
+document_cache_path = "./.cache/documents"
+site_index_path = "./.cache/site-index.json"
+trace_path = "./.cache/build-trace.json"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static site from content/ and static/.")
+    parser.add_argument("--clean", action="store_true",
+                        help="rebuild every page and copy every asset from scratch, ignoring the build manifest")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of worker processes used to render pages (default: 1)")
+    parser.add_argument("--max-in-flight", type=int, metavar="PAGES",
+                        help="with -j, the most pages handed to the workers at once (default: 32 per worker)")
+    parser.add_argument("--memory-budget", type=float, metavar="MB",
+                        help="with -j, the estimated memory the pages handed to the workers may take at once; "
+                             "a page too large for it still runs on its own (default: no limit)")
+    parser.add_argument("--hash-assets", action="store_true",
+                        help="compare static files by content when only their mtime differs")
+    parser.add_argument("--link-assets", action="store_true",
+                        help="hardlink static files into public/ instead of copying them when possible")
+    parser.add_argument("--gzip", action="store_true",
+                        help="write a precompressed .gz sidecar next to every page and compressible asset")
+    parser.add_argument("--fingerprint-assets", action="store_true",
+                        help=f"also publish every static file under a content-hashed name, list them in "
+                             f"{ASSET_MANIFEST_NAME} and point the template's and pages' URLs at them")
+    parser.add_argument("--listings", nargs="?", type=int, const=DEFAULT_PAGE_SIZE, metavar="PER_PAGE",
+                        help=f"also generate paginated index pages for every content section and tag archives "
+                             f"under /{TAGS_DIRECTORY}/, from page metadata (default: {DEFAULT_PAGE_SIZE} per page)")
+    parser.add_argument("--in-place", action="store_true",
+                        help="write straight into a plain public/ directory instead of a staged build")
+    parser.add_argument("--rollback", action="store_true",
+                        help="point public/ back at the previous staged build and exit")
+    parser.add_argument("--watch", action="store_true",
+                        help="after building, keep running and rebuild whatever changes in content/, static/ or the template")
+    parser.add_argument("--poll", type=float, metavar="SECONDS",
+                        help="with --watch, poll for changes every SECONDS instead of using inotify")
+    parser.add_argument("--serve", nargs="?", type=int, const=DEFAULT_PORT, metavar="PORT",
+                        help=f"after building, serve public/ from memory with ETags and gzip on PORT "
+                             f"(default: {DEFAULT_PORT}); with --watch, rebuilds are served as soon as they are done")
+    parser.add_argument("--lazy", action="store_true",
+                        help="with --serve, build nothing: render each page from content/ when it is first "
+                             "requested and serve static/ as it is")
+    parser.add_argument("--page-cache-size", type=float, default=64, metavar="MB",
+                        help="with --lazy, memory for rendered pages and static files (default: 64)")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="address for --serve to listen on (default: 127.0.0.1)")
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument("-v", "--verbose", action="store_true",
+                           help="print a line for every file copied, deleted or generated")
+    verbosity.add_argument("-q", "--quiet", action="store_true",
+                           help="only print errors")
+    parser.add_argument("--log-json", metavar="PATH",
+                        help="also append every build event to PATH as JSON lines")
+    parser.add_argument("--block-cache-size", type=float, default=64, metavar="MB",
+                        help="memory for rendered blocks shared across pages (default: 64, 0 turns the cache off)")
+    parser.add_argument("--block-cache", metavar="PATH",
+                        help="load the block cache from PATH and save it back after the build")
+    parser.add_argument("--document-cache-size", type=float, default=256, metavar="MB",
+                        help=f"disk space for rendered documents in {document_cache_path}, reused when only "
+                             f"the template changed (default: 256, 0 turns the cache off)")
+    parser.add_argument("--profile", nargs="?", const=trace_path, metavar="TRACE",
+                        help=f"record per-stage timings, write them as a Chrome trace (default: {trace_path}) "
+                             f"and print the slowest stages and pages; ${profiler.PROFILE_ENV} does the same")
+    return parser.parse_args(argv)
+
+
+def write_profile(path):
+    profiler.write_chrome_trace(path)
+    log.info(profiler.summary())
+    log.info(f"Trace written to {path} (open it in chrome://tracing or https://ui.perfetto.dev)")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.profile is None and os.environ.get(profiler.PROFILE_ENV):
+        # The variable is either a trace path or just a flag like "1"
+        value = os.environ[profiler.PROFILE_ENV]
+        args.profile = value if value.endswith(".json") else trace_path
+    if args.profile:
+        profiler.enable()
+    verbosity = buildlog.VERBOSE if args.verbose else buildlog.QUIET if args.quiet else buildlog.NORMAL
+    log.configure(verbosity=verbosity, sink=buildlog.JsonLinesSink(args.log_json) if args.log_json else None)
+    try:
+        return build(args)
+    finally:
+        log.close()
+
+
+def serve_lazily(args):
+    """Serves the site without building it, rendering pages as they are requested."""
+    port = args.serve if args.serve is not None else DEFAULT_PORT
+    max_bytes = int(args.page_cache_size * 1024 * 1024)
+    server = create_lazy_server(dir_path_content, dir_path_static, template_path, args.host, port, max_bytes)
+    log.info(f"Serving {dir_path_content} and {dir_path_static} at {server.url}, rendering pages on demand")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        site = server.snapshot
+        log.info(f"Stopped serving ({site.renders} rendered or loaded, {site.hits} cache hits, "
+                 f"{site.evictions} evicted).")
+    finally:
+        server.server_close()
+    return 0
+
+
+def build(args):
+    # Rendered blocks are shared by every page this process builds (and optionally kept on disk)
+    max_bytes = int(args.block_cache_size * 1024 * 1024)
+    if max_bytes <= 0:
+        block_cache = None
+    elif args.block_cache:
+        block_cache = BlockCache.load(args.block_cache, max_bytes)
+    else:
+        block_cache = BlockCache(max_bytes)
+    set_shared_cache(block_cache)
+
+    # Rendered documents persist on disk, so a template change doesn't re-parse unchanged markdown
+    max_bytes = int(args.document_cache_size * 1024 * 1024)
+    document_cache = DocumentCache(document_cache_path, max_bytes) if max_bytes > 0 else None
+    set_shared_document_cache(document_cache)
+
+    if args.lazy:
+        return serve_lazily(args)
+
+    if args.rollback:
+        previous = rollback(dir_path_public, dir_path_builds)
+        if previous is None:
+            log.error("No previous build to roll back to.")
+            return 1
+        log.info(f"Rolled {dir_path_public} back to {previous}")
+        return 0
+
+    # Step 1: Pick the output directory and the manifest describing what is already in it
+    if args.in_place:
+        output_dir = dir_path_public
+        if args.clean:
+            log.info("Deleting public directory...")
+            delete_destination_contents(dir_path_public)
+            manifest = BuildManifest(manifest_path)
+        else:
+            manifest = BuildManifest.load(manifest_path)
+    else:
+        # Build into a staging copy of the live site; readers keep seeing the old one meanwhile
+        output_dir, live_build = prepare_staging(dir_path_public, dir_path_builds, clean=args.clean)
+        log.info(f"Staging build in {output_dir}")
+        if live_build is None or args.clean:
+            manifest = BuildManifest()
+        else:
+            manifest = BuildManifest.load(build_manifest_path(live_build))
+        manifest.path = build_manifest_path(output_dir)
+
+    # Step 2: Copy new or changed static files to the destination and delete orphaned ones
+    log.info("Syncing static files to public directory...")
+    asset_stats = sync_directory(dir_path_static, output_dir, manifest=manifest,
+                                 compare_hash=args.hash_assets, link=args.link_assets, jobs=args.jobs,
+                                 gzip=args.gzip)
+    compressed = f", {asset_stats['compressed']} compressed" if args.gzip else ""
+    log.info(f"Assets: {asset_stats['copied']} copied, {asset_stats['unchanged']} unchanged, "
+             f"{asset_stats['deleted']} deleted{compressed}")
+
+    # Step 2b: Give every asset a content-hashed twin that pages link to, so it can be cached forever
+    if args.fingerprint_assets:
+        asset_map = fingerprint_assets(dir_path_static, output_dir, manifest)
+        log.info(f"Fingerprinted {len(asset_map)} asset(s) into {ASSET_MANIFEST_NAME}")
+    else:
+        asset_map = None
+        remove_fingerprints(output_dir, manifest)
+    set_shared_asset_map(asset_map)
+
+    # Step 2c: Index the title, date, tags and slug of every page, reading only their headers
+    site_index = SiteIndex.load(site_index_path)
+    index_stats = site_index.update(dir_path_content)
+    site_index.save()
+    log.info(f"Index: {len(site_index)} pages, {index_stats['scanned']} scanned, {index_stats['removed']} removed")
+
+    # Step 3: Generate the pages that changed since the last build
+    memory_budget = int(args.memory_budget * 1024 * 1024) if args.memory_budget else None
+    scheduler = PageScheduler(args.jobs, max_in_flight=args.max_in_flight, memory_budget=memory_budget)
+    stats = generate_pages_recursive(dir_path_content, template_path, output_dir,
+                                     manifest=manifest, gzip=args.gzip, scheduler=scheduler)
+    if block_cache is not None and block_cache.path is not None:
+        block_cache.save()
+    if document_cache is not None:
+        document_cache.evict()
+    log.info(f"Pages: {stats['rebuilt']} rebuilt, {stats['skipped']} skipped, {stats['removed']} removed")
+    if scheduler.peak_rss:
+        # The main process first, then the workers
+        peaks = sorted(scheduler.peak_rss.items(), key=lambda item: item[0] != "main")
+        log.info("Peak RSS: " + ", ".join(f"{name} {peak / (1024 * 1024):.1f} MB" for name, peak in peaks))
+
+    # Step 3b: Generate the section indexes and tag archives whose pages or titles changed
+    if args.listings:
+        listing_stats = generate_listings(site_index, template_path, output_dir, manifest=manifest,
+                                          page_size=args.listings, gzip=args.gzip)
+        log.info(f"Listings: {listing_stats['rebuilt']} rebuilt, {listing_stats['skipped']} skipped, "
+                 f"{listing_stats['removed']} removed")
+    else:
+        remove_listings(output_dir, manifest)
+
+    manifest.save()
+
+    # Report every page that failed instead of stopping at the first one
+    if stats["errors"]:
+        for markdown_path, error in stats["errors"]:
+            log.error(f"  {markdown_path}: {error}")
+        log.error(f"{len(stats['errors'])} page(s) failed to build.")
+
+    if args.profile:
+        write_profile(args.profile)
+
+    # Step 4: Swap the staged build in atomically (a broken build is only published in watch mode)
+    if not args.in_place:
+        if stats["errors"] and not args.watch:
+            discard_build(output_dir)
+            log.info(f"Keeping the live build; discarded {output_dir}")
+            return 1
+        activate_build(output_dir, dir_path_public)
+        log.info(f"{dir_path_public} now points at {output_dir}")
+        for removed_build in prune_builds(dir_path_builds, dir_path_public):
+            log.info(f"Removed old build {removed_build}")
+
+    # Step 5: Optionally serve the site from memory
+    server = None
+    if args.serve is not None:
+        server = create_preview_server(dir_path_public, args.host, args.serve)
+        log.info(f"Serving {dir_path_public} at {server.url} ({len(server.snapshot.resources)} files in memory)")
+
+    # Step 6: Optionally keep the process warm and rebuild on every change
+    if args.watch:
+        site_watcher = SiteWatcher(dir_path_content, dir_path_static, template_path, dir_path_public,
+                                   manifest, jobs=args.jobs, gzip=args.gzip, fingerprint=args.fingerprint_assets,
+                                   site_index=site_index, listings=args.listings)
+        if server is not None:
+            threading.Thread(target=server.serve_forever, name="preview-server", daemon=True).start()
+        site_watcher.run(poll_interval=args.poll, on_rebuild=server.snapshot.refresh if server else None)
+    elif server is not None:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            log.info("Stopped serving.")
+    if server is not None:
+        server.server_close()
+    return 1 if stats["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
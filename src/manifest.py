@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+from atomicfile import atomic_open
+from compress import remove_sidecar
+
+# Bump this whenever the layout of the manifest file changes
+MANIFEST_VERSION = 1
+
+# Source files that are not part of the generator itself
+NON_GENERATOR_PREFIXES = ("test_", "bench_")
+
+_generator_version = None
+
+
+def hash_bytes(data):
+    """Returns the hex sha256 digest of a bytes object."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """Returns the hex sha256 digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def generator_version():
+    """Hashes the generator's own source code so that code changes invalidate old builds."""
+    global _generator_version
+    if _generator_version is None:
+        src_dir = os.path.dirname(os.path.abspath(__file__))
+        digest = hashlib.sha256()
+        for name in sorted(os.listdir(src_dir)):
+            if not name.endswith(".py") or name.startswith(NON_GENERATOR_PREFIXES):
+                continue
+            digest.update(name.encode())
+            digest.update(hash_file(os.path.join(src_dir, name)).encode())
+        _generator_version = digest.hexdigest()
+    return _generator_version
+
+
+def build_environment(template_path, gzip=False, template_references=None):
+    """Returns a digest of everything besides the markdown source that affects a page's output.
+
+    template_references are the asset URLs the template links to, mapped to their
+    fingerprinted URLs; a new fingerprint for any of them changes every page.
+    """
+    digest = hashlib.sha256()
+    digest.update(generator_version().encode())
+    digest.update(hash_file(template_path).encode())
+    # Switching gzip sidecars on has to regenerate the pages that lack one
+    if gzip:
+        digest.update(b"gzip")
+    if template_references:
+        digest.update(json.dumps(template_references, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class BuildManifest():
+    """Persistent record of which source produced which output, used for incremental builds.
+
+    Every page entry is keyed by the markdown path relative to the content directory and
+    remembers the source's size, mtime and sha256 along with the output path relative to
+    the destination directory. A page is fresh when its source hash and the build
+    environment (template + generator code) are unchanged and its output still exists.
+    Pages built with fingerprinted assets also remember the asset URLs they link to and
+    what those resolved to, so that a new fingerprint rebuilds exactly the pages using it.
+
+    Static files copied into the destination are listed under assets (keyed by their path
+    relative to the static directory), so that outputs of deleted static files can be
+    removed without touching anything else.
+
+    Generated listing pages are listed under listings (keyed by their output path) with
+    a digest of everything they show, so a listing is only rewritten when that changes.
+    """
+
+    def __init__(self, path=None) -> None:
+        self.path = path
+        self.environment = None
+        self.pages = {}
+        self.assets = {}
+        self.listings = {}
+
+    @classmethod
+    def load(cls, path):
+        """Loads a manifest from disk, starting empty if it is missing, corrupt or outdated."""
+        manifest = cls(path)
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return manifest
+
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return manifest
+
+        manifest.environment = data.get("environment")
+        manifest.pages = data.get("pages", {})
+        manifest.assets = data.get("assets", {})
+        manifest.listings = data.get("listings", {})
+        return manifest
+
+    def save(self):
+        """Atomically writes the manifest back to its path."""
+        if self.path is None:
+            return
+        manifest_dir = os.path.dirname(self.path)
+        if manifest_dir and not os.path.exists(manifest_dir):
+            os.makedirs(manifest_dir)
+
+        data = {
+            "version": MANIFEST_VERSION,
+            "environment": self.environment,
+            "pages": self.pages,
+            "assets": self.assets,
+            "listings": self.listings,
+        }
+        with atomic_open(self.path) as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+
+    def source_state(self, key, source_path):
+        """Returns the (size, mtime_ns, sha256) of a source, skipping the hash when the stat is unchanged."""
+        stat = os.stat(source_path)
+        entry = self.pages.get(key)
+        if entry and entry.get("source") and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            return stat.st_size, stat.st_mtime_ns, entry["source"]
+        return stat.st_size, stat.st_mtime_ns, hash_file(source_path)
+
+    def is_fresh(self, key, state, output, dest_dir, environment):
+        """Checks whether the recorded output for a source can be reused as-is."""
+        entry = self.pages.get(key)
+        if entry is None or self.environment != environment:
+            return False
+        if entry.get("source") != state[2] or entry.get("output") != output:
+            return False
+        return os.path.exists(os.path.join(dest_dir, output))
+
+    def record(self, key, state, output, references=None):
+        """Remembers the source state (and asset references) that produced an output."""
+        size, mtime_ns, digest = state
+        self.pages[key] = {"size": size, "mtime_ns": mtime_ns, "source": digest, "output": output}
+        if references:
+            self.pages[key]["references"] = references
+
+    def invalidate(self, key):
+        """Forces a source to be rebuilt next time while still remembering its output for pruning."""
+        entry = self.pages.get(key)
+        if entry is not None:
+            entry["source"] = None
+
+    def prune(self, seen_keys, dest_dir):
+        """Removes outputs (and their manifest entries) whose sources no longer exist.
+
+        Returns the list of output paths that were deleted.
+        """
+        removed = []
+        for key in [key for key in self.pages if key not in seen_keys]:
+            output_path = os.path.join(dest_dir, self.pages.pop(key)["output"])
+            if os.path.exists(output_path):
+                os.remove(output_path)
+                remove_sidecar(output_path)
+                removed.append(output_path)
+                remove_empty_parents(output_path, dest_dir)
+        return removed
+
+
+def remove_empty_parents(path, stop_dir):
+    """Removes the now-empty parent directories of a deleted path, up to (but not including) stop_dir."""
+    stop_dir = os.path.abspath(stop_dir)
+    parent = os.path.dirname(os.path.abspath(path))
+    while parent.startswith(stop_dir + os.sep) and not os.listdir(parent):
+        os.rmdir(parent)
+        parent = os.path.dirname(parent)
@@ -1,6 +1,8 @@
 from htmlnode import HTMLNode
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag=None, children=None, props=None) -> None:
         if children is None or children == []:
             raise ValueError("Parent nodes must have children!")
@@ -0,0 +1,106 @@
+import contextlib
+import json
+import os
+import threading
+import time
+
+# Setting this environment variable to a file path turns profiling on (same as main.py --profile)
+PROFILE_ENV = "SITEGEN_PROFILE"
+
+# Shared do-nothing context manager so a disabled span costs one function call
+_NULL_SPAN = contextlib.nullcontext()
+
+_enabled = bool(os.environ.get(PROFILE_ENV))
+_spans = []
+
+
+def enable():
+    """Turns span recording on for this process and for worker processes it starts."""
+    global _enabled
+    _enabled = True
+    # Spawned workers re-import this module, so they pick the setting up from the environment
+    os.environ.setdefault(PROFILE_ENV, "1")
+
+
+def is_enabled():
+    return _enabled
+
+
+@contextlib.contextmanager
+def _record(name, category, args):
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        end = time.perf_counter_ns()
+        _spans.append((name, category, start // 1000, (end - start) // 1000,
+                       os.getpid(), threading.get_native_id(), args))
+
+
+def span(name, category="build", **args):
+    """Times the enclosed block as one span when profiling is on; does nothing otherwise.
+
+    `args` are shown in the trace viewer, and a "path" argument identifies the page a
+    span belongs to in the summary.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _record(name, category, args)
+
+
+def take_spans():
+    """Returns the spans recorded so far and forgets them (workers hand them back to the parent)."""
+    spans = _spans[:]
+    del _spans[:]
+    return spans
+
+
+def reset():
+    """Forgets recorded spans; page workers call it so forked ones don't hand back their parent's."""
+    del _spans[:]
+
+
+def add_spans(spans):
+    _spans.extend(spans)
+
+
+def chrome_trace(spans):
+    """Converts spans to the Chrome trace-event format (load it in chrome://tracing or Perfetto)."""
+    events = []
+    for name, category, start, duration, pid, tid, args in spans:
+        events.append({"name": name, "cat": category, "ph": "X", "ts": start, "dur": duration,
+                       "pid": pid, "tid": tid, "args": args})
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def write_chrome_trace(path, spans=None):
+    spans = _spans if spans is None else spans
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(chrome_trace(spans), f)
+
+
+def summary(spans=None, limit=10):
+    """Returns a text table of the slowest stages (by total time) and the slowest pages."""
+    spans = _spans if spans is None else spans
+    stages = {}
+    pages = []
+    for name, category, start, duration, pid, tid, args in spans:
+        if name == "page":
+            pages.append((duration, args.get("path", "?")))
+            continue
+        count, total, longest = stages.get((category, name), (0, 0, 0))
+        stages[(category, name)] = (count + 1, total + duration, max(longest, duration))
+
+    lines = [f"{'stage':28} {'count':>7} {'total ms':>10} {'mean ms':>9} {'max ms':>9}"]
+    for (category, name), (count, total, longest) in sorted(stages.items(), key=lambda item: -item[1][1])[:limit]:
+        lines.append(f"{category + '/' + name:28} {count:>7} {total / 1000:>10.1f} "
+                     f"{total / count / 1000:>9.2f} {longest / 1000:>9.2f}")
+    if pages:
+        lines.append("")
+        lines.append(f"{'slowest pages':60} {'ms':>9}")
+        for duration, path in sorted(pages, reverse=True)[:limit]:
+            lines.append(f"{path[-60:]:60} {duration / 1000:>9.2f}")
+    return "\n".join(lines)
@@ -0,0 +1,17 @@
+from leafnode import LeafNode
+
+class RawNode(LeafNode):
+    """A leaf holding HTML that is already rendered (such as a cached block), emitted as-is."""
+    __slots__ = ()
+
+    def __init__(self, html) -> None:
+        super().__init__(tag=None, value=html)
+
+    def to_html(self):
+        return self.value
+
+    def iter_html(self):
+        yield self.value
+
+    def __repr__(self):
+        return f"RawNode({self.value!r})"
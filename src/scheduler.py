@@ -0,0 +1,147 @@
+import heapq
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak RSS is simply not reported there
+    resource = None
+
+# Discovered pages waiting to be scheduled; largest-first ordering applies within this window
+DEFAULT_LOOKAHEAD = 1024
+
+# Default in-flight pages per worker, enough to keep every worker busy while results are collected
+IN_FLIGHT_PER_WORKER = 32
+
+# Small pages are sent to a worker together (up to this many bytes of markdown) to keep IPC overhead low
+BATCH_BYTES = 256 * 1024
+
+
+def peak_rss():
+    """Returns the peak resident set size of this process in bytes, or None where it is unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_batch(function, batch):
+    """Runs function on every job of a batch in a worker, returning the results, the worker's pid and its peak RSS."""
+    return [function(job) for job in batch], os.getpid(), peak_rss()
+
+
+class PageScheduler():
+    """Runs page jobs on a process pool, largest first, within an in-flight and memory budget.
+
+    Jobs come lazily from an iterable of (size, memory, job), so rendering starts while
+    pages are still being discovered. Up to lookahead discovered jobs wait in a heap,
+    and the largest is submitted next, keeping slow pages from ending up last. A job is
+    only submitted while at most max_in_flight pages and memory_budget bytes (the sum of
+    the jobs' memory estimates) are in flight; otherwise the scheduler waits for a job
+    to finish, which also pauses discovery once the heap is full. A job too large for
+    the budget on its own still runs, once nothing else is in flight.
+
+    peak_rss maps "main" and "worker <pid>" to the peak RSS of each process, in bytes;
+    peak_in_flight_pages and peak_in_flight_memory show how close the budget came to full.
+    context is the multiprocessing context the pool starts workers with (the platform's
+    default start method when None).
+    """
+
+    def __init__(self, jobs=1, max_in_flight=None, memory_budget=None, lookahead=DEFAULT_LOOKAHEAD,
+                 context=None) -> None:
+        self.jobs = max(1, jobs)
+        self.context = context
+        self.max_in_flight = max_in_flight or self.jobs * IN_FLIGHT_PER_WORKER
+        self.memory_budget = memory_budget
+        self.lookahead = lookahead
+        # Aim for at least two tasks per worker when batching small pages
+        self.batch_pages = max(1, self.max_in_flight // (self.jobs * 2))
+        self.in_flight_pages = 0
+        self.in_flight_memory = 0
+        self.peak_in_flight_pages = 0
+        self.peak_in_flight_memory = 0
+        self.peak_rss = {}
+
+    def fits(self, pages, memory):
+        """Checks whether pages more pages with memory more bytes stay within the budget."""
+        if self.in_flight_pages == 0 and pages == 1:
+            return True
+        if self.in_flight_pages + pages > self.max_in_flight:
+            return False
+        return self.memory_budget is None or self.in_flight_memory + memory <= self.memory_budget
+
+    def take_batch(self, pending):
+        """Pops the largest pending job, plus as many of the next ones as fit one small batch."""
+        size, sequence, memory, job = heapq.heappop(pending)
+        batch = [(sequence, job)]
+        batch_size, batch_memory = -size, memory
+        while pending and len(batch) < self.batch_pages:
+            size, _, memory, _ = pending[0]
+            if batch_size - size > BATCH_BYTES or not self.fits(len(batch) + 1, batch_memory + memory):
+                break
+            _, sequence, _, job = heapq.heappop(pending)
+            batch.append((sequence, job))
+            batch_size -= size
+            batch_memory += memory
+        return batch, batch_memory
+
+    def note_peak_rss(self, name, peak):
+        if peak is not None:
+            self.peak_rss[name] = max(peak, self.peak_rss.get(name, 0))
+
+    def run(self, function, page_jobs, initializer=None, initargs=()):
+        """Yields (job, function(job)) for every job, in the order the jobs were discovered.
+
+        Every worker calls initializer(*initargs) first. Workers may be spawned rather than
+        forked (the default outside Linux), so any state they need has to come this way.
+        """
+        pending = []
+        discovered = iter(page_jobs)
+        exhausted = False
+        sequence = 0
+        in_flight = {}
+        # Results that finished ahead of an earlier job, held back to keep the output order stable
+        finished = {}
+        next_sequence = 0
+
+        with ProcessPoolExecutor(max_workers=self.jobs, mp_context=self.context, initializer=initializer,
+                                 initargs=initargs) as executor:
+            while True:
+                # Discover pages until the lookahead window is full
+                while not exhausted and len(pending) < self.lookahead:
+                    try:
+                        size, memory, job = next(discovered)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    heapq.heappush(pending, (-size, sequence, memory, job))
+                    sequence += 1
+
+                # Submit the largest pages while they fit the budget
+                while pending and self.fits(1, pending[0][2]):
+                    batch, batch_memory = self.take_batch(pending)
+                    future = executor.submit(run_batch, function, [job for _, job in batch])
+                    in_flight[future] = (batch, batch_memory)
+                    self.in_flight_pages += len(batch)
+                    self.in_flight_memory += batch_memory
+                    self.peak_in_flight_pages = max(self.peak_in_flight_pages, self.in_flight_pages)
+                    self.peak_in_flight_memory = max(self.peak_in_flight_memory, self.in_flight_memory)
+
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch, batch_memory = in_flight.pop(future)
+                    self.in_flight_pages -= len(batch)
+                    self.in_flight_memory -= batch_memory
+                    results, pid, peak = future.result()
+                    self.note_peak_rss(f"worker {pid}", peak)
+                    for (job_sequence, job), result in zip(batch, results):
+                        finished[job_sequence] = (job, result)
+                while next_sequence in finished:
+                    yield finished.pop(next_sequence)
+                    next_sequence += 1
+        self.note_peak_rss("main", peak_rss())
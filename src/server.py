@@ -0,0 +1,257 @@
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import threading
+import urllib.parse
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from buildlog import log
+from compress import SIDECAR_SUFFIX, gzip_compressor, is_compressible, sidecar_path
+from fingerprint import ASSET_MANIFEST_NAME, path_to_url
+
+# Port --serve listens on when none is given
+DEFAULT_PORT = 8888
+
+# Fingerprinted assets never change under the same URL; everything else is revalidated with its ETag
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Temporary files atomic_open and friends leave while an output is being written
+TEMPORARY_FILE_PATTERN = re.compile(r"\.tmp\d*$")
+
+# Text types get an explicit charset, since every output is written as utf-8
+TEXT_TYPES = {"application/javascript", "application/json", "application/xml", "image/svg+xml"}
+
+
+def content_type(path):
+    guessed, _ = mimetypes.guess_type(path)
+    if guessed is None:
+        return "application/octet-stream"
+    if guessed.startswith("text/") or guessed in TEXT_TYPES:
+        return f"{guessed}; charset=utf-8"
+    return guessed
+
+
+def compress_bytes(data):
+    compressor = gzip_compressor()
+    return compressor.compress(data) + compressor.flush()
+
+
+def accepts_gzip(accept_encoding):
+    """Checks an Accept-Encoding header for gzip (or *) with a non-zero quality."""
+    wildcard = False
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        name = name.strip().lower()
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name in ("gzip", "x-gzip"):
+            return quality > 0
+        if name == "*":
+            wildcard = quality > 0
+    return wildcard
+
+
+def etag_matches(if_none_match, etag):
+    """Checks an If-None-Match header against an ETag, using the weak comparison RFC 9110 asks for."""
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+class Resource():
+    """One output file held in memory with its gzip variant, validators and cache policy."""
+
+    __slots__ = ("body", "gzip_body", "content_type", "etag", "gzip_etag", "cache_control", "stamp")
+
+    def __init__(self, body, content_type, stamp=None, gzip_body=None, immutable=False) -> None:
+        self.body = body
+        self.gzip_body = gzip_body
+        self.content_type = content_type
+        self.stamp = stamp
+        # Strong validators; the two encodings are different representations, so their tags differ
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gzip"'
+        self.cache_control = IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+
+
+class SiteSnapshot():
+    """In-memory copy of a built site, keyed by URL path.
+
+    Every file is read, hashed and (when compressible) gzipped once, when it is loaded,
+    so serving a request is a dictionary lookup and a socket write. The .gz sidecars of
+    a --gzip build are used as they are. refresh() reloads only the files whose stat
+    changed and swaps the new map in with one assignment, so requests served meanwhile
+    see either the old site or the new one.
+    """
+
+    def __init__(self, root) -> None:
+        self.root = root
+        self.resources = {}
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        """Loads new and changed files and forgets deleted ones. Returns how many files were (re)loaded."""
+        with self.lock:
+            immutable = self.fingerprinted_urls()
+            resources = {}
+            loaded = 0
+            for root, dirs, files in os.walk(self.root):
+                names = set(files)
+                for file in files:
+                    if TEMPORARY_FILE_PATTERN.search(file):
+                        continue
+                    if file.endswith(SIDECAR_SUFFIX) and file[:-len(SIDECAR_SUFFIX)] in names:
+                        continue
+                    path = os.path.join(root, file)
+                    url = path_to_url(os.path.relpath(path, self.root))
+                    try:
+                        stat = os.stat(path)
+                        stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+                        previous = self.resources.get(url)
+                        if previous is not None and previous.stamp == stamp:
+                            resources[url] = previous
+                            continue
+                        resources[url] = self.load(path, stamp, url in immutable)
+                    except FileNotFoundError:
+                        continue  # deleted while we were walking
+                    loaded += 1
+            self.resources = resources
+            return loaded
+
+    def fingerprinted_urls(self):
+        try:
+            with open(os.path.join(self.root, ASSET_MANIFEST_NAME)) as f:
+                return set(json.load(f).values())
+        except (OSError, ValueError):
+            return set()
+
+    def load(self, path, stamp, immutable=False):
+        with open(path, 'rb') as f:
+            body = f.read()
+        gzip_body = None
+        if os.path.exists(sidecar_path(path)):
+            with open(sidecar_path(path), 'rb') as f:
+                gzip_body = f.read()
+        elif is_compressible(path):
+            gzip_body = compress_bytes(body)
+        return Resource(body, content_type(path), stamp, gzip_body, immutable)
+
+    def lookup(self, path):
+        """Returns (resource, redirect): the resource for a URL path, or where to redirect a directory URL."""
+        resources = self.resources
+        if path.endswith("/"):
+            return resources.get(path + "index.html"), None
+        resource = resources.get(path)
+        if resource is None and path + "/index.html" in resources:
+            return None, path + "/"
+        return resource, None
+
+
+class PreviewRequestHandler(BaseHTTPRequestHandler):
+    """Answers GET and HEAD from the server's SiteSnapshot over persistent HTTP/1.1 connections."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "SiteGeneratorPreview"
+    # Headers and body are separate writes; with Nagle on, a keep-alive client waits out a delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def respond(self, send_body):
+        url = urllib.parse.urlsplit(self.path)
+        try:
+            resource, redirect = self.server.snapshot.lookup(urllib.parse.unquote(url.path))
+        except Exception as e:
+            # Only a site rendered on demand can fail here, e.g. on a page without a title
+            log.error(f"Failed to serve {url.path}: {type(e).__name__}: {e}")
+            self.send_body(HTTPStatus.INTERNAL_SERVER_ERROR, f"{type(e).__name__}: {e}\n".encode(),
+                           {"Content-Type": "text/plain; charset=utf-8"}, send_body)
+            return
+        if redirect is not None:
+            # Like http.server, so relative URLs inside directory pages keep working
+            location = urllib.parse.quote(redirect) + (f"?{url.query}" if url.query else "")
+            self.send_empty(HTTPStatus.MOVED_PERMANENTLY, {"Location": location})
+            return
+        if resource is None:
+            self.send_body(HTTPStatus.NOT_FOUND, b"Not Found\n", {"Content-Type": "text/plain; charset=utf-8"},
+                           send_body)
+            return
+
+        headers = {"Cache-Control": resource.cache_control}
+        gzip = resource.gzip_body is not None and accepts_gzip(self.headers.get("Accept-Encoding", ""))
+        if resource.gzip_body is not None:
+            headers["Vary"] = "Accept-Encoding"
+        headers["ETag"] = resource.gzip_etag if gzip else resource.etag
+        if etag_matches(self.headers.get("If-None-Match"), headers["ETag"]):
+            self.send_empty(HTTPStatus.NOT_MODIFIED, headers)
+            return
+
+        headers["Content-Type"] = resource.content_type
+        if gzip:
+            headers["Content-Encoding"] = "gzip"
+        self.send_body(HTTPStatus.OK, resource.gzip_body if gzip else resource.body, headers, send_body)
+
+    def send_empty(self, status, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def send_body(self, status, body, headers, send_body):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_request(self, code='-', size='-'):
+        log.file("request_served", method=self.command, path=self.path, status=int(code))
+        log.flush()
+
+    def log_message(self, format, *args):
+        log.file("server_message", message=format % args)
+
+
+class PreviewServer(ThreadingHTTPServer):
+    """Threaded HTTP server for a SiteSnapshot (or anything with its lookup()); each connection gets its own thread."""
+
+    daemon_threads = True
+
+    def __init__(self, address, snapshot) -> None:
+        super().__init__(address, PreviewRequestHandler)
+        self.snapshot = snapshot
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+
+def create_preview_server(root, host="127.0.0.1", port=DEFAULT_PORT):
+    """Loads the site under root into memory and returns a server for it (call serve_forever() to run it).
+
+    After rebuilding the site, server.snapshot.refresh() picks up the changed files.
+    """
+    snapshot = SiteSnapshot(root)
+    snapshot.refresh()
+    return PreviewServer((host, port), snapshot)
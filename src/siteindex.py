@@ -0,0 +1,172 @@
+import json
+import os
+from atomicfile import atomic_open
+from frontmatter import read_front_matter, read_title_line
+from helper_functions import page_title
+from manifest import generator_version
+
+# Bump this whenever the layout of the index file changes
+SITE_INDEX_VERSION = 1
+
+
+def page_url(relative_path):
+    """Returns the URL of the page generated from a markdown path relative to the content directory."""
+    url = "/" + relative_path.replace(os.sep, "/").replace(".md", ".html")
+    if url.endswith("/index.html"):
+        return url[:-len("index.html")]
+    return url
+
+
+def page_slug(relative_path):
+    """Returns the default slug of a page: its file name, or its directory's name for an index.md."""
+    directory, file = os.path.split(relative_path)
+    name = os.path.splitext(file)[0]
+    return os.path.basename(directory) if name == "index" else name
+
+
+def page_section(relative_path):
+    """Returns the top-level directory a page lives in ("" for pages at the root of the content directory)."""
+    parts = relative_path.split(os.sep)
+    return parts[0] if len(parts) > 1 else ""
+
+
+def normalize_tags(tags):
+    """Accepts a list or a comma-separated string and returns the distinct non-empty tags in order."""
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    seen = []
+    for tag in tags or []:
+        tag = tag.strip()
+        if tag and tag not in seen:
+            seen.append(tag)
+    return seen
+
+
+def scan_metadata(markdown_path, relative_path):
+    """Reads a page's title, date, tags and slug from the front matter and first line only.
+
+    The body of the markdown is never read, let alone parsed.
+    """
+    with open(markdown_path, 'r') as f:
+        metadata = read_front_matter(f)
+        title = page_title(metadata, read_title_line(f) if f.tell() else f.readline())
+    date = metadata.get("date")
+    slug = metadata.get("slug")
+    return {"title": title,
+            "date": date if isinstance(date, str) and date else None,
+            "tags": normalize_tags(metadata.get("tags")),
+            "slug": slug if isinstance(slug, str) and slug else page_slug(relative_path),
+            "section": page_section(relative_path),
+            "url": page_url(relative_path)}
+
+
+class SiteIndex():
+    """Persistent metadata of every page, keyed by the markdown path relative to the content directory.
+
+    update() rescans only the files whose size or mtime changed since the last build, by
+    reading their header. Lookups by path, slug, tag and section are dictionary lookups
+    into tables rebuilt after every update; their lists are ordered newest first (by
+    date, then by path), so "recent posts" is a slice.
+    """
+
+    def __init__(self, path=None) -> None:
+        self.path = path
+        self.pages = {}
+        self.by_slug = {}
+        self.by_tag = {}
+        self.by_section = {}
+        self.by_date = []
+
+    @classmethod
+    def load(cls, path):
+        """Loads an index from disk, starting empty if it is missing, corrupt or from other generator code."""
+        index = cls(path)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return index
+        if data.get("version") != SITE_INDEX_VERSION or data.get("generator") != generator_version():
+            return index
+        index.pages = data.get("pages", {})
+        index.reindex()
+        return index
+
+    def save(self):
+        if self.path is None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with atomic_open(self.path) as f:
+            json.dump({"version": SITE_INDEX_VERSION, "generator": generator_version(), "pages": self.pages},
+                      f, indent=1, sort_keys=True)
+
+    def update(self, content_dir):
+        """Brings the index up to date with content_dir.
+
+        Returns a dict counting the pages scanned, reused and removed, plus a list of
+        (markdown_path, error) for pages whose header could not be read; those are left
+        out of the index (the page build reports the same error).
+        """
+        stats = {"scanned": 0, "reused": 0, "removed": 0, "errors": []}
+        pages = {}
+        for root, dirs, files in os.walk(content_dir):
+            for file in files:
+                if not file.endswith(".md"):
+                    continue
+                markdown_path = os.path.join(root, file)
+                key = os.path.relpath(markdown_path, content_dir)
+                stat = os.stat(markdown_path)
+                entry = self.pages.get(key)
+                if entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                    pages[key] = entry
+                    stats["reused"] += 1
+                    continue
+                try:
+                    entry = scan_metadata(markdown_path, key)
+                except (ValueError, UnicodeDecodeError) as e:
+                    stats["errors"].append((markdown_path, f"{type(e).__name__}: {e}"))
+                    continue
+                entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+                pages[key] = entry
+                stats["scanned"] += 1
+        stats["removed"] = len(set(self.pages) - set(pages))
+        self.pages = pages
+        self.reindex()
+        return stats
+
+    def reindex(self):
+        """Rebuilds the lookup tables from the page entries."""
+        # Newest first; undated pages last; ties in path order
+        keys = sorted(self.pages)
+        keys.sort(key=lambda key: self.pages[key]["date"] or "", reverse=True)
+        self.by_date = keys
+        self.by_slug = {}
+        self.by_tag = {}
+        self.by_section = {}
+        for key in keys:
+            entry = self.pages[key]
+            self.by_slug.setdefault(entry["slug"], key)
+            for tag in entry["tags"]:
+                self.by_tag.setdefault(tag, []).append(key)
+            self.by_section.setdefault(entry["section"], []).append(key)
+
+    def get(self, key):
+        return self.pages.get(key)
+
+    def page_for_slug(self, slug):
+        """Returns the key of the page with a slug (the newest one if several share it), or None."""
+        return self.by_slug.get(slug)
+
+    def tagged(self, tag):
+        return self.by_tag.get(tag, [])
+
+    def in_section(self, section):
+        return self.by_section.get(section, [])
+
+    def recent(self, limit=None):
+        return self.by_date[:limit]
+
+    def __len__(self):
+        return len(self.pages)
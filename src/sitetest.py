@@ -0,0 +1,46 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from helper_functions import generate_pages_recursive
+
+# The page template most tests build with
+TEMPLATE = "<title>{{ Title }}</title>{{ Content }}"
+
+
+class SiteTestCase(unittest.TestCase):
+    """Base for tests that need files on disk: a temporary directory, removed after each test.
+
+    content, static, public and template are the usual site paths inside it. Nothing is
+    created up front; write() makes the parent directories it needs.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.content = self.path("content")
+        self.static = self.path("static")
+        self.public = self.path("public")
+        self.template = self.path("template.html")
+
+    def path(self, *parts):
+        return os.path.join(self.tmp.name, *parts)
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def read(self, path, mode='r'):
+        with open(path, mode) as f:
+            return f.read()
+
+    def output(self, *parts):
+        """Returns the text of a generated file, given its path under public/."""
+        return self.read(os.path.join(self.public, *parts))
+
+    def generate(self, dest=None, **kwargs):
+        """Generates content/ into dest (public/ by default) without printing, returning the stats."""
+        with contextlib.redirect_stdout(io.StringIO()):
+            return generate_pages_recursive(self.content, self.template, dest or self.public, **kwargs)
@@ -0,0 +1,120 @@
+import os
+import shutil
+import time
+from buildlog import log
+
+# How many builds to keep around (the live one included) so a rollback is a symlink flip
+KEEP_BUILDS = 3
+
+
+def build_manifest_path(build_path):
+    """Each build's manifest lives next to it, so a rollback also rolls back the manifest."""
+    return f"{build_path}.manifest.json"
+
+
+def current_build(public_path):
+    """Returns the build directory the public symlink points at, or None."""
+    if os.path.islink(public_path):
+        return os.path.realpath(public_path)
+    return None
+
+
+def list_builds(builds_dir):
+    """Returns the build directories oldest first (their names sort chronologically)."""
+    if not os.path.isdir(builds_dir):
+        return []
+    builds_dir = os.path.realpath(builds_dir)
+    return [os.path.join(builds_dir, name) for name in sorted(os.listdir(builds_dir))
+            if os.path.isdir(os.path.join(builds_dir, name))]
+
+
+def new_build_path(builds_dir):
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    existing = {os.path.basename(path) for path in list_builds(builds_dir)}
+    counter = 0
+    while f"{stamp}-{counter:03d}" in existing:
+        counter += 1
+    return os.path.join(builds_dir, f"{stamp}-{counter:03d}")
+
+
+def clone_tree(src_dir, dest_dir):
+    """Recreates src_dir at dest_dir with every file hardlinked (copied if linking is impossible)."""
+    for root, dirs, files in os.walk(src_dir):
+        dest_root = os.path.join(dest_dir, os.path.relpath(root, src_dir))
+        os.makedirs(dest_root, exist_ok=True)
+        for file in files:
+            src_file = os.path.join(root, file)
+            dest_file = os.path.join(dest_root, file)
+            try:
+                os.link(src_file, dest_file)
+            except OSError:
+                shutil.copy2(src_file, dest_file)
+
+
+def migrate_public_directory(public_path, builds_dir):
+    """Moves a plain public/ directory from an in-place build into builds_dir and links it back."""
+    os.makedirs(builds_dir, exist_ok=True)
+    build_path = new_build_path(builds_dir)
+    os.rename(public_path, build_path)
+    os.symlink(os.path.relpath(build_path, os.path.dirname(os.path.abspath(public_path))), public_path)
+    log.info(f"Moved {public_path} to {build_path} and replaced it with a symlink")
+    return build_path
+
+
+def prepare_staging(public_path, builds_dir, clean=False):
+    """Creates a staging directory for the next build and returns (staging_path, live_build_path).
+
+    Unless clean is set, the staging directory starts as a hardlinked clone of the live
+    build, so unchanged pages and assets cost one link each instead of a copy. Everything
+    that writes into it replaces files by renaming, so the live build's inodes are never
+    modified.
+    """
+    if os.path.isdir(public_path) and not os.path.islink(public_path):
+        migrate_public_directory(public_path, builds_dir)
+
+    live_build = current_build(public_path)
+    staging_path = new_build_path(builds_dir)
+    os.makedirs(staging_path)
+    if live_build is not None and os.path.isdir(live_build) and not clean:
+        clone_tree(live_build, staging_path)
+    return staging_path, live_build
+
+
+def discard_build(build_path):
+    shutil.rmtree(build_path, ignore_errors=True)
+    manifest_path = build_manifest_path(build_path)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+
+def activate_build(build_path, public_path):
+    """Atomically points public_path at build_path by renaming a new symlink over the old one."""
+    target = os.path.relpath(os.path.abspath(build_path), os.path.dirname(os.path.abspath(public_path)))
+    tmp_link = f"{public_path}.tmp-link"
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(target, tmp_link)
+    os.replace(tmp_link, public_path)
+
+
+def prune_builds(builds_dir, public_path, keep=KEEP_BUILDS):
+    """Deletes all but the newest `keep` builds, never touching the live one."""
+    live_build = current_build(public_path)
+    builds = list_builds(builds_dir)
+    removed = []
+    for build_path in builds[:max(0, len(builds) - keep)]:
+        if build_path != live_build:
+            discard_build(build_path)
+            removed.append(build_path)
+    return removed
+
+
+def rollback(public_path, builds_dir):
+    """Points public_path at the build before the live one. Returns it, or None if there is none."""
+    live_build = current_build(public_path)
+    older = [path for path in list_builds(builds_dir)
+             if live_build is None or os.path.basename(path) < os.path.basename(live_build)]
+    if not older:
+        return None
+    activate_build(older[-1], public_path)
+    return older[-1]
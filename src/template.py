@@ -0,0 +1,96 @@
+import copy
+import os
+import re
+
+# Placeholders look like {{ Name }}; the spaces inside the braces are optional
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+# href="..." and src="..." attributes holding a site-absolute URL
+URL_ATTRIBUTE_PATTERN = re.compile(r'(\b(?:href|src)\s*=\s*")(/[^"]*)(")')
+
+# Compiled templates by path, along with the file stat they were compiled from
+_template_cache = {}
+
+
+class Template():
+    """A template parsed once into literal segments and named placeholder slots.
+
+    Rendering joins the literals with the values of the slots in a single pass, so a
+    value that happens to contain placeholder syntax (e.g. a page body mentioning
+    "{{ Title }}") is never substituted again.
+    """
+
+    def __init__(self, source, path=None, stamp=None) -> None:
+        self.path = path
+        self.stamp = stamp
+        self.literals = []
+        self.slots = []
+
+        # Literals and slots alternate: literal, slot, literal, ..., literal
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            self.literals.append(source[position:match.start()])
+            self.slots.append((match.group(1), match.group(0)))
+            position = match.end()
+        self.literals.append(source[position:])
+
+    @property
+    def placeholders(self):
+        """The set of placeholder names used in the template."""
+        return {name for name, _ in self.slots}
+
+    def render(self, values):
+        """Fills the template's slots from a dict, leaving unknown placeholders untouched."""
+        return "".join(self.iter_render(values))
+
+    def iter_render(self, values):
+        """Yields the rendered template in fragments.
+
+        A value may be a string or an iterable of string fragments (such as
+        HTMLNode.iter_html()), which is streamed through without being joined.
+        """
+        yield self.literals[0]
+        for (name, raw), literal in zip(self.slots, self.literals[1:]):
+            value = values.get(name)
+            if value is None:
+                yield raw
+            elif isinstance(value, str):
+                yield value
+            else:
+                yield from value
+            yield literal
+
+    def write(self, fp, values):
+        """Streams the rendered template to a file-like object."""
+        fp.writelines(self.iter_render(values))
+
+    def rewrite_urls(self, resolve):
+        """Returns a copy whose literal text has every site-absolute href/src URL replaced by resolve(url).
+
+        Only the literals are rewritten, so URLs inside placeholder values are left alone.
+        """
+        def replace(match):
+            return match.group(1) + resolve(match.group(2)) + match.group(3)
+        rewritten = copy.copy(self)
+        rewritten.literals = [URL_ATTRIBUTE_PATTERN.sub(replace, literal) for literal in self.literals]
+        return rewritten
+
+    def __repr__(self) -> str:
+        return f"Template(path={self.path!r}, placeholders={sorted(self.placeholders)!r})"
+
+
+def template_stamp(path):
+    """Returns the parts of a file's stat that change whenever it is edited."""
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def load_template(path):
+    """Returns the compiled template for a path, recompiling it only when the file has changed."""
+    stamp = template_stamp(path)
+    template = _template_cache.get(path)
+    if template is None or template.stamp != stamp:
+        with open(path, 'r') as f:
+            template = Template(f.read(), path=path, stamp=stamp)
+        _template_cache[path] = template
+    return template
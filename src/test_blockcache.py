@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+import unittest
+import blockcache
+from blockcache import BlockCache, block_key
+from helper_functions import markdown_to_html_node
+
+
+class TestBlockCache(unittest.TestCase):
+
+    markdown = ("# Title\n\nShared **disclaimer** with a [link](/terms).\n\n"
+                "* one\n* two\n\n```\ncode sample\n```\n\nShared **disclaimer** with a [link](/terms).")
+
+    def test_cached_render_matches_uncached(self):
+        """Test that rendering through the cache produces the same HTML, even on a second page."""
+        cache = BlockCache()
+        expected = markdown_to_html_node(self.markdown).to_html()
+        self.assertEqual(markdown_to_html_node(self.markdown, cache=cache).to_html(), expected)
+        self.assertEqual("".join(markdown_to_html_node(self.markdown, cache=cache).iter_html()), expected)
+
+    def test_repeated_blocks_hit(self):
+        """Test that a block repeated within and across pages is rendered once."""
+        cache = BlockCache()
+        markdown_to_html_node(self.markdown, cache=cache)
+        self.assertEqual((cache.misses, cache.hits, len(cache)), (4, 1, 4))
+        markdown_to_html_node(self.markdown, cache=cache)
+        self.assertEqual((cache.misses, cache.hits), (4, 6))
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entries go once the size limit is exceeded."""
+        cache = BlockCache(max_bytes=10)
+        cache.put("a", "aaaa")
+        cache.put("b", "bbbb")
+        cache.get("a")
+        cache.put("c", "cccc")
+        self.assertEqual(list(cache.entries), ["a", "c"])
+        self.assertEqual(cache.size, 8)
+
+    def test_save_and_load(self):
+        """Test that a saved cache is reused, but not by a different generator version."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache", "blocks.json")
+            cache = BlockCache(path=path)
+            markdown_to_html_node(self.markdown, cache=cache)
+            cache.save()
+            loaded = BlockCache.load(path)
+            self.assertEqual(loaded.entries, cache.entries)
+            self.assertEqual(loaded.take_added(), [])
+
+            with open(path) as f:
+                data = json.load(f)
+            data["generator"] = "old"
+            with open(path, 'w') as f:
+                json.dump(data, f)
+            self.assertEqual(len(BlockCache.load(path)), 0)
+
+    def test_worker_entries_are_handed_back(self):
+        """Test that only a persistent cache tracks new entries for the parent process."""
+        self.assertEqual(BlockCache().take_added(), [])
+        cache = BlockCache(path="unused.json")
+        cache.put(block_key("text"), "<p>text</p>")
+        added = cache.take_added()
+        self.assertEqual(added, [(block_key("text"), "<p>text</p>")])
+        parent = BlockCache(path="unused.json")
+        parent.merge(added)
+        self.assertEqual(parent.get(block_key("text")), "<p>text</p>")
+        self.assertEqual(parent.take_added(), [])
+
+    def test_shared_cache_can_be_disabled(self):
+        """Test that the shared cache can be replaced and turned off."""
+        previous = blockcache.shared_cache()
+        try:
+            blockcache.set_shared_cache(None)
+            self.assertIsNone(blockcache.shared_cache())
+        finally:
+            blockcache.set_shared_cache(previous)
+
+
+if __name__ == '__main__':
+    unittest.main()
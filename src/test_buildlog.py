@@ -0,0 +1,77 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from buildlog import BuildLog, JsonLinesSink, NORMAL, QUIET, VERBOSE
+
+
+class TestBuildLog(unittest.TestCase):
+
+    def test_verbose_formats_file_events(self):
+        """Test that verbose mode prints the same lines the old print calls did."""
+        output = io.StringIO()
+        log = BuildLog(VERBOSE, stream=output)
+        log.file("asset_copied", source="static/a.css", dest="public/a.css")
+        log.file("page_generated", dest="public/index.html")
+        log.flush()
+        self.assertEqual(output.getvalue(), "Copied file: static/a.css -> public/a.css\n"
+                                            "Page successfully generated at public/index.html\n")
+
+    def test_quiet_and_normal_skip_file_formatting(self):
+        """Test that per-file events are never formatted below verbose (missing fields would raise)."""
+        for verbosity in (QUIET, NORMAL):
+            output = io.StringIO()
+            log = BuildLog(verbosity, stream=output)
+            log.file("asset_copied")
+            log.flush()
+            self.assertEqual(output.getvalue(), "")
+
+    def test_levels(self):
+        """Test that summaries are hidden in quiet mode while errors always show."""
+        output = io.StringIO()
+        log = BuildLog(QUIET, stream=output)
+        log.info("Pages: 1 rebuilt")
+        log.error("1 page(s) failed to build.")
+        self.assertEqual(output.getvalue(), "1 page(s) failed to build.\n")
+
+    def test_file_events_are_buffered(self):
+        """Test that per-file lines reach the stream in one write when the log is flushed."""
+        output = io.StringIO()
+        log = BuildLog(VERBOSE, stream=output)
+        for i in range(3):
+            log.file("page_removed", dest=f"public/{i}.html")
+        self.assertEqual(output.getvalue(), "")
+        log.flush()
+        self.assertEqual(len(output.getvalue().splitlines()), 3)
+
+    def test_record_and_replay(self):
+        """Test that recorded events replay through the parent's own verbosity, in order."""
+        worker = BuildLog(QUIET)
+        with worker.record() as records:
+            worker.file("page_started", source="a.md", dest="a.html", template="t.html")
+            worker.error("Failed to generate b.md: ValueError: boom")
+        output = io.StringIO()
+        parent = BuildLog(VERBOSE, stream=output)
+        parent.replay(records)
+        parent.flush()
+        self.assertEqual(output.getvalue().splitlines(), ["Generating page from a.md to a.html using t.html",
+                                                          "Failed to generate b.md: ValueError: boom"])
+
+    def test_json_lines_sink(self):
+        """Test that every event, including quiet ones, is written as one JSON object per line."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "events.jsonl")
+            log = BuildLog(QUIET, stream=io.StringIO(), sink=JsonLinesSink(path))
+            log.file("asset_deleted", dest="public/old.css")
+            log.info("Assets: 0 copied")
+            log.close()
+            with open(path) as f:
+                events = [json.loads(line) for line in f]
+        self.assertEqual([event["event"] for event in events], ["asset_deleted", "info"])
+        self.assertEqual(events[0]["dest"], "public/old.css")
+        self.assertEqual(events[1]["message"], "Assets: 0 copied")
+
+
+if __name__ == '__main__':
+    unittest.main()
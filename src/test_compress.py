@@ -0,0 +1,71 @@
+import contextlib
+import gzip
+import io
+import os
+import unittest
+from compress import GzipTee, compress_file, is_compressible, sidecar_path
+from helper_functions import generate_page, sync_directory
+from manifest import BuildManifest
+from sitetest import TEMPLATE, SiteTestCase
+
+
+class TestCompress(SiteTestCase):
+
+    def test_is_compressible(self):
+        self.assertTrue(is_compressible("public/index.HTML"))
+        self.assertTrue(is_compressible("public/index.css"))
+        self.assertFalse(is_compressible("public/images/rivendell.png"))
+
+    def test_compress_file_is_reproducible(self):
+        """Test that compressing the same bytes twice gives identical sidecars."""
+        self.write(self.path("a.css"), "body { color: red }\n" * 100)
+        compress_file(self.path("a.css"), self.path("one.gz"))
+        compress_file(self.path("a.css"), self.path("two.gz"))
+        self.assertEqual(self.read(self.path("one.gz"), 'rb'), self.read(self.path("two.gz"), 'rb'))
+        self.assertEqual(gzip.decompress(self.read(self.path("one.gz"), 'rb')), self.read(self.path("a.css"), 'rb'))
+
+    def test_gzip_tee(self):
+        """Test that the tee writes the text and a gzip of the same bytes."""
+        text, compressed = io.StringIO(), io.BytesIO()
+        tee = GzipTee(text, compressed)
+        tee.writelines(["<p>", "café", "</p>"])
+        tee.finish()
+        self.assertEqual(gzip.decompress(compressed.getvalue()).decode(), text.getvalue())
+
+    def test_generate_page_writes_sidecar(self):
+        """Test that a page's sidecar decompresses to the page, and is removed without gzip."""
+        self.write(self.path("page.md"), "# Title\n\nSome **text**.")
+        self.write(self.template, TEMPLATE)
+        dest = os.path.join(self.public, "page.html")
+        generate_page(self.path("page.md"), self.template, dest, gzip=True)
+        self.assertEqual(gzip.decompress(self.read(sidecar_path(dest), 'rb')), self.read(dest, 'rb'))
+        generate_page(self.path("page.md"), self.template, dest)
+        self.assertFalse(os.path.exists(sidecar_path(dest)))
+
+    def test_sync_directory_compresses_changed_assets_only(self):
+        """Test that unchanged assets keep their sidecar and a missing or stale one is handled."""
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "logo.png"), "png")
+        manifest = BuildManifest()
+
+        def sync(gzip=True):
+            with contextlib.redirect_stdout(io.StringIO()):
+                return sync_directory(self.static, self.public, manifest=manifest, gzip=gzip)
+
+        self.assertEqual(sync()["compressed"], 1)
+        self.assertFalse(os.path.exists(sidecar_path(os.path.join(self.public, "logo.png"))))
+        sidecar = sidecar_path(os.path.join(self.public, "index.css"))
+        inode = os.stat(sidecar).st_ino
+        self.assertEqual(sync()["compressed"], 0)
+        self.assertEqual(os.stat(sidecar).st_ino, inode)
+
+        os.remove(sidecar)
+        self.assertEqual(sync()["compressed"], 1)
+        self.assertTrue(os.path.exists(sidecar))
+
+        sync(gzip=False)
+        self.assertFalse(os.path.exists(sidecar))
+
+
+if __name__ == '__main__':
+    unittest.main()
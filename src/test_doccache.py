@@ -0,0 +1,98 @@
+import json
+import os
+import unittest
+import doccache
+from doccache import DocumentCache
+from helper_functions import generate_page
+from sitetest import SiteTestCase
+
+
+class TestDocumentCache(SiteTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache = DocumentCache(self.path("documents"))
+
+    def test_put_and_get(self):
+        """Test that an entry is found again, by a new cache object too."""
+        key = self.cache.key("# Title\n\nText")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, "Title", "<div><p>Text</p></div>")
+        reopened = DocumentCache(self.cache.directory)
+        self.assertEqual(reopened.get(key), ("Title", "<div><p>Text</p></div>"))
+        self.assertEqual((self.cache.misses, reopened.hits), (1, 1))
+
+    def test_failed_put_leaves_no_file(self):
+        """Test that an entry that can't be written leaves neither an entry nor a temporary file."""
+        key = self.cache.key("# Title")
+        with self.assertRaises(TypeError):
+            self.cache.put(key, "Title", "<div></div>", {"/a.css": object()})
+        self.assertEqual(os.listdir(os.path.dirname(self.cache.entry_path(key))), [])
+        self.assertIsNone(self.cache.get(key))
+
+    def test_key_depends_on_markdown(self):
+        self.assertNotEqual(self.cache.key("# A"), self.cache.key("# B"))
+
+    def test_unreadable_entries_are_misses(self):
+        """Test that corrupt or outdated entry files are ignored and removed."""
+        for contents in ("{not json", json.dumps({"version": -1, "key": "x", "title": "t", "html": "h"})):
+            key = self.cache.key(contents)
+            self.cache.put(key, "t", "h")
+            with open(self.cache.entry_path(key), 'w') as f:
+                f.write(contents)
+            self.assertIsNone(self.cache.get(key))
+            self.assertFalse(os.path.exists(self.cache.entry_path(key)))
+
+    def test_evict_least_recently_used(self):
+        """Test that eviction keeps the most recently used entries within the size limit."""
+        keys = [self.cache.key(str(i)) for i in range(3)]
+        for age, key in enumerate(keys):
+            self.cache.put(key, "t", "x" * 100)
+            os.utime(self.cache.entry_path(key), ns=(age * 10**9, age * 10**9))
+        size = os.path.getsize(self.cache.entry_path(keys[0]))
+        self.cache.max_bytes = size * 2
+        self.cache.get(keys[0])
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+
+class TestGeneratePageWithDocumentCache(SiteTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.source = self.path("page.md")
+        self.write(self.source, "# Cached\n\nSome **bold** text.\n\n* one\n* two")
+        self.cache = DocumentCache(self.path("documents"))
+        doccache.set_shared_document_cache(self.cache)
+
+    def tearDown(self):
+        doccache.set_shared_document_cache(None)
+
+    def render(self, template, name):
+        self.write(self.template, template)
+        stat = os.stat(self.template)
+        os.utime(self.template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        dest = self.path(name)
+        generate_page(self.source, self.template, dest)
+        return self.read(dest)
+
+    def test_template_change_reuses_document(self):
+        """Test that a new template is filled from the cache with the same content."""
+        first = self.render("<h1>{{ Title }}</h1>{{ Content }}", "first.html")
+        second = self.render("<title>{{ Title }}</title><main>{{ Content }}</main>", "second.html")
+        self.assertEqual((self.cache.misses, self.cache.hits), (1, 1))
+        content = "<div><h1>Cached</h1><p>Some <b>bold</b> text.</p><ul><li>one</li><li>two</li></ul></div>"
+        self.assertEqual(first, f"<h1>Cached</h1>{content}")
+        self.assertEqual(second, f"<title>Cached</title><main>{content}</main>")
+
+    def test_entry_is_collected_while_the_page_streams(self):
+        """Test that the entry holds exactly the content HTML written to the first page."""
+        self.render("{{ Content }}", "page.html")
+        key = self.cache.key(self.read(self.source))
+        self.assertEqual(self.cache.get(key), ("Cached", self.read(self.path("page.html"))))
+
+
+if __name__ == '__main__':
+    unittest.main()
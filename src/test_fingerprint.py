@@ -0,0 +1,153 @@
+import json
+import multiprocessing
+import os
+import unittest
+import doccache
+import fingerprint
+from blockcache import BlockCache
+from doccache import DocumentCache
+from fingerprint import AssetMap, ASSET_MANIFEST_NAME, fingerprint_assets, recording_references, set_shared_asset_map
+from helper_functions import markdown_to_html_node, sync_directory
+from manifest import BuildManifest, hash_file
+from scheduler import PageScheduler
+from sitetest import SiteTestCase
+from template import Template
+
+
+class TestAssetMap(unittest.TestCase):
+
+    def setUp(self):
+        self.asset_map = AssetMap({"/index.css": "/index.0123.css", "/images/a.png": "/images/a.4567.png"})
+
+    def test_resolve(self):
+        """Test that asset URLs are mapped, keeping query strings and fragments."""
+        self.assertEqual(self.asset_map.resolve("/index.css"), "/index.0123.css")
+        self.assertEqual(self.asset_map.resolve("/images/a.png?v=1#top"), "/images/a.4567.png?v=1#top")
+
+    def test_other_urls_are_kept(self):
+        for url in ["/about", "images/a.png", "https://example.com/index.css", "//cdn.example.com/index.css", ""]:
+            self.assertEqual(self.asset_map.resolve(url), url)
+
+    def test_references(self):
+        """Test that site-absolute URLs are recorded, with None for the ones that aren't assets."""
+        references = {}
+        self.asset_map.resolve("/index.css", references)
+        self.asset_map.resolve("/about", references)
+        self.asset_map.resolve("https://example.com", references)
+        self.assertEqual(references, {"/index.css": "/index.0123.css", "/about": None})
+        self.assertTrue(self.asset_map.is_current(references))
+        self.assertFalse(AssetMap({"/index.css": "/index.89ab.css"}).is_current(references))
+        self.assertFalse(AssetMap({"/about": "/about.cdef"}).is_current({"/about": None}))
+
+    def test_rewrite_template(self):
+        """Test that the template's literal URLs are rewritten once, and placeholder values never."""
+        template = Template('<link href="/index.css"><a href="/about">{{ Content }}</a>', path="t.html")
+        rewritten = self.asset_map.rewrite_template(template)
+        self.assertIs(self.asset_map.rewrite_template(template), rewritten)
+        self.assertEqual(rewritten.render({"Content": '<img src="/images/a.png">'}),
+                         '<link href="/index.0123.css"><a href="/about"><img src="/images/a.png"></a>')
+        self.assertEqual(self.asset_map.template_references(template), {"/index.css": "/index.0123.css", "/about": None})
+
+
+class TestFingerprintAssets(SiteTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+        self.write(self.template, '<link href="/index.css">{{ Content }}')
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n![A](/images/a.png)")
+        self.write(os.path.join(self.content, "about.md"), "# About\n\n[Home](/)")
+        self.manifest = BuildManifest()
+
+    def tearDown(self):
+        set_shared_asset_map(None)
+
+    def build(self):
+        sync_directory(self.static, self.public, manifest=self.manifest)
+        set_shared_asset_map(fingerprint_assets(self.static, self.public, self.manifest))
+        return self.generate(manifest=self.manifest)
+
+    def test_assets_get_hashed_twins_and_a_manifest(self):
+        self.build()
+        css_name = f"index.{hash_file(os.path.join(self.static, 'index.css'))[:12]}.css"
+        self.assertEqual(self.output(css_name), "body {}")
+        self.assertEqual(self.output("index.css"), "body {}")
+        urls = json.loads(self.output(ASSET_MANIFEST_NAME))
+        self.assertEqual(urls["/index.css"], f"/{css_name}")
+        self.assertIn(f'href="/{css_name}"', self.output("index.html"))
+        self.assertIn(f'src="{urls["/images/a.png"]}"', self.output("index.html"))
+
+    def test_spawned_workers_get_the_asset_map(self):
+        """Test that pages rendered in spawned workers, which inherit nothing, are fingerprinted too."""
+        sync_directory(self.static, self.public, manifest=self.manifest)
+        set_shared_asset_map(fingerprint_assets(self.static, self.public, self.manifest))
+        scheduler = PageScheduler(2, context=multiprocessing.get_context("spawn"))
+        stats = self.generate(manifest=self.manifest, scheduler=scheduler)
+        self.assertEqual(stats["rebuilt"], 2)
+        urls = json.loads(self.output(ASSET_MANIFEST_NAME))
+        self.assertIn(f'href="{urls["/index.css"]}"', self.output("about.html"))
+        self.assertIn(f'src="{urls["/images/a.png"]}"', self.output("index.html"))
+
+    def test_pages_built_before_fingerprinting_are_rebuilt(self):
+        """Test that turning fingerprinting on rewrites image URLs, with and without the document cache."""
+        self.write(self.template, "{{ Content }}")
+        for document_cache in (None, DocumentCache(self.path("documents"))):
+            with self.subTest(document_cache=document_cache):
+                doccache.set_shared_document_cache(document_cache)
+                self.addCleanup(doccache.set_shared_document_cache, None)
+                self.manifest = BuildManifest()
+                public = self.public = self.path("public", "with" if document_cache else "without")
+                sync_directory(self.static, public, manifest=self.manifest)
+                self.generate(manifest=self.manifest)
+                self.assertIn('src="/images/a.png"', self.output("index.html"))
+                stats = self.build()
+                self.assertEqual(stats["rebuilt"], 1)
+                urls = json.loads(self.output(ASSET_MANIFEST_NAME))
+                self.assertIn(f'src="{urls["/images/a.png"]}"', self.output("index.html"))
+                set_shared_asset_map(None)
+
+    def test_unchanged_assets_are_not_hashed_again(self):
+        self.build()
+        calls = []
+        original = fingerprint.hash_file
+        fingerprint.hash_file = lambda path: calls.append(path) or original(path)
+        try:
+            sync_directory(self.static, self.public, manifest=self.manifest)
+            fingerprint_assets(self.static, self.public, self.manifest)
+        finally:
+            fingerprint.hash_file = original
+        self.assertEqual(calls, [])
+
+    def test_changed_asset_rebuilds_only_pages_using_it(self):
+        """Test that a new image fingerprint rebuilds the page showing it and deletes the old twin."""
+        self.build()
+        old_twin = self.manifest.assets[os.path.join("images", "a.png")]["fingerprint"]
+        self.write(os.path.join(self.static, "images", "a.png"), "new png")
+        stats = self.build()
+        self.assertEqual((stats["rebuilt"], stats["skipped"]), (1, 1))
+        new_twin = self.manifest.assets[os.path.join("images", "a.png")]["fingerprint"]
+        self.assertIn(f'src="/{new_twin}"', self.output("index.html"))
+        self.assertFalse(os.path.exists(os.path.join(self.public, old_twin)))
+
+    def test_changed_template_asset_rebuilds_every_page(self):
+        self.build()
+        self.write(os.path.join(self.static, "index.css"), "body { color: red }")
+        stats = self.build()
+        self.assertEqual(stats["rebuilt"], 2)
+
+    def test_cached_blocks_are_rendered_again_for_new_fingerprints(self):
+        cache = BlockCache()
+        markdown = "![A](/images/a.png)"
+        set_shared_asset_map(AssetMap({"/images/a.png": "/images/a.1111.png"}))
+        with recording_references() as references:
+            markdown_to_html_node(markdown, cache=cache).to_html()
+        self.assertEqual(references, {"/images/a.png": "/images/a.1111.png"})
+        set_shared_asset_map(AssetMap({"/images/a.png": "/images/a.2222.png"}))
+        self.assertIn("/images/a.2222.png", markdown_to_html_node(markdown, cache=cache).to_html())
+        set_shared_asset_map(None)
+        self.assertIn('src="/images/a.png"', markdown_to_html_node(markdown, cache=cache).to_html())
+
+
+if __name__ == '__main__':
+    unittest.main()
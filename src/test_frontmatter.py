@@ -0,0 +1,39 @@
+import io
+import unittest
+from frontmatter import parse_front_matter, read_front_matter, read_title_line, split_front_matter
+
+
+class TestFrontMatter(unittest.TestCase):
+
+    def test_split(self):
+        markdown = "---\ntitle: Hello: World\ndate: 2024-05-01\ntags: [a, \"b c\"]\n---\n\n# Heading\n\nText"
+        metadata, body = split_front_matter(markdown)
+        self.assertEqual(metadata, {"title": "Hello: World", "date": "2024-05-01", "tags": ["a", "b c"]})
+        self.assertEqual(body, "# Heading\n\nText")
+
+    def test_no_front_matter(self):
+        markdown = "# Heading\n\n---\nnot: front matter"
+        self.assertEqual(split_front_matter(markdown), ({}, markdown))
+
+    def test_block_lists_and_comments(self):
+        lines = ["# a comment", "Tags:", "  - one", "  - 'two'", "", "slug: post"]
+        self.assertEqual(parse_front_matter(lines), {"tags": ["one", "two"], "slug": "post"})
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            split_front_matter("---\ntitle: x\n# Heading")
+        with self.assertRaises(ValueError):
+            parse_front_matter(["just some text"])
+
+    def test_read_front_matter_stops_at_the_body(self):
+        """Test that only the header is consumed from a file, with or without front matter."""
+        f = io.StringIO("---\ntitle: T\n---\n\n# Heading\n\nBody")
+        self.assertEqual(read_front_matter(f), {"title": "T"})
+        self.assertEqual(read_title_line(f), "# Heading\n")
+        f = io.StringIO("# Heading\n\nBody")
+        self.assertEqual(read_front_matter(f), {})
+        self.assertEqual(f.read(), "# Heading\n\nBody")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,16 @@
 import unittest
+import contextlib
+import io
+import tempfile
+import random
+import re
+import time
+import buildlog
+from buildlog import log
 from helper_functions import *
+from blockcache import BlockCache, set_shared_cache
+from manifest import BuildManifest
+from sitetest import TEMPLATE, SiteTestCase
 from textnode import TextNode
 from leafnode import LeafNode  
 
@@ -136,9 +147,65 @@ class TestSplitNodesDelimiter(unittest.TestCase):
         ]
         
         self.assertEqual([repr(n) for n in new_nodes], [repr(n) for n in expected_nodes])
-        
+
+
+class TestPathologicalInput(unittest.TestCase):
+    """Inputs up to 2 MB that made the old lazy regexes quadratic must scale linearly.
+
+    Each case is timed at sizes doubling from 4 KB to 2 MB (best of two runs); linear work
+    takes about twice as long at each step, quadratic four times, so anything over three
+    times fails, on the first small step for a quadratic function rather than after
+    hours at 1 MB. Runs shorter than 50 ms are too noisy for a ratio and count as 50 ms.
+    """
+    SIZES = [4096 * 2 ** step for step in range(10)]
+    CASES = ["[", "[a](", "[a] ", "[a](b ", "](", "2024-01-01 [INFO] (worker) [\n"]
+
+    def best_time(self, function, text):
+        timings = []
+        for _ in range(2):
+            start = time.perf_counter()
+            function(text)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def assertLinear(self, function, pattern):
+        previous = None
+        for size in self.SIZES:
+            elapsed = self.best_time(function, (pattern * (size // len(pattern) + 1))[:size])
+            if previous is not None:
+                self.assertLess(elapsed, 3 * max(previous, 0.05),
+                                f"{function.__name__} on {pattern!r}: {previous:.3f}s for {size // 2} bytes, "
+                                f"{elapsed:.3f}s for {size}")
+            previous = elapsed
+
+    def test_inline_functions_scale_linearly(self):
+        functions = [extract_markdown_links, extract_markdown_images, text_to_textnodes,
+                     lambda text: split_nodes_link(split_nodes_image([TextNode(text, "text")]))]
+        for pattern in self.CASES:
+            for function in functions:
+                self.assertLinear(function, pattern)
+
+    def test_unmatched_images_scale_linearly(self):
+        for function in (extract_markdown_images, lambda text: split_nodes_image([TextNode(text, "text")])):
+            self.assertLinear(function, "![")
+            self.assertLinear(function, "![a](")
+
+    def test_whole_page_scales_linearly(self):
+        for pattern in ("[", "[a](b "):
+            self.assertLinear(lambda text: markdown_to_html_node(text).to_html(), pattern)
+
+
 class TestMarkdownExtractors(unittest.TestCase):
 
+    def test_extractors_match_the_regexes_they_replace(self):
+        """Test the linear extractors against the lazy regexes on randomly generated markup."""
+        rng = random.Random(4321)
+        alphabet = ["a", " ", "[", "]", "(", ")", "![", "](", "\n", "!"]
+        for _ in range(3000):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 24)))
+            self.assertEqual(extract_markdown_links(text), re.findall(r"(?<!!)\[(.*?)\]\((.*?)\)", text), repr(text))
+            self.assertEqual(extract_markdown_images(text), re.findall(r"!\[(.*?)\]\((.*?)\)", text), repr(text))
+
     def test_extract_single_image(self):
         """Test extraction of a single image from Markdown."""
         text = "This is an image: ![Alt text](https://example.com/image.png)"
@@ -440,6 +507,43 @@ class TestTextToTextNodes(unittest.TestCase):
         
         self.assertEqual([repr(n) for n in nodes], [repr(n) for n in expected_nodes])
         
+class TestSinglePassTokenizer(unittest.TestCase):
+
+    def assertMatchesMultipass(self, text):
+        self.assertEqual(text_to_textnodes(text), text_to_textnodes_multipass(text), repr(text))
+
+    def test_matches_multipass_pipeline(self):
+        """Test that the scanner agrees with the original pipeline on hand-picked edge cases."""
+        texts = [
+            "",
+            "Just plain text.",
+            "This is **bold**, *italic*, `code`, a [link](https://example.com), and an ![image](https://example.com/image.png).",
+            "Disney *didn't ruin it",
+            "Diverse Cultures and Languages**: Each race",
+            "*a **b** c*",
+            "***",
+            "****",
+            "`a *b* [c](d)` end",
+            "![a] [b](c) and ![x](y)[z](w)",
+            "[a ![i](u) b](c)",
+            "!![i](u)",
+            "[broken\nlabel](x) and [url](broken\nurl)",
+            "Wow![not closed](no paren",
+            "[a](b ](c)",
+            "[](empty) and ![]()",
+        ]
+        for text in texts:
+            self.assertMatchesMultipass(text)
+
+    def test_matches_multipass_on_random_markup(self):
+        """Test the scanner against the original pipeline on randomly generated markup."""
+        rng = random.Random(1234)
+        alphabet = ["a", " ", "b", "*", "**", "`", "[", "]", "(", ")", "![", "](", "\n", "!", "x.png"]
+        for _ in range(3000):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 24)))
+            self.assertMatchesMultipass(text)
+
+        
 class TestMarkdownToBlocks(unittest.TestCase):
     
     def test_single_block(self):
@@ -512,6 +616,59 @@ class TestMarkdownToBlocks(unittest.TestCase):
         expected = ['# Heading 1', 'Paragraph 1.', '## Heading 2', '```\nCode block\n```']
         self.assertEqual(blocks, expected)
         
+class TestIterMarkdownBlocks(unittest.TestCase):
+
+    def lines(self, markdown):
+        return io.StringIO(markdown).readlines()
+
+    def test_matches_markdown_to_blocks(self):
+        """Test that reading line by line gives exactly the blocks of markdown_to_blocks."""
+        markdown = "# Title\n\n\n\nParagraph\nsame block\n \n  still same\n\n\n* a\n* b\n\n   \n"
+        self.assertEqual(list(iter_markdown_blocks(self.lines(markdown))), markdown_to_blocks(markdown))
+
+    def test_random_documents(self):
+        """Fuzz the streaming parser and renderer against the whole-document versions."""
+        rng = random.Random(14)
+        alphabet = ["\n", "\n", "\n", " ", "\t", "a", "# ", "* ", "1. ", "> ", "**"]
+        for _ in range(2000):
+            markdown = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+            blocks = list(iter_markdown_blocks(self.lines(markdown)))
+            self.assertEqual(blocks, markdown_to_blocks(markdown), repr(markdown))
+            self.assertEqual("".join(iter_markdown_html(blocks)), markdown_to_html_node(markdown).to_html())
+
+    def test_blocks_are_yielded_lazily(self):
+        """Test that a block is yielded before the following lines are read."""
+        def lines():
+            yield "First block\n"
+            yield "\n"
+            raise AssertionError("read past the first block")
+        self.assertEqual(next(iter_markdown_blocks(lines())), "First block")
+
+    def test_streamed_page_matches_generate_page(self):
+        """Test that a page above the streaming threshold is written exactly like a small one."""
+        import helper_functions
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "page.md")
+            template = os.path.join(tmp, "template.html")
+            with open(source, 'w') as f:
+                f.write("# Big page\n\nSome **bold** text.\n\n\n* one\n* two\n\n```\ncode\n```\n")
+            with open(template, 'w') as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+            generate_page(source, template, os.path.join(tmp, "whole.html"))
+            threshold = helper_functions.STREAMING_THRESHOLD
+            helper_functions.STREAMING_THRESHOLD = 0
+            previous_cache = shared_cache()
+            set_shared_cache(BlockCache())
+            try:
+                generate_page(source, template, os.path.join(tmp, "out", "streamed.html"))
+                # Streamed blocks are not kept in the shared block cache
+                self.assertEqual(len(shared_cache()), 0)
+            finally:
+                helper_functions.STREAMING_THRESHOLD = threshold
+                set_shared_cache(previous_cache)
+            with open(os.path.join(tmp, "whole.html")) as whole, open(os.path.join(tmp, "out", "streamed.html")) as streamed:
+                self.assertEqual(whole.read(), streamed.read())
+
 class TestBlockToBlockType(unittest.TestCase):
     
     def test_heading_1(self):
@@ -574,6 +731,43 @@ class TestBlockToBlockType(unittest.TestCase):
         block = ""
         self.assertEqual(block_to_block_type(block), "paragraph")
         
+class TestClassifyBlock(unittest.TestCase):
+
+    def test_returns_split_lines(self):
+        """Test that line-based types come back with their lines, headings and code without."""
+        self.assertEqual(classify_block("* a\n* b"), ("unordered-list", ["* a", "* b"]))
+        self.assertEqual(classify_block("1. a\n2. b"), ("ordered-list", ["1. a", "2. b"]))
+        self.assertEqual(classify_block("> a\n> b"), ("quote", ["> a", "> b"]))
+        self.assertEqual(classify_block("### Title"), ("heading-3", None))
+        self.assertEqual(classify_block("```\ncode\n```"), ("code", None))
+
+    def test_quirks_are_kept(self):
+        """Test the edge cases where the original checks gave surprising answers."""
+        self.assertEqual(classify_block("no dots here")[0], "ordered-list")
+        self.assertEqual(classify_block("####### seven")[0], "ordered-list")
+        self.assertEqual(classify_block("#tag.")[0], "paragraph")
+        self.assertEqual(classify_block("1. one\nplain\n2. two")[0], "ordered-list")
+        self.assertEqual(classify_block("2. two\n1. one")[0], "paragraph")
+        self.assertEqual(classify_block("")[0], "paragraph")
+
+    def test_superscript_numbers_are_paragraphs(self):
+        """Test that digits int() can't parse make a paragraph instead of failing the page."""
+        self.assertEqual(classify_block("². squared")[0], "paragraph")
+        self.assertEqual(markdown_to_html_node("Footnote\n². see below").to_html(),
+                         "<div><p>Footnote\n². see below</p></div>")
+
+    def test_random_blocks_match_cascading_checks(self):
+        """Fuzz classify_block against the original cascading block_to_block_type."""
+        rng = random.Random(15)
+        pieces = ["#", "# ", "###### ", "####### ", "```", "> ", ">", "* ", "- ", "*", "1. ", "2. ",
+                  "1.", "10. ", "a", "b.", " ", "\n", "\n", "\x0c", "\u0663. ", "."]
+        for _ in range(5000):
+            block = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 8)))
+            block_type, lines = classify_block(block)
+            self.assertEqual(block_type, block_to_block_type_cascading(block), repr(block))
+            if lines is not None:
+                self.assertEqual(lines, block.splitlines())
+
 class TestMarkdownToHtmlNode(unittest.TestCase):
     
     def test_heading(self):
@@ -809,5 +1003,103 @@ class TestExtractTitle(unittest.TestCase):
         markdown = "# Title with @#$%^&*() special characters\n\nThis is the rest of the document."
         self.assertEqual(extract_title(markdown), "Title with @#$%^&*() special characters")
 
+class TestGeneratePagesRecursive(SiteTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.write(self.template, TEMPLATE)
+        for i in range(6):
+            self.write(os.path.join(self.content, f"section{i % 2}", f"page{i}.md"),
+                       f"# Page {i}\n\nSome **bold** text and a [link](/page{i}).")
+
+    def build(self, dest, jobs):
+        output = io.StringIO()
+        verbosity = log.verbosity
+        log.configure(verbosity=buildlog.VERBOSE)
+        try:
+            with contextlib.redirect_stdout(output):
+                stats = generate_pages_recursive(self.content, self.template, dest, jobs=jobs)
+        finally:
+            log.configure(verbosity=verbosity)
+        return stats, output.getvalue()
+
+    def read_tree(self, root):
+        tree = {}
+        for dir_path, _, files in os.walk(root):
+            for file in files:
+                path = os.path.join(dir_path, file)
+                with open(path, 'rb') as f:
+                    tree[os.path.relpath(path, root)] = f.read()
+        return tree
+
+    def test_parallel_output_matches_serial(self):
+        """Test that a multi-process build writes byte-identical pages and the same log."""
+        serial_stats, serial_log = self.build(self.path("serial"), jobs=1)
+        parallel_stats, parallel_log = self.build(self.path("parallel"), jobs=3)
+        self.assertEqual(serial_stats, parallel_stats)
+        self.assertEqual(serial_log.replace("serial", "parallel"), parallel_log)
+        self.assertEqual(self.read_tree(self.path("serial")), self.read_tree(self.path("parallel")))
+
+    def test_errors_are_collected_per_page(self):
+        """Test that a failing page is reported without stopping the other pages."""
+        bad_page = os.path.join(self.content, "section0", "bad.md")
+        self.write(bad_page, "No title here.")
+        for jobs in (1, 3):
+            stats, _ = self.build(self.path(f"out{jobs}"), jobs=jobs)
+            self.assertEqual(stats["rebuilt"], 6)
+            self.assertEqual(stats["errors"], [(bad_page, "ValueError: Document must have a header.")])
+
+    def test_title_and_text_are_escaped(self):
+        self.write(os.path.join(self.content, "section0", "page0.md"), "# Fish & <Chips>\n\nUse `a < b` here.")
+        self.build(self.public, jobs=1)
+        html = self.output("section0", "page0.html")
+        self.assertIn("<title>Fish &amp; &lt;Chips&gt;</title>", html)
+        self.assertIn("<code>a &lt; b</code>", html)
+
+class TestSyncDirectory(SiteTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+        self.write(os.path.join(self.public, "index.html"), "<p>generated</p>")
+        self.manifest = BuildManifest()
+
+    def sync(self, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return sync_directory(self.static, self.public, manifest=self.manifest, **kwargs)
+
+    def test_only_changed_files_are_copied(self):
+        """Test that a second sync copies nothing and an edit copies one file."""
+        self.assertEqual(self.sync(), {"copied": 2, "unchanged": 0, "deleted": 0})
+        self.assertEqual(self.sync(), {"copied": 0, "unchanged": 2, "deleted": 0})
+        self.write(os.path.join(self.static, "index.css"), "body { color: red }")
+        self.assertEqual(self.sync(jobs=4), {"copied": 1, "unchanged": 1, "deleted": 0})
+        with open(os.path.join(self.public, "index.css")) as f:
+            self.assertEqual(f.read(), "body { color: red }")
+
+    def test_hash_comparison_skips_touched_files(self):
+        """Test that an mtime-only change is not copied when comparing hashes."""
+        self.sync()
+        path = os.path.join(self.static, "index.css")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(self.sync(compare_hash=True)["copied"], 0)
+        self.assertEqual(self.sync()["copied"], 1)
+
+    def test_only_orphaned_assets_are_deleted(self):
+        """Test that deleting a static file removes its output but never generated pages."""
+        self.sync()
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        self.assertEqual(self.sync()["deleted"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+
+    def test_hardlinks(self):
+        """Test that link=True shares the inode with the source file."""
+        self.sync(link=True)
+        self.assertTrue(os.path.samefile(os.path.join(self.static, "index.css"),
+                                         os.path.join(self.public, "index.css")))
+
 if __name__ == '__main__':
     unittest.main()
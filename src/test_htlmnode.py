@@ -1,5 +1,7 @@
+import io
 import unittest
-from htmlnode import HTMLNode
+from htmlnode import HTMLNode, escape_attribute, escape_text
+from leafnode import LeafNode
 
 class TestHTMLNode(unittest.TestCase):
 
@@ -29,5 +31,60 @@ class TestHTMLNode(unittest.TestCase):
         )
         self.assertEqual(repr(node), expected_output)
 
+    def test_iter_html_matches_to_html(self):
+        """Test that the streamed fragments join to exactly the to_html output."""
+        node = HTMLNode("div", children=[
+            HTMLNode("p", children=[LeafNode(None, "Hello "), LeafNode("b", "world")]),
+            HTMLNode("ul", children=[HTMLNode("li", children=[LeafNode(None, "item")])], props={"class": "list"}),
+            HTMLNode("img", props={"src": "/a.png", "alt": "A"}),
+        ])
+        self.assertEqual("".join(node.iter_html()), node.to_html())
+
+    def test_iter_html_falls_back_to_value(self):
+        """Test that nodes without (or with empty) children stream their value like to_html."""
+        for node in (HTMLNode("p", value="text"), HTMLNode("div", children=[]),
+                     HTMLNode("p", value="fallback", children=[LeafNode(None, "")])):
+            self.assertEqual("".join(node.iter_html()), node.to_html())
+
+    def test_write_html(self):
+        """Test writing a node tree to a file-like object."""
+        node = HTMLNode("p", children=[LeafNode("i", "streamed")])
+        buffer = io.StringIO()
+        node.write_html(buffer)
+        self.assertEqual(buffer.getvalue(), "<p><i>streamed</i></p>")
+
+    def test_iter_html_requires_tag(self):
+        """Test that streaming a node without a tag raises like to_html."""
+        with self.assertRaises(ValueError):
+            list(HTMLNode(value="x").iter_html())
+
+    def test_props_are_escaped(self):
+        node = HTMLNode(props={"href": '/search?q=a&b="c"', "title": "<x>"})
+        self.assertEqual(node.props_to_html(), ' href="/search?q=a&amp;b=&quot;c&quot;" title="&lt;x&gt;"')
+
+    def test_value_is_escaped(self):
+        """Test that a childless node escapes its value, and a missing value still reads "None"."""
+        self.assertEqual(HTMLNode("p", value="a < b").to_html(), "<p>a &lt; b</p>")
+        self.assertEqual("".join(HTMLNode("p", value="a < b").iter_html()), "<p>a &lt; b</p>")
+        self.assertEqual(HTMLNode("div", children=[]).to_html(), "<div>None</div>")
+
+
+class TestEscaping(unittest.TestCase):
+
+    def test_clean_strings_are_returned_as_is(self):
+        text = "Nothing to escape here, not even 'quotes'"
+        self.assertIs(escape_text(text), text)
+        self.assertIs(escape_attribute(text), text)
+
+    def test_escape_text(self):
+        self.assertEqual(escape_text('<a href="x">&amp;</a>'), '&lt;a href="x"&gt;&amp;amp;&lt;/a&gt;')
+
+    def test_escape_attribute(self):
+        self.assertEqual(escape_attribute('say "hi" & <bye>'), "say &quot;hi&quot; &amp; &lt;bye&gt;")
+
+    def test_non_strings(self):
+        self.assertEqual(escape_text(None), "None")
+        self.assertEqual(escape_attribute(3), "3")
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,99 @@
+import os
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from helper_functions import generate_page
+from lazysite import LazySite, create_lazy_server, markdown_for_url
+from siteindex import page_url
+from sitetest import TEMPLATE, SiteTestCase
+
+
+class TestMarkdownForUrl(unittest.TestCase):
+
+    def test_inverse_of_page_url(self):
+        for markdown in ["index.md", "about.md", os.path.join("blog", "index.md"),
+                         os.path.join("blog", "post.md")]:
+            self.assertEqual(markdown_for_url(page_url(markdown)), markdown)
+
+    def test_other_urls(self):
+        self.assertIsNone(markdown_for_url("/style.css"))
+        self.assertIsNone(markdown_for_url("/../secret.html"))
+        self.assertIsNone(markdown_for_url("/blog/./post.html"))
+
+
+class TestLazySite(SiteTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.write(self.template, TEMPLATE)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome *home*.")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog")
+        self.write(os.path.join(self.static, "style.css"), "body { color: red; }")
+        self.site = LazySite(self.content, self.static, self.template)
+
+    def body(self, path):
+        resource, _ = self.site.lookup(path)
+        return resource.body
+
+    def test_page_is_rendered_once(self):
+        self.assertEqual(self.body("/"), b"<title>Home</title><div><h1>Home</h1><p>Welcome <i>home</i>.</p></div>")
+        self.body("/")
+        self.assertEqual((self.site.renders, self.site.hits), (1, 1))
+
+    def test_matches_a_built_page(self):
+        dest = self.path("index.html")
+        generate_page(os.path.join(self.content, "index.md"), self.template, dest)
+        self.assertEqual(self.body("/"), self.read(dest, 'rb'))
+
+    def test_touched_source_is_not_rendered_again(self):
+        self.body("/")
+        path = os.path.join(self.content, "index.md")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.body("/")
+        self.assertEqual(self.site.renders, 1)
+
+    def test_changed_source_or_template_is_rendered_again(self):
+        self.body("/")
+        self.write(os.path.join(self.content, "index.md"), "# Changed")
+        self.assertIn(b"<h1>Changed</h1>", self.body("/"))
+        self.write(self.template, "<h2>{{ Title }}</h2>{{ Content }}")
+        self.assertTrue(self.body("/").startswith(b"<h2>Changed</h2>"))
+        self.assertEqual(self.site.renders, 3)
+
+    def test_least_recently_used_is_evicted(self):
+        for i in range(3):
+            self.write(os.path.join(self.content, f"page{i}.md"), f"# Page {i}\n\n" + "text " * 200)
+        self.site.max_bytes = 2500
+        for path in ["/page0.html", "/page1.html", "/page0.html", "/page2.html"]:
+            self.body(path)
+        self.assertEqual(list(self.site.entries), ["/page0.html", "/page2.html"])
+        self.assertEqual(self.site.evictions, 1)
+        self.assertLessEqual(self.site.size, self.site.max_bytes)
+
+    def test_static_files_and_redirects(self):
+        resource, _ = self.site.lookup("/style.css")
+        self.assertEqual(resource.body, b"body { color: red; }")
+        self.assertEqual(resource.content_type, "text/css; charset=utf-8")
+        self.assertEqual(self.site.lookup("/blog"), (None, "/blog/"))
+        self.assertEqual(self.site.lookup("/missing.html"), (None, None))
+        self.assertEqual(self.site.lookup("/../template.html"), (None, None))
+
+    def test_server_reports_render_errors(self):
+        self.write(os.path.join(self.content, "untitled.md"), "No heading here.")
+        server = create_lazy_server(self.content, self.static, self.template, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            with urllib.request.urlopen(server.url + "blog/") as response:
+                self.assertEqual(response.read(), b"<title>Blog</title><div><h1>Blog</h1></div>")
+            with self.assertRaises(urllib.error.HTTPError) as error:
+                urllib.request.urlopen(server.url + "untitled.html")
+            self.assertEqual(error.exception.code, 500)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 from leafnode import LeafNode
+from rawnode import RawNode
 
 class TestLeafNode(unittest.TestCase):
     
@@ -27,6 +28,14 @@ class TestLeafNode(unittest.TestCase):
         expected_props = ' href="https://www.google.com" target="_blank"'
         self.assertEqual(leaf.props_to_html(), expected_props)
 
+    def test_value_is_escaped(self):
+        """Test that text is escaped, with or without a tag."""
+        self.assertEqual(LeafNode("code", "if a < b && c > d").to_html(), "<code>if a &lt; b &amp;&amp; c &gt; d</code>")
+        self.assertEqual(LeafNode(None, "<script>").to_html(), "&lt;script&gt;")
+
+    def test_raw_node_is_not_escaped(self):
+        self.assertEqual(RawNode("<p>a &amp; b</p>").to_html(), "<p>a &amp; b</p>")
+
     def test_repr(self):
         """Test the __repr__ method for LeafNode."""
         leaf = LeafNode("span", "Leaf node", {"class": "leaf-class"})
@@ -38,6 +47,10 @@ class TestLeafNode(unittest.TestCase):
             ")"
         )
         self.assertEqual(repr(leaf), expected_repr)
+    def test_no_instance_dict(self):
+        """Test that LeafNode stays slotted like HTMLNode."""
+        leaf = LeafNode("span", "Leaf node")
+        self.assertFalse(hasattr(leaf, "__dict__"))
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,127 @@
+import contextlib
+import io
+import os
+import unittest
+from listings import generate_listings, plan_listings, remove_listings, slugify
+from manifest import BuildManifest
+from siteindex import SiteIndex
+from sitetest import TEMPLATE, SiteTestCase
+from watcher import SiteWatcher
+
+
+class ListingTestCase(SiteTestCase):
+
+    def setUp(self):
+        super().setUp()
+        os.makedirs(self.static)
+        self.write(self.template, TEMPLATE)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome.")
+        for day in range(1, 6):
+            self.post(day, "tolkien" if day % 2 else "Tolkien, news")
+        self.index = SiteIndex()
+        self.index.update(self.content)
+
+    def post(self, day, tags, title=None, body="Text."):
+        self.write(os.path.join(self.content, "blog", f"post{day}.md"),
+                   f"---\ndate: 2024-01-0{day}\ntags: {tags}\n---\n# {title or f'Post {day}'}\n\n{body}")
+
+
+class TestPlanListings(ListingTestCase):
+
+    def test_sections_are_paginated_newest_first(self):
+        listings = [listing for listing in plan_listings(self.index, page_size=2) if listing.output.startswith("blog")]
+        self.assertEqual([listing.output for listing in listings],
+                         [os.path.join("blog", "index.html"), os.path.join("blog", "page", "2", "index.html"),
+                          os.path.join("blog", "page", "3", "index.html")])
+        self.assertEqual([title for _, title, _ in listings[0].items], ["Post 5", "Post 4"])
+        self.assertEqual(listings[0].title, "blog (page 1 of 3)")
+        self.assertEqual((listings[0].previous, listings[0].next), (None, "/blog/page/2/"))
+        self.assertEqual((listings[2].previous, listings[2].next), ("/blog/page/2/", None))
+
+    def test_a_section_index_page_wins_over_the_listing(self):
+        self.write(os.path.join(self.content, "blog", "index.md"), "# The blog")
+        self.index.update(self.content)
+        listings = [listing for listing in plan_listings(self.index, page_size=10) if listing.output.startswith("blog")]
+        self.assertEqual([listing.output for listing in listings], [os.path.join("blog", "page", "1", "index.html")])
+        self.assertEqual(len(listings[0].items), 5)
+
+    def test_tags_that_slugify_alike_share_an_archive(self):
+        self.assertEqual(slugify("Middle Earth!"), "middle-earth")
+        archives = {listing.output: listing for listing in plan_listings(self.index)
+                    if listing.output.startswith("tags")}
+        self.assertEqual(sorted(archives), [os.path.join("tags", "news", "index.html"),
+                                            os.path.join("tags", "tolkien", "index.html")])
+        tolkien = archives[os.path.join("tags", "tolkien", "index.html")]
+        self.assertEqual(tolkien.title, "Tagged Tolkien")
+        self.assertEqual([url for url, _, _ in tolkien.items], [f"/blog/post{day}.html" for day in range(5, 0, -1)])
+
+
+class TestGenerateListings(ListingTestCase):
+
+    def build(self):
+        self.index.update(self.content)
+        self.generate(manifest=self.manifest)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return generate_listings(self.index, self.template, self.public, manifest=self.manifest, page_size=2)
+
+    def setUp(self):
+        super().setUp()
+        self.manifest = BuildManifest()
+
+    def test_rendered_listing(self):
+        self.build()
+        self.assertEqual(self.output("tags", "news", "index.html"),
+                         '<title>Tagged news</title><div><h1>Tagged news</h1><ul>'
+                         '<li><a href="/blog/post4.html">Post 4</a> <time datetime="2024-01-04">2024-01-04</time></li>'
+                         '<li><a href="/blog/post2.html">Post 2</a> <time datetime="2024-01-02">2024-01-02</time></li>'
+                         '</ul></div>')
+        self.assertIn('<nav><a href="/blog/" rel="prev">Newer</a><a href="/blog/page/3/" rel="next">Older</a></nav>',
+                      self.output("blog", "page", "2", "index.html"))
+
+    def test_only_listings_whose_members_or_titles_changed_are_rebuilt(self):
+        self.assertEqual(self.build()["rebuilt"], 7)
+        self.assertEqual(self.build(), {"rebuilt": 0, "skipped": 7, "removed": 0})
+
+        # A body edit changes no listing
+        self.post(1, "tolkien", body="Edited text.")
+        self.assertEqual(self.build()["rebuilt"], 0)
+
+        # Post 1 is on the last page of the blog and the tolkien archive
+        self.post(1, "tolkien", title="Post <one>")
+        self.assertEqual(self.build()["rebuilt"], 2)
+        self.assertIn("<a href=\"/blog/post1.html\">Post &lt;one&gt;</a>",
+                      self.output("blog", "page", "3", "index.html"))
+
+    def test_emptied_listings_are_removed(self):
+        self.build()
+        for day in (2, 4):
+            self.post(day, "tolkien")
+        stats = self.build()
+        self.assertEqual(stats["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "tags", "news")))
+
+    def test_removing_listings_spares_pages_that_took_their_place(self):
+        self.build()
+        self.write(os.path.join(self.content, "blog", "index.md"), "# The blog")
+        self.build()
+        self.assertEqual(self.output("blog", "index.html"),
+                         "<title>The blog</title><div><h1>The blog</h1></div>")
+        self.assertIn("blog (page 1 of 3)", self.output("blog", "page", "1", "index.html"))
+        remove_listings(self.public, self.manifest)
+        self.assertEqual(self.manifest.listings, {})
+        self.assertTrue(os.path.exists(os.path.join(self.public, "blog", "index.html")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "tags")))
+
+    def test_watcher_refreshes_listings(self):
+        self.build()
+        site = SiteWatcher(self.content, self.static, self.template, self.public, self.manifest,
+                           site_index=self.index, listings=2)
+        self.post(6, "news")
+        with contextlib.redirect_stdout(io.StringIO()):
+            site.apply_changes({os.path.join(self.content, "blog", "post6.md")})
+        self.assertIn("Post 6", self.output("tags", "news", "index.html"))
+        self.assertIn("Post 6", self.output("blog", "index.html"))
+
+
+if __name__ == '__main__':
+    unittest.main()
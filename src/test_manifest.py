@@ -0,0 +1,89 @@
+import os
+import unittest
+from manifest import BuildManifest, hash_file
+from sitetest import TEMPLATE, SiteTestCase
+
+
+class TestIncrementalBuild(SiteTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.manifest_path = self.path(".cache", "manifest.json")
+        self.write(self.template, TEMPLATE)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome.")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nHello.")
+
+    def build(self):
+        """Runs one build with a manifest loaded from (and saved to) disk."""
+        manifest = BuildManifest.load(self.manifest_path)
+        stats = self.generate(manifest=manifest)
+        manifest.save()
+        self.assertEqual(stats.pop("errors"), [])
+        return stats
+
+    def test_first_build_generates_everything(self):
+        """Test that a missing manifest rebuilds every page."""
+        self.assertEqual(self.build(), {"rebuilt": 2, "skipped": 0, "removed": 0})
+        self.assertTrue(os.path.exists(os.path.join(self.public, "blog", "post.html")))
+
+    def test_unchanged_pages_are_skipped(self):
+        """Test that a second build without changes skips every page."""
+        self.build()
+        self.assertEqual(self.build(), {"rebuilt": 0, "skipped": 2, "removed": 0})
+
+    def test_changed_source_is_rebuilt(self):
+        """Test that only the edited page is rebuilt."""
+        self.build()
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nHello again.")
+        self.assertEqual(self.build(), {"rebuilt": 1, "skipped": 1, "removed": 0})
+        self.assertIn("Hello again.", self.output("blog", "post.html"))
+
+    def test_template_change_rebuilds_all(self):
+        """Test that editing the template invalidates every page."""
+        self.build()
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(self.build(), {"rebuilt": 2, "skipped": 0, "removed": 0})
+
+    def test_deleted_source_is_pruned(self):
+        """Test that outputs of deleted markdown files are removed along with empty directories."""
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        self.assertEqual(self.build(), {"rebuilt": 0, "skipped": 1, "removed": 1})
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog")))
+
+    def test_missing_output_is_rebuilt(self):
+        """Test that a page is regenerated if its output was deleted by hand."""
+        self.build()
+        os.remove(os.path.join(self.public, "index.html"))
+        self.assertEqual(self.build(), {"rebuilt": 1, "skipped": 1, "removed": 0})
+
+    def test_failed_page_is_retried(self):
+        """Test that a page that failed to build is attempted again on the next run."""
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "No title here.")
+        for _ in range(2):
+            manifest = BuildManifest.load(self.manifest_path)
+            stats = self.generate(manifest=manifest)
+            manifest.save()
+            self.assertEqual([path for path, _ in stats["errors"]], [os.path.join(self.content, "index.md")])
+            self.assertEqual(stats["skipped"], 1)
+        self.assertIsNone(BuildManifest.load(self.manifest_path).pages["index.md"]["source"])
+
+    def test_corrupt_manifest_starts_empty(self):
+        """Test that an unreadable manifest is treated as a fresh build."""
+        self.write(self.manifest_path, "{not json")
+        self.assertEqual(BuildManifest.load(self.manifest_path).pages, {})
+
+    def test_touched_but_unchanged_source_is_skipped(self):
+        """Test that a new mtime with identical content does not trigger a rebuild."""
+        self.build()
+        path = os.path.join(self.content, "index.md")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(self.build(), {"rebuilt": 0, "skipped": 2, "removed": 0})
+        entry = BuildManifest.load(self.manifest_path).pages["index.md"]
+        self.assertEqual(entry["source"], hash_file(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
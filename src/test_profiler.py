@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import unittest
+import profiler
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.was_enabled = profiler.is_enabled()
+        self.env = os.environ.get(profiler.PROFILE_ENV)
+        profiler.reset()
+
+    def tearDown(self):
+        profiler._enabled = self.was_enabled
+        if self.env is None:
+            os.environ.pop(profiler.PROFILE_ENV, None)
+        else:
+            os.environ[profiler.PROFILE_ENV] = self.env
+        profiler.reset()
+
+    def test_disabled_records_nothing(self):
+        """Test that spans are free no-ops while profiling is off."""
+        profiler._enabled = False
+        with profiler.span("read", "page"):
+            pass
+        self.assertEqual(profiler.take_spans(), [])
+
+    def test_chrome_trace_events(self):
+        """Test that recorded spans export as complete ("X") trace events with their args."""
+        profiler.enable()
+        with profiler.span("page", "page", path="content/index.md"):
+            with profiler.span("read", "page"):
+                pass
+        trace = profiler.chrome_trace(profiler.take_spans())
+        names = [event["name"] for event in trace["traceEvents"]]
+        self.assertEqual(names, ["read", "page"])
+        page = trace["traceEvents"][1]
+        self.assertEqual(page["ph"], "X")
+        self.assertEqual(page["args"], {"path": "content/index.md"})
+        self.assertGreaterEqual(page["dur"], trace["traceEvents"][0]["dur"])
+        self.assertEqual(profiler.take_spans(), [])
+
+    def test_summary_orders_slowest_first(self):
+        """Test that the summary ranks stages by total time and pages by duration."""
+        spans = [("read", "page", 0, 100, 1, 1, {}),
+                 ("markdown_to_html_node", "page", 100, 900, 1, 1, {}),
+                 ("page", "page", 0, 1000, 1, 1, {"path": "fast.md"}),
+                 ("page", "page", 0, 5000, 1, 1, {"path": "slow.md"})]
+        lines = profiler.summary(spans).splitlines()
+        self.assertTrue(lines[1].startswith("page/markdown_to_html_node"))
+        self.assertTrue(lines[2].startswith("page/read"))
+        self.assertLess(lines.index(next(l for l in lines if l.startswith("slow.md"))),
+                        lines.index(next(l for l in lines if l.startswith("fast.md"))))
+
+    def test_write_chrome_trace(self):
+        """Test that the trace file is valid JSON in the trace-event format."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace", "build.json")
+            profiler.write_chrome_trace(path, [("copy", "static", 5, 7, 1, 2, {"path": "a.css"})])
+            with open(path) as f:
+                trace = json.load(f)
+        self.assertEqual(trace["traceEvents"][0]["cat"], "static")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import heapq
+import os
+import time
+import unittest
+from scheduler import BATCH_BYTES, PageScheduler, resource
+from sitetest import TEMPLATE, SiteTestCase
+
+
+def started_at(job):
+    return time.monotonic_ns()
+
+
+class TestPageScheduler(unittest.TestCase):
+
+    def test_largest_job_is_taken_first_with_small_ones_batched(self):
+        scheduler = PageScheduler(jobs=2, max_in_flight=8)
+        sizes = [10, BATCH_BYTES, 30, 20]
+        pending = []
+        for sequence, size in enumerate(sizes):
+            heapq.heappush(pending, (-size, sequence, size, f"job{sequence}"))
+        self.assertEqual(scheduler.take_batch(pending), ([(1, "job1")], BATCH_BYTES))
+        self.assertEqual(scheduler.take_batch(pending), ([(2, "job2"), (3, "job3")], 50))
+        self.assertEqual(scheduler.take_batch(pending), ([(0, "job0")], 10))
+
+    def test_results_come_in_discovery_order_after_running_largest_first(self):
+        scheduler = PageScheduler(jobs=1, max_in_flight=1)
+        sizes = [5, 50, 1, 20]
+        results = list(scheduler.run(started_at, ((size, 0, size) for size in sizes)))
+        self.assertEqual([job for job, _ in results], sizes)
+        start = dict(results)
+        self.assertEqual(sorted(sizes, key=start.get), [50, 20, 5, 1])
+
+    def test_memory_budget_limits_what_is_in_flight(self):
+        scheduler = PageScheduler(jobs=2, memory_budget=100)
+        jobs = [(size, memory, size) for size, memory in [(1, 60), (2, 60), (3, 500), (4, 30)]]
+        self.assertEqual([job for job, _ in scheduler.run(started_at, jobs)], [1, 2, 3, 4])
+        self.assertEqual(scheduler.peak_in_flight_memory, 500)
+        self.assertLessEqual(scheduler.peak_in_flight_pages, 2)
+        self.assertEqual(scheduler.in_flight_pages, 0)
+
+    @unittest.skipIf(resource is None, "peak RSS is not available on this platform")
+    def test_peak_rss_is_reported_per_process(self):
+        scheduler = PageScheduler(jobs=2)
+        list(scheduler.run(started_at, [(1, 0, "a"), (2, 0, "b")]))
+        self.assertIn("main", scheduler.peak_rss)
+        self.assertTrue(any(name.startswith("worker ") for name in scheduler.peak_rss))
+        self.assertTrue(all(peak > 1024 * 1024 for peak in scheduler.peak_rss.values()))
+
+
+class TestScheduledBuild(SiteTestCase):
+
+    def test_budgeted_build_matches_a_serial_one(self):
+        self.write(self.template, TEMPLATE)
+        for i in range(5):
+            self.write(os.path.join(self.content, f"page{i}.md"), f"# Page {i}\n\n" + "Some *text*. " * 100 * i)
+        outputs = {}
+        for name, scheduler in [("serial", PageScheduler(1)), ("budgeted", PageScheduler(2, memory_budget=1))]:
+            dest = self.path(name)
+            stats = self.generate(dest=dest, scheduler=scheduler)
+            self.assertEqual(stats["rebuilt"], 5)
+            outputs[name] = {file: self.read(os.path.join(dest, file)) for file in os.listdir(dest)}
+        self.assertEqual(outputs["serial"], outputs["budgeted"])
+
+
+if __name__ == '__main__':
+    unittest.main()
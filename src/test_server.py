@@ -0,0 +1,120 @@
+import gzip
+import http.client
+import os
+import threading
+import unittest
+from fingerprint import ASSET_MANIFEST_NAME
+from server import SiteSnapshot, accepts_gzip, create_preview_server, etag_matches
+from sitetest import SiteTestCase
+
+
+class TestNegotiation(unittest.TestCase):
+
+    def test_accepts_gzip(self):
+        self.assertTrue(accepts_gzip("gzip, deflate, br"))
+        self.assertTrue(accepts_gzip("br;q=1.0, gzip;q=0.8"))
+        self.assertTrue(accepts_gzip("*"))
+        self.assertFalse(accepts_gzip(""))
+        self.assertFalse(accepts_gzip("identity"))
+        self.assertFalse(accepts_gzip("gzip;q=0"))
+        self.assertFalse(accepts_gzip("*, gzip;q=0"))
+
+    def test_etag_matches(self):
+        self.assertTrue(etag_matches('"abc"', '"abc"'))
+        self.assertTrue(etag_matches('"x", W/"abc"', '"abc"'))
+        self.assertTrue(etag_matches("*", '"abc"'))
+        self.assertFalse(etag_matches('"abc-gzip"', '"abc"'))
+        self.assertFalse(etag_matches(None, '"abc"'))
+
+
+class TestPreviewServer(SiteTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.write(os.path.join(self.public, "index.html"), "<h1>Home</h1>" * 50)
+        self.write(os.path.join(self.public, "blog", "index.html"), "<h1>Blog</h1>")
+        self.write(os.path.join(self.public, "index.css"), "body {}")
+        self.write(os.path.join(self.public, "index.0123456789ab.css"), "body {}")
+        self.write(os.path.join(self.public, ASSET_MANIFEST_NAME), '{"/index.css": "/index.0123456789ab.css"}')
+        self.server = create_preview_server(self.public, port=0)
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.connection = http.client.HTTPConnection(*self.server.server_address[:2], timeout=5)
+
+    def tearDown(self):
+        self.connection.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get(self, path, method="GET", **headers):
+        self.connection.request(method, path, headers=headers)
+        response = self.connection.getresponse()
+        return response, response.read()
+
+    def test_serves_pages_with_validators_over_one_connection(self):
+        """Test that several requests are answered on the same keep-alive connection."""
+        response, body = self.get("/")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, b"<h1>Home</h1>" * 50)
+        self.assertEqual(response.getheader("Content-Type"), "text/html; charset=utf-8")
+        self.assertEqual(response.getheader("Cache-Control"), "no-cache")
+        self.assertTrue(response.getheader("ETag").startswith('"'))
+        socket = self.connection.sock
+        response, body = self.get("/blog/")
+        self.assertEqual(body, b"<h1>Blog</h1>")
+        self.assertIs(self.connection.sock, socket)
+
+    def test_if_none_match(self):
+        response, _ = self.get("/index.css")
+        etag = response.getheader("ETag")
+        response, body = self.get("/index.css", **{"If-None-Match": etag})
+        self.assertEqual((response.status, body), (304, b""))
+        self.assertEqual(response.getheader("ETag"), etag)
+        response, _ = self.get("/index.css", **{"If-None-Match": '"stale"'})
+        self.assertEqual(response.status, 200)
+
+    def test_gzip_negotiation(self):
+        response, body = self.get("/", **{"Accept-Encoding": "gzip"})
+        self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(response.getheader("Vary"), "Accept-Encoding")
+        self.assertEqual(gzip.decompress(body), b"<h1>Home</h1>" * 50)
+        plain, _ = self.get("/")
+        self.assertIsNone(plain.getheader("Content-Encoding"))
+        self.assertNotEqual(plain.getheader("ETag"), response.getheader("ETag"))
+
+    def test_fingerprinted_assets_are_immutable(self):
+        response, _ = self.get("/index.0123456789ab.css")
+        self.assertIn("immutable", response.getheader("Cache-Control"))
+
+    def test_directory_redirect_head_and_not_found(self):
+        response, _ = self.get("/blog")
+        self.assertEqual((response.status, response.getheader("Location")), (301, "/blog/"))
+        response, body = self.get("/", method="HEAD")
+        self.assertEqual((response.status, body), (200, b""))
+        self.assertEqual(response.getheader("Content-Length"), str(len("<h1>Home</h1>" * 50)))
+        response, _ = self.get("/missing.html")
+        self.assertEqual(response.status, 404)
+
+    def test_refresh_reloads_changed_files_only(self):
+        self.write(os.path.join(self.public, "blog", "index.html"), "<h1>New blog</h1>")
+        self.write(os.path.join(self.public, "new.html"), "new")
+        os.remove(os.path.join(self.public, "index.css"))
+        self.assertEqual(self.server.snapshot.refresh(), 2)
+        self.assertEqual(self.get("/blog/")[1], b"<h1>New blog</h1>")
+        self.assertEqual(self.get("/new.html")[1], b"new")
+        self.assertEqual(self.get("/index.css")[0].status, 404)
+
+
+class TestSiteSnapshot(SiteTestCase):
+
+    def test_sidecars_are_used_and_not_served(self):
+        self.write(os.path.join(self.public, "a.html"), "page")
+        with open(os.path.join(self.public, "a.html.gz"), 'wb') as f:
+            f.write(gzip.compress(b"page"))
+        snapshot = SiteSnapshot(self.public)
+        snapshot.refresh()
+        self.assertEqual(list(snapshot.resources), ["/a.html"])
+        self.assertEqual(gzip.decompress(snapshot.resources["/a.html"].gzip_body), b"page")
+
+
+if __name__ == '__main__':
+    unittest.main()
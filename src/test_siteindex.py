@@ -0,0 +1,80 @@
+import os
+import unittest
+from helper_functions import generate_page
+from siteindex import SiteIndex, page_slug, page_url, scan_metadata
+from sitetest import TEMPLATE, SiteTestCase
+
+
+class TestPagePaths(unittest.TestCase):
+
+    def test_page_url(self):
+        self.assertEqual(page_url("index.md"), "/")
+        self.assertEqual(page_url(os.path.join("majesty", "index.md")), "/majesty/")
+        self.assertEqual(page_url(os.path.join("blog", "post.md")), "/blog/post.html")
+
+    def test_page_slug(self):
+        self.assertEqual(page_slug(os.path.join("majesty", "index.md")), "majesty")
+        self.assertEqual(page_slug(os.path.join("blog", "post.md")), "post")
+
+
+class TestSiteIndex(SiteTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.index_path = self.path(".cache", "site-index.json")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome.")
+        self.write(os.path.join(self.content, "blog", "old.md"),
+                   "---\ndate: 2023-01-01\ntags: news, tolkien\n---\n# Old post\n\nText.")
+        self.write(os.path.join(self.content, "blog", "new.md"),
+                   "---\ntitle: New post\ndate: 2024-06-01\ntags: [tolkien]\nslug: fresh\n---\n\nBody.")
+
+    def test_scan_metadata(self):
+        metadata = scan_metadata(os.path.join(self.content, "blog", "old.md"), os.path.join("blog", "old.md"))
+        self.assertEqual(metadata, {"title": "Old post", "date": "2023-01-01", "tags": ["news", "tolkien"],
+                                    "slug": "old", "section": "blog", "url": "/blog/old.html"})
+
+    def test_scan_reads_only_the_header(self):
+        """Test that undecodable bytes far into the body don't get in the way of the scan."""
+        path = os.path.join(self.content, "big.md")
+        with open(path, 'wb') as f:
+            f.write(b"# Big\n\n" + b"text " * 64 * 1024 + b"\xff" * 1024)
+        self.assertEqual(scan_metadata(path, "big.md")["title"], "Big")
+
+    def test_lookups(self):
+        index = SiteIndex(self.index_path)
+        index.update(self.content)
+        new, old = os.path.join("blog", "new.md"), os.path.join("blog", "old.md")
+        self.assertEqual(index.recent(), [new, old, "index.md"])
+        self.assertEqual(index.tagged("tolkien"), [new, old])
+        self.assertEqual(index.tagged("news"), [old])
+        self.assertEqual(index.in_section("blog"), [new, old])
+        self.assertEqual(index.page_for_slug("fresh"), new)
+        self.assertEqual(index.get(new)["title"], "New post")
+
+    def test_only_changed_files_are_rescanned(self):
+        index = SiteIndex(self.index_path)
+        self.assertEqual(index.update(self.content)["scanned"], 3)
+        index.save()
+        index = SiteIndex.load(self.index_path)
+        self.write(os.path.join(self.content, "blog", "old.md"), "---\ntags: [changed]\n---\n# Old post, edited\n")
+        os.remove(os.path.join(self.content, "index.md"))
+        stats = index.update(self.content)
+        self.assertEqual((stats["scanned"], stats["reused"], stats["removed"]), (1, 1, 1))
+        self.assertEqual(index.tagged("changed"), [os.path.join("blog", "old.md")])
+        self.assertEqual(index.tagged("news"), [])
+
+    def test_pages_without_a_title_are_reported(self):
+        self.write(os.path.join(self.content, "broken.md"), "No heading.")
+        stats = SiteIndex().update(self.content)
+        self.assertEqual(stats["errors"], [(os.path.join(self.content, "broken.md"),
+                                            "ValueError: Document must have a header.")])
+
+    def test_front_matter_is_not_rendered(self):
+        self.write(self.template, TEMPLATE)
+        dest = self.path("new.html")
+        generate_page(os.path.join(self.content, "blog", "new.md"), self.template, dest)
+        self.assertEqual(self.read(dest), "<title>New post</title><div><p>Body.</p></div>")
+
+
+if __name__ == '__main__':
+    unittest.main()
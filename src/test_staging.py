@@ -0,0 +1,76 @@
+import os
+import unittest
+from atomicfile import atomic_open
+from sitetest import SiteTestCase
+from staging import activate_build, current_build, list_builds, prepare_staging, prune_builds, rollback
+
+
+class TestStagedBuilds(SiteTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.builds = self.path(".builds")
+
+    def write(self, path, text):
+        # Like the build itself: a staged file shares its inode with the live one until it is replaced
+        with atomic_open(path) as f:
+            f.write(text)
+
+    def publish(self, text):
+        """Stages a build whose index.html holds text and swaps it in."""
+        staging, live = prepare_staging(self.public, self.builds)
+        self.write(os.path.join(staging, "index.html"), text)
+        activate_build(staging, self.public)
+        return staging
+
+    def test_public_is_swapped_only_on_activation(self):
+        """Test that readers see the old build until the staged one is activated."""
+        self.publish("v1")
+        staging, live = prepare_staging(self.public, self.builds)
+        self.write(os.path.join(staging, "index.html"), "v2")
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "v1")
+        activate_build(staging, self.public)
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "v2")
+
+    def test_staging_reuses_unchanged_files_via_hardlinks(self):
+        """Test that the staging clone shares inodes with the live build without modifying it."""
+        first = self.publish("v1")
+        staging, live = prepare_staging(self.public, self.builds)
+        self.assertEqual(live, os.path.realpath(first))
+        self.assertTrue(os.path.samefile(os.path.join(first, "index.html"), os.path.join(staging, "index.html")))
+        self.write(os.path.join(staging, "index.html"), "v2")
+        self.assertEqual(self.read(os.path.join(first, "index.html")), "v1")
+
+    def test_clean_staging_starts_empty(self):
+        """Test that a clean build does not clone the live build."""
+        self.publish("v1")
+        staging, live = prepare_staging(self.public, self.builds, clean=True)
+        self.assertEqual(os.listdir(staging), [])
+
+    def test_plain_public_directory_is_migrated(self):
+        """Test that an in-place public/ directory becomes the first build."""
+        os.makedirs(self.public)
+        self.write(os.path.join(self.public, "index.html"), "old")
+        staging, live = prepare_staging(self.public, self.builds)
+        self.assertTrue(os.path.islink(self.public))
+        self.assertEqual(self.read(os.path.join(staging, "index.html")), "old")
+
+    def test_rollback_flips_to_previous_build(self):
+        """Test that rollback points public at the build before the live one."""
+        first = self.publish("v1")
+        self.publish("v2")
+        self.assertEqual(rollback(self.public, self.builds), os.path.realpath(first))
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "v1")
+        self.assertIsNone(rollback(self.public, self.builds))
+
+    def test_prune_keeps_newest_builds_and_live_build(self):
+        """Test that pruning removes old builds but never the live one."""
+        for version in range(5):
+            self.publish(f"v{version}")
+        prune_builds(self.builds, self.public, keep=2)
+        self.assertEqual(len(list_builds(self.builds)), 2)
+        self.assertIn(current_build(self.public), list_builds(self.builds))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import io
+import os
+import unittest
+from sitetest import SiteTestCase
+from template import Template, load_template
+
+
+class TestTemplate(unittest.TestCase):
+
+    def test_render_title_and_content(self):
+        """Test that both default placeholders are filled in."""
+        template = Template("<title> {{ Title }} </title><article>{{ Content }}</article>")
+        html = template.render({"Title": "Home", "Content": "<p>Hi</p>"})
+        self.assertEqual(html, "<title> Home </title><article><p>Hi</p></article>")
+
+    def test_placeholders(self):
+        """Test that every named slot is discovered, with or without inner spaces."""
+        template = Template("{{ Title }} {{Author}} {{ Content }} {{ Title }}")
+        self.assertEqual(template.placeholders, {"Title", "Author", "Content"})
+
+    def test_values_are_not_substituted_again(self):
+        """Test that a value containing placeholder syntax is inserted literally."""
+        template = Template("<h1>{{ Title }}</h1>{{ Content }}")
+        html = template.render({"Title": "Docs", "Content": "Write {{ Title }} in your template"})
+        self.assertEqual(html, "<h1>Docs</h1>Write {{ Title }} in your template")
+
+    def test_unknown_placeholders_are_kept(self):
+        """Test that placeholders without a value are left as they were."""
+        template = Template("{{ Title }} by {{ Author }}")
+        self.assertEqual(template.render({"Title": "Post"}), "Post by {{ Author }}")
+
+    def test_write_streams_fragment_values(self):
+        """Test that iterable values are streamed into the output between the literals."""
+        template = Template("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        buffer = io.StringIO()
+        template.write(buffer, {"Title": "Home", "Content": iter(["<p>", "Hi", "</p>"])})
+        self.assertEqual(buffer.getvalue(), "<title>Home</title><main><p>Hi</p></main>")
+
+    def test_no_placeholders(self):
+        """Test a template without any slots."""
+        template = Template("<p>static</p>")
+        self.assertEqual(template.render({"Title": "x"}), "<p>static</p>")
+
+
+class TestLoadTemplate(SiteTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.write(self.template, "<h1>{{ Title }}</h1>")
+
+    def test_template_is_compiled_once(self):
+        """Test that an unchanged file returns the same compiled template."""
+        self.assertIs(load_template(self.template), load_template(self.template))
+
+    def test_template_is_recompiled_when_file_changes(self):
+        """Test that editing the template file invalidates the compiled template."""
+        first = load_template(self.template)
+        self.write(self.template, "<h2>{{ Title }}</h2>")
+        stat = os.stat(self.template)
+        os.utime(self.template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        second = load_template(self.template)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.render({"Title": "New"}), "<h2>New</h2>")
+
+
+if __name__ == '__main__':
+    unittest.main()
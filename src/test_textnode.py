@@ -44,6 +44,20 @@ class TestTextNode(unittest.TestCase):
         node = TextNode("This is some text", "bold", "https://boot.dev")
         node2 = TextNode("This is also some text", "italics", None)
         self.assertNotEqual(node.url, node2.url)
+
+    def test_eq_compares_url(self):
+        node = TextNode("link", "link", "https://boot.dev")
+        node2 = TextNode("link", "link", "https://example.com")
+        self.assertNotEqual(node, node2)
+
+    def test_eq_other_type(self):
+        self.assertNotEqual(TextNode("text", "text"), "text")
+
+    def test_no_instance_dict(self):
+        node = TextNode("This is a text node", "bold")
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.extra = True
         
         
 if __name__ == "__main__":
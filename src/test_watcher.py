@@ -0,0 +1,126 @@
+import contextlib
+import io
+import os
+import sys
+import threading
+import unittest
+from manifest import BuildManifest
+from sitetest import TEMPLATE, SiteTestCase
+from watcher import InotifyWatcher, PollingWatcher, SiteWatcher
+
+
+class WatcherTestCase(SiteTestCase):
+
+    def setUp(self):
+        super().setUp()
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write(self.template, TEMPLATE)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome.")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nHello.")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+
+
+class TestSiteWatcher(WatcherTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.manifest = BuildManifest()
+        self.generate(manifest=self.manifest)
+        self.site = SiteWatcher(self.content, self.static, self.template, self.public, self.manifest)
+
+    def apply(self, *paths):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self.site.apply_changes(paths)
+
+    def test_edited_page_is_regenerated(self):
+        """Test that a markdown edit regenerates only that page."""
+        path = os.path.join(self.content, "blog", "post.md")
+        self.write(path, "# Post\n\nEdited.")
+        stats = self.apply(path)
+        self.assertEqual(stats["pages"], 1)
+        self.assertIn("Edited.", self.output("blog", "post.html"))
+
+    def test_new_page_is_generated_and_recorded(self):
+        """Test that a new markdown file becomes a page and a manifest entry."""
+        path = os.path.join(self.content, "blog", "new.md")
+        self.write(path, "# New\n\nFresh.")
+        self.apply(path)
+        self.assertTrue(os.path.exists(os.path.join(self.public, "blog", "new.html")))
+        self.assertIn(os.path.join("blog", "new.md"), self.manifest.pages)
+
+    def test_deleted_directory_removes_its_pages(self):
+        """Test that deleting a content directory removes every page generated from it."""
+        blog = os.path.join(self.content, "blog")
+        os.remove(os.path.join(blog, "post.md"))
+        os.rmdir(blog)
+        stats = self.apply(blog)
+        self.assertEqual(stats["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog")))
+
+    def test_static_file_is_copied_and_deleted(self):
+        """Test that static edits copy and deletes remove only the affected asset."""
+        path = os.path.join(self.static, "images", "logo.svg")
+        self.write(path, "<svg/>")
+        self.apply(path)
+        self.assertEqual(self.output("images", "logo.svg"), "<svg/>")
+        os.remove(path)
+        self.apply(path)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images", "logo.svg")))
+
+    def test_template_change_regenerates_all_pages(self):
+        """Test that a template edit regenerates every page."""
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        stats = self.apply(self.template)
+        self.assertEqual(stats["pages"], 2)
+        self.assertTrue(self.output("index.html").startswith("<h1>Home</h1>"))
+
+    def test_editor_temp_files_are_ignored(self):
+        """Test that editor swap files do not trigger any work."""
+        stats = self.apply(os.path.join(self.content, ".index.md.swp"), os.path.join(self.static, "a.css~"))
+        self.assertEqual(stats, {"pages": 0, "removed": 0, "assets": 0, "errors": []})
+
+
+class TestWatchers(WatcherTestCase):
+
+    def assertDetects(self, watcher, action, expected):
+        try:
+            timer = threading.Timer(0.05, action)
+            timer.start()
+            changed = watcher.wait(timeout=5)
+            timer.join()
+            self.assertIn(expected, changed)
+        finally:
+            watcher.close()
+
+    def test_polling_watcher_detects_edits(self):
+        """Test that the polling fallback reports modified files."""
+        path = os.path.join(self.content, "index.md")
+        watcher = PollingWatcher([self.content, self.static, self.template], interval=0.01)
+        self.assertDetects(watcher, lambda: self.write(path, "# Home\n\nChanged length."), path)
+
+    def test_polling_watcher_detects_deletes(self):
+        """Test that the polling fallback reports deleted files."""
+        path = os.path.join(self.static, "index.css")
+        watcher = PollingWatcher([self.content, self.static, self.template], interval=0.01)
+        self.assertDetects(watcher, lambda: os.remove(path), path)
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux-only")
+    def test_inotify_watcher_detects_new_directories(self):
+        """Test that files inside a directory created after startup are reported."""
+        watcher = InotifyWatcher([self.content, self.static, self.template])
+        new_dir = os.path.join(self.content, "new")
+        os.makedirs(new_dir)
+        watcher.wait(timeout=1)
+        path = os.path.join(new_dir, "page.md")
+        self.assertDetects(watcher, lambda: self.write(path, "# Page"), path)
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux-only")
+    def test_inotify_watcher_reports_only_the_template_from_its_directory(self):
+        """Test that unrelated files next to the template are ignored."""
+        watcher = InotifyWatcher([self.content, self.static, self.template])
+        self.write(self.path("notes.txt"), "ignored")
+        self.assertDetects(watcher, lambda: self.write(self.template, "{{ Content }}"), self.template)
+
+
+if __name__ == '__main__':
+    unittest.main()
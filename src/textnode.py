@@ -8,6 +8,9 @@ text_type_image = "image"
 
 # Base class for text nodes
 class TextNode():
+    # Slots instead of a per-instance __dict__: long documents create tens of thousands of these
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -17,9 +20,8 @@ class TextNode():
     def __eq__(self, other):
         if not isinstance(other, TextNode):
             return NotImplemented
-        # Get all attributes that are not methods or built-in properties
-        attributes = [attr for attr in dir(self) if not callable(getattr(self, attr)) and not attr.startswith("__")]
-        return all(getattr(self, attr) == getattr(other, attr) for attr in attributes)
+        # Compare the fields directly
+        return self.text == other.text and self.text_type == other.text_type and self.url == other.url
     def __repr__(self, printr=False):
         if printr:
             print(f"TextNode(text={self.text!r}, text_type={self.text_type!r}, url={self.url!r})")
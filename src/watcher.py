@@ -0,0 +1,375 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import signal
+import struct
+import sys
+import time
+from buildlog import log
+from compress import compress_file, is_compressible, remove_sidecar, sidecar_path
+from fingerprint import fingerprint_assets, remove_fingerprint, set_shared_asset_map
+from helper_functions import generate_page, generate_pages_recursive, page_paths, sync_directory, sync_file
+from listings import generate_listings
+from manifest import remove_empty_parents
+
+# inotify(7) constants
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+
+# struct inotify_event { int wd; uint32_t mask; uint32_t cookie; uint32_t len; char name[]; }
+INOTIFY_EVENT = struct.Struct("iIII")
+
+# How long to keep collecting events after the first one, so a burst becomes one rebuild
+DEBOUNCE_SECONDS = 0.02
+
+
+def is_editor_temp_file(path):
+    """Recognises the swap and backup files editors write next to the file being edited."""
+    name = os.path.basename(path)
+    return name.endswith("~") or name.startswith(".#") or name.endswith((".swp", ".swx"))
+
+
+class PollingWatcher():
+    """Portable watcher that detects changes by comparing stat snapshots of the watched paths."""
+
+    def __init__(self, paths, interval=0.25) -> None:
+        self.paths = paths
+        self.interval = interval
+        self.snapshot = self.take_snapshot()
+
+    def take_snapshot(self):
+        snapshot = {}
+        for path in self.paths:
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+                continue
+            for root, dirs, files in os.walk(path):
+                for file in files:
+                    file_path = os.path.join(root, file)
+                    try:
+                        stat = os.stat(file_path)
+                    except FileNotFoundError:
+                        continue
+                    snapshot[file_path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self):
+        """Returns the set of files created, modified or deleted since the last poll."""
+        snapshot = self.take_snapshot()
+        changed = {path for path, stamp in snapshot.items() if self.snapshot.get(path) != stamp}
+        changed.update(path for path in self.snapshot if path not in snapshot)
+        self.snapshot = snapshot
+        return changed
+
+    def wait(self, timeout=None):
+        """Blocks until something changed (or the timeout expired) and returns the changed paths."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = self.poll()
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+            time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher():
+    """Linux watcher driven by inotify events, with watches added recursively as directories appear.
+
+    A single file (such as the template) is watched through its parent directory, because
+    editors usually save by replacing the file, which would drop a watch on the file itself.
+    """
+
+    def __init__(self, paths) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.add_watch = libc.inotify_add_watch
+        self.add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = {}      # watch descriptor -> directory path
+        self.files = set()         # single files watched through their parent directory
+        self.file_only_wds = set() # parent directories that are watched only for those files
+        for path in paths:
+            if os.path.isdir(path):
+                self.watch_tree(path)
+        tree_wds = set(self.directories)
+        for path in paths:
+            if not os.path.isdir(path):
+                self.files.add(os.path.normpath(path))
+                wd = self.watch_directory(os.path.dirname(path) or ".")
+                if wd not in tree_wds:
+                    self.file_only_wds.add(wd)
+
+    def watch_directory(self, path):
+        wd = self.add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        self.directories[wd] = path
+        return wd
+
+    def watch_tree(self, path):
+        for root, dirs, files in os.walk(path):
+            self.watch_directory(root)
+
+    def read_events(self):
+        """Reads all pending events, returning the changed paths (or None after a queue overflow)."""
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, length = INOTIFY_EVENT.unpack_from(data, offset)
+                name = data[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + length].rstrip(b"\0")
+                offset += INOTIFY_EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    return None
+                if mask & IN_IGNORED or wd not in self.directories:
+                    self.directories.pop(wd, None)
+                    continue
+                path = os.path.normpath(os.path.join(self.directories[wd], os.fsdecode(name)))
+                if wd in self.file_only_wds:
+                    if path in self.files:
+                        changed.add(path)
+                    continue
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    self.watch_tree(path)
+                changed.add(path)
+
+    def wait(self, timeout=None):
+        """Blocks until events arrive (or the timeout expired) and returns the changed paths.
+
+        Returns None if the kernel queue overflowed and changes may have been lost.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        changed = set()
+        while not changed:
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            readable, _, _ = select.select([self.fd], [], [], remaining)
+            if not readable:
+                return changed
+            # Keep collecting for a moment so one save (write, rename, chmod...) is one rebuild
+            while readable:
+                events = self.read_events()
+                if events is None:
+                    return None
+                changed |= events
+                readable, _, _ = select.select([self.fd], [], [], DEBOUNCE_SECONDS)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def create_watcher(paths, poll_interval=None):
+    """Returns an InotifyWatcher when available, falling back to a PollingWatcher."""
+    if poll_interval is None and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError) as e:
+            log.info(f"inotify unavailable ({e}), falling back to polling")
+    return PollingWatcher(paths, poll_interval or 0.25)
+
+
+class SiteWatcher():
+    """Keeps a build warm and applies source changes to the output as they happen.
+
+    Markdown edits regenerate only the affected pages, static edits copy (or delete) only
+    the affected files, and a template edit regenerates every page through the manifest.
+    With fingerprinting, static edits also refresh the asset map and regenerate the pages
+    that link to an asset whose fingerprint changed. A SiteIndex, if given, is kept up
+    to date with content edits, and with listings (a page size) set, the section indexes
+    and tag archives whose pages or titles changed are regenerated from it.
+    """
+
+    def __init__(self, dir_path_content, dir_path_static, template_path, dest_dir_path, manifest, jobs=1,
+                 gzip=False, fingerprint=False, site_index=None, listings=None) -> None:
+        self.dir_path_content = os.path.normpath(dir_path_content)
+        self.dir_path_static = os.path.normpath(dir_path_static)
+        self.template_path = os.path.normpath(template_path)
+        self.dest_dir_path = dest_dir_path
+        self.manifest = manifest
+        self.jobs = jobs
+        self.gzip = gzip
+        self.fingerprint = fingerprint
+        self.site_index = site_index
+        self.listings = listings
+
+    def watched_paths(self):
+        return [self.dir_path_content, self.dir_path_static, self.template_path]
+
+    def apply_changes(self, paths):
+        """Rebuilds whatever the changed paths affect. Returns a dict counting what was done."""
+        stats = {"pages": 0, "removed": 0, "assets": 0, "errors": []}
+        paths = {os.path.normpath(path) for path in paths if not is_editor_temp_file(path)}
+
+        if self.template_path in paths:
+            log.info(f"Template changed: {self.template_path}")
+            result = generate_pages_recursive(self.dir_path_content, self.template_path, self.dest_dir_path,
+                                              manifest=self.manifest, jobs=self.jobs, gzip=self.gzip)
+            stats["pages"] += result["rebuilt"]
+            stats["removed"] += result["removed"]
+            stats["errors"] += result["errors"]
+            paths = {path for path in paths if not self.in_directory(path, self.dir_path_content)}
+
+        static_changed = False
+        content_changed = False
+        for path in sorted(paths):
+            if self.in_directory(path, self.dir_path_content):
+                self.apply_content_change(path, stats)
+                content_changed = True
+            elif self.in_directory(path, self.dir_path_static):
+                self.apply_static_change(path, stats)
+                static_changed = True
+        if static_changed and self.fingerprint:
+            self.refresh_fingerprints(stats)
+        if content_changed and self.site_index is not None:
+            self.site_index.update(self.dir_path_content)
+        if paths:
+            self.refresh_listings()
+        return stats
+
+    def refresh_listings(self):
+        """Regenerates the listings whose digest changed (checking one is cheap, so this follows every change)."""
+        if self.listings and self.site_index is not None:
+            generate_listings(self.site_index, self.template_path, self.dest_dir_path, manifest=self.manifest,
+                              page_size=self.listings, gzip=self.gzip)
+
+    def refresh_fingerprints(self, stats):
+        """Fingerprints the assets again and regenerates the pages whose asset references changed."""
+        set_shared_asset_map(fingerprint_assets(self.dir_path_static, self.dest_dir_path, self.manifest))
+        result = generate_pages_recursive(self.dir_path_content, self.template_path, self.dest_dir_path,
+                                          manifest=self.manifest, jobs=self.jobs, gzip=self.gzip)
+        stats["pages"] += result["rebuilt"]
+        stats["removed"] += result["removed"]
+        stats["errors"] += result["errors"]
+
+    def in_directory(self, path, directory):
+        return path.startswith(directory + os.sep)
+
+    def apply_content_change(self, path, stats):
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                for file in files:
+                    self.apply_content_change(os.path.join(root, file), stats)
+            return
+
+        key, html_path = page_paths(path, self.dir_path_content, self.dest_dir_path)
+        if os.path.exists(path):
+            if not path.endswith(".md"):
+                return
+            try:
+                state = self.manifest.source_state(key, path)
+                references = generate_page(path, self.template_path, html_path, self.gzip)
+            except Exception as e:
+                log.error(f"Failed to generate {path}: {type(e).__name__}: {e}", source=path)
+                stats["errors"].append((path, f"{type(e).__name__}: {e}"))
+                self.manifest.invalidate(key)
+                return
+            self.manifest.record(key, state, os.path.relpath(html_path, self.dest_dir_path), references)
+            stats["pages"] += 1
+            return
+
+        # The path is gone: drop the page, or every page under a deleted directory
+        for gone in [k for k in self.manifest.pages if k == key or k.startswith(key + os.sep)]:
+            output_path = os.path.join(self.dest_dir_path, self.manifest.pages.pop(gone)["output"])
+            if os.path.exists(output_path):
+                os.remove(output_path)
+                remove_sidecar(output_path)
+                remove_empty_parents(output_path, self.dest_dir_path)
+                log.file("page_removed", dest=output_path)
+                stats["removed"] += 1
+
+    def apply_static_change(self, path, stats):
+        key = os.path.relpath(path, self.dir_path_static)
+        dest_path = os.path.join(self.dest_dir_path, key)
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                for file in files:
+                    self.apply_static_change(os.path.join(root, file), stats)
+        elif os.path.exists(path):
+            sync_file(path, dest_path)
+            stat = os.stat(path)
+            previous = self.manifest.assets.get(key, {})
+            self.manifest.assets[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            if "fingerprint" in previous:
+                # Kept so the old twin is replaced when the asset is fingerprinted again
+                self.manifest.assets[key]["fingerprint"] = previous["fingerprint"]
+            if self.gzip and is_compressible(dest_path):
+                compress_file(path, sidecar_path(dest_path))
+                self.manifest.assets[key]["gzip"] = True
+            log.file("asset_copied", source=path, dest=dest_path)
+            stats["assets"] += 1
+        else:
+            # Only delete outputs the manifest knows came from static/
+            for gone in [k for k in self.manifest.assets if k == key or k.startswith(key + os.sep)]:
+                remove_fingerprint(self.dest_dir_path, self.manifest.assets.pop(gone))
+                gone_path = os.path.join(self.dest_dir_path, gone)
+                if os.path.exists(gone_path):
+                    os.remove(gone_path)
+                    remove_sidecar(gone_path)
+                    remove_empty_parents(gone_path, self.dest_dir_path)
+                    log.file("asset_deleted", dest=gone_path)
+                    stats["removed"] += 1
+
+    def full_rescan(self):
+        """Falls back to a manifest-driven build when events were lost."""
+        log.info("Watch queue overflowed, rescanning everything...")
+        asset_stats = sync_directory(self.dir_path_static, self.dest_dir_path, manifest=self.manifest,
+                                     jobs=self.jobs, gzip=self.gzip)
+        if self.fingerprint:
+            set_shared_asset_map(fingerprint_assets(self.dir_path_static, self.dest_dir_path, self.manifest))
+        stats = generate_pages_recursive(self.dir_path_content, self.template_path, self.dest_dir_path,
+                                         manifest=self.manifest, jobs=self.jobs, gzip=self.gzip)
+        if self.site_index is not None:
+            self.site_index.update(self.dir_path_content)
+        self.refresh_listings()
+        return {"pages": stats["rebuilt"], "removed": stats["removed"] + asset_stats["deleted"],
+                "assets": asset_stats["copied"], "errors": stats["errors"]}
+
+    def run(self, poll_interval=None, on_rebuild=None):
+        """Watches until interrupted, saving the manifest on the way out.
+
+        on_rebuild, if given, is called after every batch of changes has been applied.
+        """
+        watcher = create_watcher(self.watched_paths(), poll_interval)
+        # Treat SIGTERM like Ctrl+C so the manifest is still saved
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        log.info(f"Watching {', '.join(self.watched_paths())} ({type(watcher).__name__}); press Ctrl+C to stop")
+        try:
+            while True:
+                changed = watcher.wait()
+                if changed == set():
+                    continue
+                start = time.perf_counter()
+                stats = self.full_rescan() if changed is None else self.apply_changes(changed)
+                if on_rebuild is not None:
+                    on_rebuild()
+                elapsed = (time.perf_counter() - start) * 1000
+                log.info(f"Rebuilt {stats['pages']} page(s), copied {stats['assets']} asset(s), "
+                         f"removed {stats['removed']} in {elapsed:.1f} ms")
+        except KeyboardInterrupt:
+            log.info("Stopped watching.")
+        finally:
+            watcher.close()
+            self.manifest.save()
+            if self.site_index is not None:
+                self.site_index.save()